@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "students.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -116,3 +117,158 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = "static/"
+
+
+# Student success predictions
+# "sync" scores a student inside the request that saved it. "deferred" only
+# queues the id; a background thread rescores queued students in batches.
+
+STUDENT_PREDICTION_MODE = "sync"
+
+STUDENT_PREDICTION_BATCH_SIZE = 500
+
+STUDENT_PREDICTION_DELAY = 0.5  # seconds to let bursts of edits coalesce
+
+# Predictions are memoised per encoded feature row and model fingerprint.
+# Set the size to 0 to disable the in-process LRU; name a CACHES alias to
+# share results between worker processes. Shared entries expire after the
+# timeout (seconds), so those of replaced models do not accumulate.
+
+STUDENT_PREDICTION_CACHE_SIZE = 4096
+
+STUDENT_PREDICTION_CACHE_ALIAS = None
+
+STUDENT_PREDICTION_CACHE_TIMEOUT = 3600
+
+# Use the compiled lookup table written by "retrain_model --compile-table"
+# when it exists next to the model and matches it.
+
+STUDENT_PREDICTION_LOOKUP_TABLE = True
+
+# The model is loaded lazily on first use. With PRELOAD the WSGI/ASGI entry
+# points load it at import time instead (use with "gunicorn --preload" so
+# forked workers share it). MMAP_MODE is passed to joblib.load for the model
+# and lookup table; set it to None to copy arrays into each process.
+
+STUDENT_MODEL_PRELOAD = False
+
+STUDENT_MODEL_MMAP_MODE = "r"
+
+# How often (seconds) a running process checks ml_models/ACTIVE for a newly
+# published model version and hot-swaps it in. None disables the check.
+
+STUDENT_MODEL_RELOAD_INTERVAL = 5
+
+# Rows per page on the student list (keyset-paginated).
+
+STUDENT_LIST_PAGE_SIZE = 50
+
+# How the student page picks its top factors: "importance" (global feature
+# importance times the student's value) or "contributions" (how much each
+# input moved this student's prediction along its tree paths).
+
+STUDENT_EXPLANATION_METHOD = "importance"
+
+# Rows per transaction for "import_students" and the CSV upload page.
+
+STUDENT_IMPORT_CHUNK_SIZE = 5000
+
+# Rows fetched per database round trip by the streaming export.
+
+STUDENT_EXPORT_CHUNK_SIZE = 2000
+
+# Prometheus text metrics (prediction stage timings, prediction sources,
+# 0.5 fallbacks, per-view latency) are served on /metrics; set the flag to
+# False to hide it. Requests slower than SLOW_REQUEST_MS are logged at
+# WARNING, the rest at DEBUG.
+
+STUDENT_METRICS_ENDPOINT = True
+
+STUDENT_SLOW_REQUEST_MS = 500
+
+# Log records from the students app are written as one JSON object per line
+# (with the request/prediction fields passed as "extra").
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "students.metrics.JsonFormatter"},
+    },
+    "handlers": {
+        "json_console": {"class": "logging.StreamHandler", "formatter": "json"},
+    },
+    "loggers": {
+        "students": {"handlers": ["json_console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Serve the list, detail and prediction pages with the async views (for
+# ASGI servers). Their model work runs on a pool of INFERENCE_WORKERS threads
+# holding at most INFERENCE_MAX_PENDING calls; beyond that, or after
+# INFERENCE_TIMEOUT seconds, pages skip their factors and the JSON endpoint
+# answers 503.
+
+STUDENT_ASYNC_VIEWS = False
+
+STUDENT_INFERENCE_WORKERS = 2
+
+STUDENT_INFERENCE_MAX_PENDING = 32
+
+STUDENT_INFERENCE_TIMEOUT = 2.0
+
+# JSON API (/api/): concurrent single-row predictions are coalesced for up
+# to MICROBATCH_DELAY_MS into one model call of at most MICROBATCH_SIZE rows.
+# Batch and score lookups accept at most API_MAX_ITEMS entries.
+
+STUDENT_MICROBATCH_SIZE = 64
+
+STUDENT_MICROBATCH_DELAY_MS = 2
+
+STUDENT_API_MAX_ITEMS = 1000
+
+# The student list and detail pages are cached in this CACHES alias for
+# TIMEOUT seconds (0 disables it); saves, deletes, rescoring and imports
+# invalidate them, and a model swap changes the detail pages' ETags. Use a
+# shared backend when running several worker processes.
+
+STUDENT_PAGE_CACHE_ALIAS = "default"
+
+STUDENT_PAGE_CACHE_TIMEOUT = 300
+
+# Every score a student gets is appended to PredictionHistory (set the flag
+# to False to stop recording). "compact_prediction_history" moves rows older
+# than COMPACT_AFTER_DAYS into monthly .npz archives in ARCHIVE_DIR and
+# deletes archives older than RETENTION_DAYS (None keeps them).
+
+STUDENT_PREDICTION_HISTORY = True
+
+STUDENT_HISTORY_COMPACT_AFTER_DAYS = 90
+
+STUDENT_HISTORY_RETENTION_DAYS = 730
+
+STUDENT_HISTORY_ARCHIVE_DIR = BASE_DIR / "prediction_history"
+
+# "early_warning" (or "rescore_students --early-warning") raises a RiskAlert
+# for students whose success probability fell by at least ALERT_DROP, or
+# crossed below ALERT_HIGH_RISK_BELOW, since the previous scan.
+
+STUDENT_ALERT_DROP = 0.15
+
+STUDENT_ALERT_HIGH_RISK_BELOW = 0.4
+
+# Each scan also re-reads students updated this many seconds before the
+# previous one started, to catch writes that committed after it read them.
+
+STUDENT_ALERT_WATERMARK_LAG = 300
+
+# Keep Student.packed_features, the model inputs as one int16 vector, in sync
+# on save and import. Bulk rescoring, training and "export_features" read it;
+# rows without a vector fall back to the input columns.
+
+STUDENT_PACKED_FEATURES = True
+
+# Results file that "run_benchmarks" compares against (written with
+# --save-baseline). Baselines are machine-specific.
+
+STUDENT_BENCHMARK_BASELINE = BASE_DIR / "benchmark_baseline.json"
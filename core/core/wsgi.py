@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+
+# Load the prediction model before the server forks its workers, so they share
+# the model's memory instead of each unpickling a private copy.
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "STUDENT_MODEL_PRELOAD", False):
+    from students.prediction_service import predictor  # noqa: E402
+
+    predictor.load()
@@ -0,0 +1,226 @@
+# In students/api.py
+"""JSON prediction API.
+
+Payloads use the ``Student`` field names (``age``, ``study_time``, ...),
+mapped to the model's features through ``PREDICTION_FEATURES``, with the
+same choices and bounds as the form and the CSV import. Nothing here
+writes to the database.
+
+Values outside the feature schema's ranges are rejected with 400. Without
+a model, or when scoring fails, prediction endpoints answer 503 rather
+than the 0.5 the pages fall back to.
+
+- ``POST predict/``: one payload; ``?factors=N`` adds the top N factors.
+  Concurrent calls are coalesced by ``micro_batcher``.
+- ``POST predict/batch/``: ``{"students": [payload, ...]}``, scored with
+  one model call.
+- ``GET scores/?ids=1,2,3``: stored probabilities for many students.
+- ``GET history/<id>/?days=N``: a student's probabilities over the last N
+  days (default all), archived ones included.
+"""
+import asyncio
+import json
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import history
+from .importer import feature_validators
+from .inference import InferenceBusy, InferenceTimeout, inference_pool
+from .micro_batcher import micro_batcher
+from .models import Student
+from .prediction_service import PredictionUnavailable, factor_label, predictor
+
+MAX_FACTORS = 20
+
+# Primary keys are 64-bit; larger ids overflow the database driver.
+MAX_ID = 2 ** 63 - 1
+
+
+def _max_items():
+    return getattr(settings, 'STUDENT_API_MAX_ITEMS', 1000)
+
+
+def _error(message, status=400, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Request body is not valid JSON') from None
+
+
+def parse_features(payload, validators):
+    """Predictor input (keyed by feature name) from one JSON object; raises ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError('expected an object of student fields')
+    data = {}
+    for name, column, choices, (low, high) in validators:
+        value = payload.get(name)
+        if value is None:
+            raise ValueError(f'missing {name}')
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f'{name} must be an integer')
+        if choices is not None and value not in choices:
+            raise ValueError(f'{name} must be one of {sorted(choices)}, got {value}')
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f'{name} out of range: {value}')
+        data[column] = value
+    return data
+
+
+def _parse_factors(request):
+    text = request.GET.get('factors') or '0'
+    if not text.isdigit() or int(text) > MAX_FACTORS:
+        raise ValueError(f'factors must be an integer from 0 to {MAX_FACTORS}')
+    return int(text)
+
+
+def _parse_predict(request):
+    return parse_features(_json_body(request), feature_validators()), _parse_factors(request)
+
+
+def _explain(data, top_n):
+    current = predictor.load()
+    method = getattr(settings, 'STUDENT_EXPLANATION_METHOD', 'importance')
+    return [{**item, 'label': factor_label(item)} for item in current.explain(data, top_n=top_n, method=method)]
+
+
+def _prediction(probability, version, factors=None):
+    result = {'success_probability': probability, 'model_version': version}
+    if factors is not None:
+        result['factors'] = factors
+    return result
+
+
+def _unavailable(message='Prediction service busy, retry shortly'):
+    response = _error(message, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def predict(request):
+    """Success probability for one ad-hoc payload."""
+    try:
+        data, top_n = _parse_predict(request)
+    except ValueError as e:
+        return _error(str(e))
+    try:
+        probability, version = micro_batcher.predict(data, timeout=getattr(settings, 'STUDENT_INFERENCE_TIMEOUT', 2.0))
+    except FutureTimeout:
+        return _unavailable()
+    except PredictionUnavailable as e:
+        return _unavailable(str(e))
+    return JsonResponse(_prediction(probability, version, _explain(data, top_n) if top_n else None))
+
+
+@csrf_exempt
+@require_POST
+async def apredict(request):
+    """Async ``predict``: waits for the micro-batch without holding a thread."""
+    try:
+        data, top_n = _parse_predict(request)
+    except ValueError as e:
+        return _error(str(e))
+    try:
+        probability, version = await asyncio.wait_for(
+            asyncio.wrap_future(micro_batcher.submit(data)), getattr(settings, 'STUDENT_INFERENCE_TIMEOUT', 2.0)
+        )
+        factors = await inference_pool.run(_explain, data, top_n) if top_n else None
+    except (asyncio.TimeoutError, InferenceBusy, InferenceTimeout):
+        return _unavailable()
+    except PredictionUnavailable as e:
+        return _unavailable(str(e))
+    return JsonResponse(_prediction(probability, version, factors))
+
+
+@csrf_exempt
+@require_POST
+def predict_batch(request):
+    """Success probabilities for a list of payloads, in order, from one model call."""
+    try:
+        body = _json_body(request)
+    except ValueError as e:
+        return _error(str(e))
+    items = body.get('students') if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return _error('expected {"students": [...]}')
+    if len(items) > _max_items():
+        return _error(f'at most {_max_items()} students per request', status=413)
+
+    validators = feature_validators()
+    rows, errors = [], {}
+    for i, item in enumerate(items):
+        try:
+            rows.append(parse_features(item, validators))
+        except ValueError as e:
+            errors[str(i)] = str(e)
+    if errors:
+        return _error('invalid students', errors=errors)
+
+    current = predictor.load()
+    try:
+        probabilities = current.predict_many(rows, fallback=False)
+    except PredictionUnavailable as e:
+        return _unavailable(str(e))
+    return JsonResponse({
+        'model_version': current.version,
+        'success_probabilities': [float(probability) for probability in probabilities],
+    })
+
+
+@require_GET
+def scores(request):
+    """Stored success probabilities for ``?ids=1,2,3`` (or repeated ``ids``)."""
+    try:
+        ids = list(dict.fromkeys(
+            int(part) for value in request.GET.getlist('ids') for part in value.split(',') if part.strip()
+        ))
+    except ValueError:
+        return _error('ids must be integers')
+    if any(not -MAX_ID - 1 <= pk <= MAX_ID for pk in ids):
+        return _error('ids must be 64-bit integers')
+    if not ids:
+        return _error('pass ids=1,2,3')
+    if len(ids) > _max_items():
+        return _error(f'at most {_max_items()} ids per request', status=413)
+
+    found = {
+        pk: {'success_probability': probability, 'model_version': version}
+        for pk, probability, version in Student.objects.filter(pk__in=ids).values_list(
+            'pk', 'success_probability', 'model_version'
+        )
+    }
+    return JsonResponse({
+        'scores': {str(pk): found[pk] for pk in ids if pk in found},
+        'missing': [pk for pk in ids if pk not in found],
+    })
+
+
+@require_GET
+def prediction_history(request, student_id):
+    """A student's recorded probabilities, oldest first."""
+    student = get_object_or_404(Student.objects.only('pk'), pk=student_id)
+    days = request.GET.get('days')
+    if days is not None and not days.isdigit():
+        return _error('days must be a non-negative integer')
+    since = timezone.now() - timedelta(days=int(days)) if days is not None else None
+    return JsonResponse({
+        'id': student.pk,
+        'history': [
+            {'recorded_at': recorded_at.isoformat(), 'success_probability': probability, 'model_version': version}
+            for recorded_at, probability, version in history.trend(student.pk, since=since)
+        ],
+    })
@@ -0,0 +1,19 @@
+# In students/api_urls.py
+from django.conf import settings
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    # Under ASGI the single-row endpoint awaits its micro-batch instead of blocking a thread.
+    path(
+        "predict/",
+        api.apredict if getattr(settings, 'STUDENT_ASYNC_VIEWS', False) else api.predict,
+        name="predict",
+    ),
+    path("predict/batch/", api.predict_batch, name="predict_batch"),
+    path("scores/", api.scores, name="scores"),
+    path("history/<int:student_id>/", api.prediction_history, name="prediction_history"),
+]
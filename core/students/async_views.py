@@ -0,0 +1,93 @@
+# In students/async_views.py
+"""Async versions of the list, detail and prediction views, for ASGI servers.
+
+They read through the async ORM and run model work on ``inference_pool``,
+so a slow ``predict_proba`` never blocks the event loop. When the pool is
+full or too slow, the detail page is rendered without its factors (and is
+neither cached nor given validators) and the JSON endpoint answers 503.
+Conditional GET and the page cache work as in the sync views; cache
+lookups, flash messages and template rendering may hit the session store or
+a database/Redis cache, so they go through ``sync_to_async`` like the ORM
+calls. ``urls.py`` routes to these instead of the sync views when
+``STUDENT_ASYNC_VIEWS`` is on.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+
+from . import page_cache
+from .forms import StudentFilterForm
+from .inference import InferenceBusy, InferenceTimeout, inference_pool
+from .models import Student
+from .pagination import akeyset_paginate
+from .prediction_service import predictor
+from .views import list_queryset, prediction_payload, render_detail, render_list, score_and_explain
+
+
+async def student_list(request):
+    """Async ``views.student_list``."""
+    key = await sync_to_async(page_cache.list_key)(request)
+    response = await sync_to_async(page_cache.cached_page)(key)
+    if response is not None:
+        return response
+
+    filters = StudentFilterForm(request.GET)
+    filters.is_valid()  # invalid parameters are reported and ignored
+
+    ordering = filters.ordering()
+    # Building the queryset may look up the search index's table.
+    queryset = await sync_to_async(list_queryset)(filters, ordering)
+    page = await akeyset_paginate(
+        queryset,
+        ordering,
+        cursor=request.GET.get('after'),
+        page_size=getattr(settings, 'STUDENT_LIST_PAGE_SIZE', 50),
+    )
+    response = await sync_to_async(render_list)(request, filters, page)
+    await sync_to_async(page_cache.store_page)(key, response)
+    return response
+
+
+async def _render_student_detail(request, student_id):
+    """``(response, complete)``; not complete if the factors had to be left out."""
+    student = await aget_object_or_404(Student, id=student_id)
+    try:
+        success_probability, raw_factors = await inference_pool.run(score_and_explain, student)
+    except (InferenceBusy, InferenceTimeout):
+        return await sync_to_async(render_detail)(request, student, student.success_probability, []), False
+    return await sync_to_async(render_detail)(request, student, success_probability, raw_factors), True
+
+
+async def student_detail(request, student_id):
+    """Async ``views.student_detail``; factors are left out if inference is overloaded."""
+    row = await aget_object_or_404(Student.objects.values_list(*page_cache.VALIDATOR_FIELDS), id=student_id)
+    if not await sync_to_async(page_cache.cacheable)(request):
+        return (await _render_student_detail(request, student_id))[0]
+
+    # The first load unpickles the model; keep that off the event loop.
+    current = predictor.load() if predictor.loaded else await sync_to_async(predictor.load)()
+    etag, last_modified = page_cache.detail_validators(student_id, row, current)
+    response = page_cache.not_modified(request, etag, last_modified)
+    if response is None:
+        key = page_cache.detail_key(student_id)
+        response = await sync_to_async(page_cache.cached_page)(key, etag)
+        if response is None:
+            response, complete = await _render_student_detail(request, student_id)
+            if not complete:
+                return response
+            await sync_to_async(page_cache.store_page)(key, response, etag)
+    return page_cache.with_validators(response, etag, last_modified)
+
+
+async def student_prediction(request, student_id):
+    """Async ``views.student_prediction``; 503 with Retry-After when inference is overloaded."""
+    student = await aget_object_or_404(Student, id=student_id)
+    try:
+        result = await inference_pool.run(score_and_explain, student)
+    except (InferenceBusy, InferenceTimeout) as e:
+        reason = 'busy' if isinstance(e, InferenceBusy) else 'timeout'
+        response = JsonResponse({'error': f'Prediction service {reason}, retry shortly'}, status=503)
+        response['Retry-After'] = '1'
+        return response
+    return JsonResponse(prediction_payload(student, *result))
@@ -0,0 +1,272 @@
+# In students/benchmark_suite.py
+"""The ``run_benchmarks`` suite: prediction and web hot paths at several scales.
+
+Every result is a single number where lower is better, keyed by a dotted
+name (``predict.single.p50_us``, ``student_list.10000.p50_ms``), so two
+runs can be compared key by key. Populations, inputs and the model are
+generated from fixed seeds, so runs on the same machine are comparable.
+"""
+import gc
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .benchmarks import memory_usage, peak_rss_mb, populate_students, random_student_data, time_call
+
+# A result more than this fraction above its baseline is a regression.
+DEFAULT_TOLERANCE = 0.25
+
+
+def environment():
+    import django
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def _model_benchmarks(model_path, iterations, seed):
+    from .prediction_cache import PredictionCache
+    from .prediction_service import StudentPerformancePredictor
+
+    results = {}
+    gc.collect()
+    before = memory_usage()['rss_mb']
+    # Uncached, so every call below reaches the model.
+    predictor = StudentPerformancePredictor(model_path, cache=PredictionCache(max_size=0))
+    results['model.rss_mb'] = max(memory_usage()['rss_mb'] - before, 0.0)
+    results['model.load.p50_ms'] = time_call(
+        lambda: StudentPerformancePredictor(model_path, cache=PredictionCache(max_size=0)),
+        max(iterations // 50, 3), warmup=1,
+    )['p50_us'] / 1000
+
+    rng = np.random.default_rng(seed)
+    students = [random_student_data(rng) for _ in range(1000)]
+    cursor = iter(range(10 ** 12))
+
+    def pick():
+        return students[next(cursor) % len(students)]
+
+    results['predict.single.p50_us'] = time_call(
+        lambda: predictor.predict_success_probability(pick()), iterations
+    )['p50_us']
+    results['predict.batch_1000.per_row_us'] = time_call(
+        lambda: predictor.predict_many(students), max(iterations // 100, 3), warmup=1
+    )['p50_us'] / len(students)
+    for method in ('importance', 'contributions'):
+        results[f'explain.{method}.p50_us'] = time_call(
+            lambda: predictor.explain(pick(), method=method), iterations
+        )['p50_us']
+    results.update(_flat_model_benchmarks(model_path, students, pick, iterations))
+    return results
+
+
+def _cold_load_ms(path):
+    """Wall time of a fresh interpreter that imports joblib and loads ``path``."""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', 'import sys, joblib; joblib.load(sys.argv[1])', str(path)],
+        check=True,
+        cwd=Path(__file__).resolve().parents[1],
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def _flat_model_benchmarks(model_path, students, pick, iterations):
+    """The same model flattened (``retrain_model --flat``): size, cold start and latency."""
+    import tempfile
+
+    import joblib
+
+    from .flat_forest import FlatForest
+    from .prediction_cache import PredictionCache
+    from .prediction_service import StudentPerformancePredictor
+
+    results = {}
+    model_data = joblib.load(model_path)
+    try:
+        flat = FlatForest.from_estimator(model_data['model'])
+    except ValueError:
+        return results
+    with tempfile.TemporaryDirectory() as directory:
+        flat_path = Path(directory) / 'model.pkl'
+        joblib.dump(dict(model_data, model=flat), flat_path)
+        flat_predictor = StudentPerformancePredictor(flat_path, cache=PredictionCache(max_size=0))
+
+        results['model.size_kb'] = Path(model_path).stat().st_size / 1024
+        results['model.flat.size_kb'] = flat_path.stat().st_size / 1024
+        runs = max(1, min(3, iterations // 50))
+        results['model.cold_load_ms'] = min(_cold_load_ms(model_path) for _ in range(runs))
+        results['model.flat.cold_load_ms'] = min(_cold_load_ms(flat_path) for _ in range(runs))
+        results['predict.flat.single.p50_us'] = time_call(
+            lambda: flat_predictor.predict_success_probability(pick()), iterations
+        )['p50_us']
+        results['predict.flat.batch_1000.per_row_us'] = time_call(
+            lambda: flat_predictor.predict_many(students), max(iterations // 100, 3), warmup=1
+        )['p50_us'] / len(students)
+    return results
+
+
+def _web_benchmarks(size, iterations, seed):
+    from django.test import RequestFactory, override_settings
+
+    from .models import PREDICTION_FEATURES, Student
+    from .views import student_detail, student_list
+
+    factory = RequestFactory()
+    middle = Student.objects.order_by('id').values_list('id', flat=True)[size // 2]
+    results = {}
+    # Full renders first, then the page cache and the 304 path.
+    with override_settings(STUDENT_PAGE_CACHE_TIMEOUT=0):
+        results[f'student_list.{size}.p50_ms'] = time_call(
+            lambda: student_list(factory.get('/students/')), iterations, warmup=2
+        )['p50_us'] / 1000
+        results[f'student_detail.{size}.p50_ms'] = time_call(
+            lambda: student_detail(factory.get(f'/students/{middle}/'), middle), iterations, warmup=2
+        )['p50_us'] / 1000
+
+    results[f'student_list.{size}.cached_p50_ms'] = time_call(
+        lambda: student_list(factory.get('/students/')), iterations, warmup=2
+    )['p50_us'] / 1000
+    results[f'student_detail.{size}.cached_p50_ms'] = time_call(
+        lambda: student_detail(factory.get(f'/students/{middle}/'), middle), iterations, warmup=2
+    )['p50_us'] / 1000
+    etag = student_detail(factory.get(f'/students/{middle}/'), middle)['ETag']
+    results[f'student_detail.{size}.not_modified_p50_ms'] = time_call(
+        lambda: student_detail(factory.get(f'/students/{middle}/', headers={'If-None-Match': etag}), middle),
+        iterations,
+        warmup=2,
+    )['p50_us'] / 1000
+
+    # Each save changes the inputs, so the post_save signal rescores the
+    # student; a new sequence per size keeps the prediction cache cold.
+    rng = np.random.default_rng(seed + size)
+    student = Student.objects.get(id=middle)
+
+    def save():
+        data = random_student_data(rng)
+        for field, feature in PREDICTION_FEATURES.items():
+            setattr(student, field, data[feature])
+        student.save()
+
+    with override_settings(STUDENT_PREDICTION_MODE='sync'):
+        results[f'save_with_signal.{size}.p50_us'] = time_call(save, iterations, warmup=2)['p50_us']
+    return results
+
+
+def _scoring_benchmarks(model_path, size, seed):
+    """Full-table reads and bulk scoring: model instances vs packed vectors vs a memmap export."""
+    import tempfile
+
+    from .feature_vectors import COLUMNS, export_matrix, load_matrix, read_chunks
+    from .models import PREDICTION_FEATURES, Student
+    from .prediction_cache import PredictionCache
+    from .prediction_service import StudentPerformancePredictor
+
+    predictor = StudentPerformancePredictor(model_path, cache=PredictionCache(max_size=0))
+    chunk_size = 5000
+
+    def instance_chunks():
+        # How rescore read rows before the packed vectors.
+        queryset = Student.objects.order_by('pk').only('pk', *PREDICTION_FEATURES)
+        last_pk = 0
+        while students := list(queryset.filter(pk__gt=last_pk)[:chunk_size]):
+            yield students
+            last_pk = students[-1].pk
+
+    def packed_chunks():
+        for _, matrix, _ in read_chunks(Student.objects.all(), chunk_size):
+            yield matrix
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        export_matrix(directory, chunk_size=chunk_size)
+        _, features, _ = load_matrix(directory)
+
+        def memmap_chunks():
+            for start in range(0, len(features), chunk_size):
+                # A copy, so the read is timed rather than deferred to the first touch.
+                yield np.array(features[start:start + chunk_size])
+
+        readers = {
+            'instances': (instance_chunks, predictor.predict_many),
+            'packed': (packed_chunks, lambda matrix: predictor.predict_matrix(matrix, COLUMNS)),
+            'memmap': (memmap_chunks, lambda matrix: predictor.predict_matrix(matrix, COLUMNS)),
+        }
+        for name, (chunks, score) in readers.items():
+            results[f'read.{size}.{name}_ms'] = time_call(
+                lambda: [len(chunk) for chunk in chunks()], 3, warmup=1
+            )['p50_us'] / 1000
+            results[f'score.{size}.{name}_ms'] = time_call(
+                lambda: [score(chunk) for chunk in chunks()], 3, warmup=1
+            )['p50_us'] / 1000
+    return results
+
+
+def run_suite(model_path, sizes=(1_000, 10_000), iterations=200, web_iterations=20, seed=0, progress=None):
+    """Run every benchmark and return ``{'environment', 'config', 'results'}``.
+
+    The web benchmarks grow the ``Student`` table to each of ``sizes`` in
+    turn, so run this against a throwaway database. ``model_path`` is served
+    by the views for the duration of the run.
+    """
+    from .models import Student
+    from .prediction_service import StudentPerformancePredictor, predictor
+
+    def report(name):
+        if progress is not None:
+            progress(name)
+
+    report('model')
+    results = _model_benchmarks(model_path, iterations, seed)
+
+    with predictor.serving(StudentPerformancePredictor(model_path)):
+        for size in sorted(sizes):
+            report(f'{size:,} students')
+            populated = Student.objects.count()
+            if populated < size:
+                populate_students(size - populated, seed=seed + size)
+            results.update(_web_benchmarks(size, web_iterations, seed))
+            results.update(_scoring_benchmarks(model_path, size, seed))
+
+    results['process.peak_rss_mb'] = peak_rss_mb()
+    return {
+        'environment': environment(),
+        'config': {
+            'sizes': sorted(sizes), 'iterations': iterations, 'web_iterations': web_iterations, 'seed': seed,
+        },
+        'results': results,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(results, baseline):
+    """Compare two ``results`` dicts; returns ``[(name, value, baseline value, change)]``.
+
+    ``change`` is the relative difference (0.1 is 10% slower or bigger) and is
+    ``None`` for results missing from the baseline (or zero there).
+    """
+    rows = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference is None or reference <= 0:
+            rows.append((name, value, reference, None))
+        else:
+            rows.append((name, value, reference, value / reference - 1))
+    return rows
+
+
+def regressions(rows, tolerance=DEFAULT_TOLERANCE):
+    """The ``compare`` rows whose change exceeds ``tolerance``."""
+    return [row for row in rows if row[3] is not None and row[3] > tolerance]
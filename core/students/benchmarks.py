@@ -0,0 +1,139 @@
+# In students/benchmarks.py
+"""Helpers shared by the benchmark commands and the test suite."""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .feature_schema import CATEGORICAL, FEATURES, RANGES, SCHEMA_HASH
+
+
+def random_student_data(rng):
+    """Return one student dict in the layout the predictor expects."""
+    return {col: int(rng.integers(low, high + 1)) for col, (low, high) in RANGES.items()}
+
+
+def synthetic_dataset(n_rows, seed=0):
+    """Build a semicolon-CSV-shaped frame with the columns retrain_model reads."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        col: rng.integers(low, high + 1, size=n_rows)
+        for col, (low, high) in RANGES.items()
+    })
+    df['absences'] = np.minimum(rng.poisson(5, size=n_rows), 93)
+    score = (
+        11
+        - 2.5 * df['failures']
+        + 1.2 * df['studytime']
+        + 0.5 * df['Medu']
+        - 0.15 * df['absences']
+        - 0.6 * df['Dalc']
+        + rng.normal(0, 2.5, size=n_rows)
+    )
+    df['G3'] = np.clip(np.round(score), 0, 20).astype(int)
+    return df
+
+
+def train_synthetic_model(model_path, n_rows=400, n_estimators=100, seed=0):
+    """Train a model on synthetic data and save it in the app's artifact format."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    df = synthetic_dataset(n_rows, seed=seed)
+    X = df[FEATURES].copy()
+    for col in CATEGORICAL:
+        X[col] = X[col].astype(str)
+    X = pd.get_dummies(X, columns=CATEGORICAL)
+    y = (df['G3'] >= 10).astype(int)
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed)
+    model.fit(X, y)
+
+    joblib.dump({
+        'model': model,
+        'feature_names': X.columns.tolist(),
+        'categorical_columns': CATEGORICAL,
+        'feature_schema': SCHEMA_HASH,
+    }, model_path)
+    return model_path
+
+
+def time_call(fn, iterations, warmup=10):
+    """Call ``fn`` repeatedly and return per-call timings in microseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'mean_us': statistics.fmean(samples),
+        'p50_us': samples[len(samples) // 2],
+        'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MiB, or None where the platform does not report it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def memory_usage():
+    """Resident and proportional set size of this process in MiB.
+
+    PSS splits shared pages between the processes mapping them, so summing
+    it across forked workers shows how much memory they really cost.
+    """
+    peak = peak_rss_mb()
+    usage = {'rss_mb': peak if peak is not None else float('nan'), 'pss_mb': float('nan')}
+    rollup = Path('/proc/self/smaps_rollup')
+    if rollup.exists():
+        for line in rollup.read_text().splitlines():
+            name, _, value = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                usage[f'{name.lower()}_mb'] = int(value.split()[0]) / 1024
+    return usage
+
+
+def populate_students(n_rows, seed=0, batch_size=5000):
+    """Bulk-insert ``n_rows`` synthetic students (no signals, no predictions).
+
+    Returns the number of rows inserted.
+    """
+    from . import feature_vectors, page_cache
+    from .models import PREDICTION_FEATURES, Student
+
+    rng = np.random.default_rng(seed)
+    df = synthetic_dataset(n_rows, seed=seed)
+    gpa = np.round(df['G3'].to_numpy() / 5, 2)
+    probability = np.round(rng.random(n_rows), 4)
+    columns = {field: df[feature].to_numpy() for field, feature in PREDICTION_FEATURES.items()}
+    packed = None
+    if feature_vectors.enabled():
+        packed = np.column_stack(list(columns.values())).astype(feature_vectors.DTYPE)
+
+    for start in range(0, n_rows, batch_size):
+        stop = min(start + batch_size, n_rows)
+        Student.objects.bulk_create([
+            Student(
+                name=f'Student {seed}-{i}',
+                gpa=float(gpa[i]),
+                success_probability=float(probability[i]),
+                packed_features=None if packed is None else packed[i].tobytes(),
+                **{field: int(values[i]) for field, values in columns.items()},
+            )
+            for i in range(start, stop)
+        ], batch_size=batch_size)
+    page_cache.invalidate()
+    return n_rows
@@ -0,0 +1,133 @@
+# In students/early_warning.py
+"""Early-warning scan: flag students whose risk jumped since the last scan.
+
+A run reads only the students updated after the previous run's watermark
+(``Student.updated_at`` moves on saves and on every rescore), a primary-key
+chunk at a time and with just the probability and the model inputs. Each
+chunk is compared with its ``EarlyWarningBaseline`` rows as arrays: a
+``RiskAlert`` is raised when the probability fell by at least ``drop`` or
+crossed below ``high_risk_below``, noting which inputs moved. Baselines
+then advance to what was seen, so a change alerts once, even when the
+overlap between runs (``STUDENT_ALERT_WATERMARK_LAG``) reads it again. A
+student's first scan only records its baseline.
+
+Run it after batch rescores (``rescore_students --early-warning``) or from
+a scheduler (``python manage.py early_warning``), one run at a time.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .feature_vectors import DTYPE as INPUT_DTYPE, LIMITS as INPUT_LIMITS
+from .models import (
+    HIGH_RISK_BELOW, PREDICTION_FEATURES, EarlyWarningBaseline, EarlyWarningRun, RiskAlert, Student,
+)
+
+FIELDS = list(PREDICTION_FEATURES)
+
+
+def changed_inputs(before, after):
+    """``"absences +6, study_time -1"`` for the inputs that differ between two rows."""
+    moved = np.flatnonzero(before != after)
+    return ', '.join(f'{FIELDS[i]} {int(after[i]) - int(before[i]):+d}' for i in moved)[:255]
+
+
+def scan(rows, baselines, drop, high_risk_below, now=None):
+    """``(alerts, new baselines)`` for one chunk.
+
+    ``rows`` are ``(pk, probability, model_version, *inputs)`` in primary-key
+    order and ``baselines`` ``(student_id, probability, inputs)`` for the
+    students among them that have one.
+    """
+    now = now or timezone.now()
+    pks = np.array([row[0] for row in rows], dtype=np.int64)
+    probability = np.array([row[1] for row in rows], dtype=np.float64)
+    # Baselines store int16; an input outside it (a row older than the
+    # form's bounds) is compared saturated.
+    inputs = np.clip(np.array([row[3:] for row in rows], dtype=np.int64), INPUT_LIMITS.min, INPUT_LIMITS.max)
+    inputs = inputs.astype(INPUT_DTYPE)
+
+    previous = np.full(len(rows), np.nan)
+    previous_inputs = inputs.copy()
+    if baselines:
+        ids, probabilities, blobs = zip(*baselines)
+        positions = np.searchsorted(pks, np.array(ids, dtype=np.int64))
+        previous[positions] = probabilities
+        previous_inputs[positions] = np.frombuffer(b''.join(blobs), dtype=INPUT_DTYPE).reshape(len(ids), len(FIELDS))
+
+    known = ~np.isnan(previous)
+    crossed = known & (previous >= high_risk_below) & (probability < high_risk_below)
+    # The tolerance keeps a fall of exactly ``drop`` (0.6 -> 0.55) from missing by rounding.
+    dropped = known & (previous - probability >= drop - 1e-9)
+    alerts = [
+        RiskAlert(
+            student_id=int(pks[i]),
+            kind='high_risk' if crossed[i] else 'drop',
+            previous_probability=float(previous[i]),
+            success_probability=float(probability[i]),
+            changed_inputs=changed_inputs(previous_inputs[i], inputs[i]),
+            model_version=rows[i][2],
+            created_at=now,
+        )
+        for i in np.flatnonzero(crossed | dropped)
+    ]
+
+    moved = ~known | (previous != probability) | (previous_inputs != inputs).any(axis=1)
+    updated = [
+        EarlyWarningBaseline(
+            student_id=int(pks[i]), success_probability=float(probability[i]), inputs=inputs[i].tobytes()
+        )
+        for i in np.flatnonzero(moved)
+    ]
+    return alerts, updated
+
+
+def run(drop=None, high_risk_below=None, full=False, chunk_size=5000):
+    """Scan the students changed since the last run (all with ``full``); returns the ``EarlyWarningRun``."""
+    if drop is None:
+        drop = getattr(settings, 'STUDENT_ALERT_DROP', 0.15)
+    if high_risk_below is None:
+        high_risk_below = getattr(settings, 'STUDENT_ALERT_HIGH_RISK_BELOW', HIGH_RISK_BELOW)
+
+    started = timezone.now()
+    # Writers stamp updated_at before they commit, so a row can turn up
+    # stamped earlier than a scan that missed it. The next run re-reads that
+    # window; rows unchanged since their baseline raise nothing.
+    watermark = started - timedelta(seconds=getattr(settings, 'STUDENT_ALERT_WATERMARK_LAG', 300))
+    students = Student.objects.filter(success_probability__isnull=False)
+    last = EarlyWarningRun.objects.order_by('-watermark').first()
+    if last is not None and not full:
+        students = students.filter(updated_at__gt=last.watermark)
+    queryset = students.order_by('pk').values_list('pk', 'success_probability', 'model_version', *FIELDS)
+
+    scanned = flagged = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            break
+        baselines = list(
+            EarlyWarningBaseline.objects.filter(student_id__in=[row[0] for row in rows])
+            .order_by('student_id')
+            .values_list('student_id', 'success_probability', 'inputs')
+        )
+        alerts, updated = scan(rows, [(pk, p, bytes(blob)) for pk, p, blob in baselines], drop, high_risk_below)
+        with transaction.atomic():
+            RiskAlert.objects.bulk_create(alerts)
+            EarlyWarningBaseline.objects.bulk_create(
+                updated,
+                update_conflicts=True,
+                unique_fields=['student'],
+                update_fields=['success_probability', 'inputs'],
+            )
+        scanned += len(rows)
+        flagged += len(alerts)
+        last_pk = rows[-1][0]
+
+    return EarlyWarningRun.objects.create(
+        started_at=started, finished_at=timezone.now(), watermark=watermark, scanned=scanned, flagged=flagged
+    )
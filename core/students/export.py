@@ -0,0 +1,109 @@
+# In students/export.py
+"""Streaming export of the roster with predictions as CSV or JSON Lines.
+
+Rows are read with ``QuerySet.iterator`` and written a chunk at a time, so
+memory stays constant however many students are exported. The output can
+be gzip-compressed on the fly.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import PREDICTION_FEATURES
+from .prediction_service import factor_label
+
+EXPORT_FIELDS = (
+    'id', 'name', 'gpa', *PREDICTION_FEATURES, 'success_probability', 'model_version', 'created_at',
+)
+
+# Format -> (content type, file extension).
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def export_rows(queryset, chunk_size=2000, factors=0, predictor=None):
+    """Yield the queryset as lists of row dicts, ``chunk_size`` rows at a time.
+
+    With ``factors`` each row also gets ``top_factors``: labels of the
+    student's top explanation factors under the serving model.
+    """
+    if factors and predictor is None:
+        from .prediction_service import predictor
+    method = getattr(settings, 'STUDENT_EXPLANATION_METHOD', 'importance')
+
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        current = predictor.load() if factors else None
+        for row in chunk:
+            row['created_at'] = row['created_at'].isoformat()
+            if current is not None:
+                data = {feature: row[field] for field, feature in PREDICTION_FEATURES.items()}
+                row['top_factors'] = [
+                    factor_label(item) for item in current.explain(data, top_n=factors, method=method)
+                ]
+        yield chunk
+
+
+def _take(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def csv_chunks(chunks, factors=False):
+    """CSV text, one piece per chunk; ``top_factors`` are joined with ``|``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    fields = [*EXPORT_FIELDS, 'top_factors'] if factors else list(EXPORT_FIELDS)
+    writer.writerow(fields)
+    yield _take(buffer)
+    for chunk in chunks:
+        for row in chunk:
+            if factors:
+                row['top_factors'] = '|'.join(row['top_factors'])
+            writer.writerow([row[field] for field in fields])
+        yield _take(buffer)
+
+
+def jsonl_chunks(chunks):
+    for chunk in chunks:
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of bytes into one gzip member as it goes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, export_format='csv', factors=0, compress=False, chunk_size=2000, predictor=None):
+    """Return an iterator of bytes holding the export of ``queryset``."""
+    chunks = export_rows(queryset, chunk_size=chunk_size, factors=factors, predictor=predictor)
+    if export_format == 'csv':
+        text = csv_chunks(chunks, factors=bool(factors))
+    elif export_format == 'jsonl':
+        text = jsonl_chunks(chunks)
+    else:
+        raise ValueError(f'Unknown export format: {export_format}')
+    data = (piece.encode() for piece in text)
+    return gzip_chunks(data) if compress else data
+
+
+def export_filename(export_format='csv', compress=False):
+    name = f'students.{EXPORT_FORMATS[export_format][1]}'
+    return f'{name}.gz' if compress else name
@@ -0,0 +1,220 @@
+# In students/feature_schema.py
+"""The model inputs, declared once for training and serving.
+
+``SCHEMA`` lists each input with its dataset column (the feature name the
+model is trained on), its ``Student`` field, whether it is one-hot
+encoded, and its value range in the UCI "Student Performance" data.
+``FEATURES``, ``CATEGORICAL``, ``PREDICTION_FEATURES`` and ``RANGES`` are
+derived from it; training, the synthetic benchmarks and the views all use
+these.
+
+``SCHEMA_HASH`` covers the names, their order and the encoding. Artifacts
+store it as ``feature_schema`` and ``check_artifact`` refuses a different
+one at load, rather than letting the encoder zero-fill columns the model
+never saw. This module imports nothing from Django, so the standalone
+training script can use it.
+"""
+import hashlib
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Feature(NamedTuple):
+    name: str
+    field: str
+    categorical: bool
+    low: int
+    high: int
+
+
+SCHEMA = (
+    Feature('age', 'age', False, 15, 22),
+    Feature('Medu', 'mother_education', True, 0, 4),
+    Feature('Fedu', 'father_education', True, 0, 4),
+    Feature('traveltime', 'travel_time', True, 1, 4),
+    Feature('studytime', 'study_time', True, 1, 4),
+    Feature('failures', 'past_failures', False, 0, 4),
+    Feature('famrel', 'family_relations', True, 1, 5),
+    Feature('freetime', 'free_time', True, 1, 5),
+    Feature('goout', 'go_out', True, 1, 5),
+    Feature('Dalc', 'workday_alcohol', True, 1, 5),
+    Feature('Walc', 'weekend_alcohol', True, 1, 5),
+    Feature('health', 'health_status', True, 1, 5),
+    Feature('absences', 'absences', False, 0, 93),
+)
+
+FEATURES = [feature.name for feature in SCHEMA]
+
+CATEGORICAL = [feature.name for feature in SCHEMA if feature.categorical]
+
+# Student field -> feature name, in schema order.
+PREDICTION_FEATURES = {feature.field: feature.name for feature in SCHEMA}
+
+RANGES = {feature.name: (feature.low, feature.high) for feature in SCHEMA}
+
+
+def schema_hash(schema=SCHEMA):
+    """Digest of the feature names, order and encoding (not the ranges)."""
+    spec = [[feature.name, feature.categorical] for feature in schema]
+    return hashlib.blake2b(json.dumps(spec).encode(), digest_size=8).hexdigest()
+
+
+SCHEMA_HASH = schema_hash()
+
+
+class SchemaMismatch(ValueError):
+    pass
+
+
+def check_artifact(model_data):
+    """Raise ``SchemaMismatch`` unless ``model_data`` was trained on this schema.
+
+    Artifacts written before the hash was stored are accepted when every
+    model feature is a schema input or a dummy of a categorical one.
+    """
+    stored = model_data.get('feature_schema')
+    if stored is not None:
+        if stored != SCHEMA_HASH:
+            raise SchemaMismatch(f'Model was trained on feature schema {stored}, serving {SCHEMA_HASH}')
+        return
+    categorical = set(model_data.get('categorical_columns', [])) & set(CATEGORICAL)
+    numeric = set(FEATURES) - set(CATEGORICAL)
+    unknown = []
+    for name in model_data.get('feature_names', []):
+        column, _, label = name.rpartition('_')
+        if name not in numeric and not (column in categorical and label.isdigit()):
+            unknown.append(name)
+    if unknown:
+        raise SchemaMismatch(f'Model features not in the schema: {", ".join(unknown[:5])}')
+
+
+class FeatureEncoder:
+    """Precompiled mapping from a student dict to the model's feature row.
+
+    Mirrors ``preprocess_input`` (``pd.get_dummies`` on stringified
+    categorical values, zero-fill for missing columns) without pandas.
+    """
+
+    def __init__(self, feature_names, categorical_columns):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        self.categories = {}
+        claimed = set()
+        for col in categorical_columns:
+            prefix = f'{col}_'
+            labels = {}
+            for i, feature in enumerate(self.feature_names):
+                if feature.startswith(prefix):
+                    labels[feature[len(prefix):]] = i
+                    claimed.add(i)
+            self.categories[col] = labels
+
+        self.numeric = [
+            (feature, i) for i, feature in enumerate(self.feature_names)
+            if i not in claimed
+        ]
+
+        # Batch layout: numeric inputs first, then one column per categorical
+        # input holding its integer code, resolved through a lookup table.
+        self.input_columns = [feature for feature, _ in self.numeric] + list(self.categories)
+        self._numeric_index = np.array([i for _, i in self.numeric], dtype=np.intp)
+        self.lookups = []
+        for col, labels in self.categories.items():
+            codes = {int(label): i for label, i in labels.items() if label.isdigit()}
+            lut = np.full(max(codes, default=-1) + 1, -1, dtype=np.intp)
+            for code, i in codes.items():
+                lut[code] = i
+            self.lookups.append(lut)
+
+    def encode(self, student_data):
+        row = np.zeros((1, self.n_features))
+        values = row[0]
+        for col, i in self.numeric:
+            values[i] = student_data.get(col, 0)
+        for col, labels in self.categories.items():
+            if col in student_data:
+                i = labels.get(str(student_data[col]))
+                if i is not None:
+                    values[i] = 1.0
+        return row
+
+    def raw_matrix(self, rows):
+        """Stack student dicts into a float array laid out like ``input_columns``.
+
+        Missing numeric inputs become 0 and missing categorical inputs NaN.
+        """
+        n_numeric = len(self.numeric)
+        raw = [
+            [row.get(col, 0) for col in self.input_columns[:n_numeric]]
+            + [row.get(col) for col in self.input_columns[n_numeric:]]
+            for row in rows
+        ]
+        return np.array(raw, dtype=float).reshape(len(raw), len(self.input_columns))
+
+    def raw_from_columns(self, matrix, columns):
+        """Lay out a matrix whose columns are ``columns`` like ``raw_matrix`` does.
+
+        Inputs the model has but ``columns`` lacks are filled the same way:
+        0 for numeric ones and NaN for categorical ones.
+        """
+        n_numeric = len(self.numeric)
+        position = {col: j for j, col in enumerate(columns)}
+        raw = np.empty((len(matrix), len(self.input_columns)))
+        for k, col in enumerate(self.input_columns):
+            j = position.get(col)
+            if j is not None:
+                raw[:, k] = matrix[:, j]
+            else:
+                raw[:, k] = 0 if k < n_numeric else np.nan
+        return raw
+
+    def encode_many(self, rows):
+        """Encode an iterable of student dicts into one feature matrix."""
+        return self.encode_matrix(self.raw_matrix(rows))
+
+    def encode_matrix(self, raw):
+        """Encode a raw ``(n, len(input_columns))`` array of inputs.
+
+        Categorical columns hold integer codes; anything that is not a code
+        seen during training (including NaN for a missing input) encodes to
+        all-zero dummies, like ``get_dummies`` followed by zero-fill.
+        """
+        n_rows = raw.shape[0]
+        X = np.zeros((n_rows, self.n_features))
+        n_numeric = len(self.numeric)
+        X[:, self._numeric_index] = raw[:, :n_numeric]
+
+        rows = np.arange(n_rows)
+        for j, lut in enumerate(self.lookups, start=n_numeric):
+            codes = raw[:, j]
+            with np.errstate(invalid='ignore'):
+                valid = (codes >= 0) & (codes < len(lut)) & (codes == np.floor(codes))
+            target = lut[codes[valid].astype(np.intp)]
+            hit = target >= 0
+            X[rows[valid][hit], target[hit]] = 1.0
+        return X
+
+    def raw_from_values(self, rows, columns=FEATURES):
+        """``raw_from_columns`` for a sequence of value tuples laid out like ``columns``."""
+        matrix = np.array(rows, dtype=float).reshape(len(rows), len(columns))
+        return self.raw_from_columns(matrix, columns)
+
+    def iter_raw(self, queryset, chunk_size=10000):
+        """Yield raw matrices of ``Student`` rows, ``chunk_size`` rows at a time.
+
+        Only the input fields are selected, as value tuples.
+        """
+        fields = {feature.name: feature.field for feature in SCHEMA}
+        columns = [column for column in self.input_columns if column in fields]
+        rows = queryset.values_list(*[fields[column] for column in columns]).iterator(chunk_size=chunk_size)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield self.raw_from_values(chunk, columns)
+                chunk = []
+        if chunk:
+            yield self.raw_from_values(chunk, columns)
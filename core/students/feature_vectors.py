@@ -0,0 +1,148 @@
+# In students/feature_vectors.py
+"""Packed model inputs: one fixed-width vector per student.
+
+``Student.packed_features`` holds the ``PREDICTION_FEATURES`` values, in
+that order, as little-endian int16: 26 bytes instead of 13 full-width
+integer columns, and a chunk of rows decodes with one ``frombuffer``
+straight into the int16 matrix training uses. ``Student.save`` and the
+importer keep it in sync; rows written before the column existed, with
+``STUDENT_PACKED_FEATURES`` off, or with an input outside int16 (the form
+and the importer keep inputs within the schema's ranges, but older rows
+may not be) hold NULL and are read from the columns.
+``QuerySet.update()`` of an input sets the vector to NULL in the same
+statement, so rescoring reads the new values; ``python manage.py
+pack_features`` rewrites every vector. Only raw SQL can leave one stale.
+
+``export_matrix`` writes the vectors of a queryset to ``.npy`` files that
+bulk scoring and training can memory-map instead of querying.
+"""
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .feature_schema import FEATURES, PREDICTION_FEATURES
+from .models import Student
+
+DTYPE = np.dtype('<i2')
+
+LIMITS = np.iinfo(DTYPE)
+
+FIELDS = list(PREDICTION_FEATURES)
+
+# Feature names of the matrix columns, for the predictor.
+COLUMNS = FEATURES
+
+
+def enabled():
+    return getattr(settings, 'STUDENT_PACKED_FEATURES', True)
+
+
+def fits(values):
+    """Whether every value can be stored as ``DTYPE``."""
+    values = np.asarray(values)
+    return bool(((values >= LIMITS.min) & (values <= LIMITS.max)).all())
+
+
+def pack(values):
+    """The packed vector of one row of ``FIELDS`` values, or None if a value does not fit."""
+    if not fits(values):
+        return None
+    return np.asarray(values, dtype=DTYPE).tobytes()
+
+
+def unpack(blobs):
+    """Stack packed vectors into an ``(n, len(FIELDS))`` int16 matrix."""
+    return np.frombuffer(b''.join(blobs), dtype=DTYPE).reshape(len(blobs), len(FIELDS))
+
+
+def read_chunks(queryset, chunk_size=5000, extra=()):
+    """Yield ``(pks, matrix, extra columns)`` for the queryset, in primary-key chunks.
+
+    Only ``pk``, ``packed_features`` and ``extra`` are selected; rows whose
+    vector is NULL are read from the input columns in one more query. The
+    matrix is int16 unless one of those rows holds a value outside it.
+    """
+    columns_of = queryset.model._base_manager.using(queryset.db)
+    queryset = queryset.order_by('pk').values_list('pk', 'packed_features', *extra)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        pks = np.array([row[0] for row in rows], dtype=np.int64)
+        blobs = [row[1] for row in rows]
+        missing = [i for i, blob in enumerate(blobs) if blob is None]
+        if missing:
+            columns = {
+                pk: values
+                for pk, *values in columns_of.filter(pk__in=[rows[i][0] for i in missing]).values_list('pk', *FIELDS)
+            }
+            values = np.array([columns[rows[i][0]] for i in missing], dtype=np.int64)
+            packed = [i for i, blob in enumerate(blobs) if blob is not None]
+            matrix = np.empty((len(rows), len(FIELDS)), dtype=DTYPE if fits(values) else np.int64)
+            matrix[missing] = values
+            matrix[packed] = unpack([blobs[i] for i in packed])
+        else:
+            matrix = unpack(blobs)
+        yield pks, matrix, [row[2:] for row in rows]
+        last_pk = rows[-1][0]
+
+
+def backfill(queryset=None, chunk_size=5000):
+    """Rewrite the packed vector of every student in ``queryset``; returns the count."""
+    queryset = (queryset if queryset is not None else Student.objects.all()).order_by('pk')
+    total = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list('pk', *FIELDS)[:chunk_size])
+        if not rows:
+            return total
+        students = [Student(pk=pk, packed_features=pack(values)) for pk, *values in rows]
+        Student.objects.bulk_update(students, ['packed_features'])
+        total += len(rows)
+        last_pk = rows[-1][0]
+
+
+def export_matrix(directory, queryset=None, chunk_size=5000):
+    """Write ``ids.npy`` (int64), ``features.npy`` (int16) and ``gpa.npy`` (float32) for the queryset.
+
+    The arrays are filled through ``open_memmap`` a chunk at a time, so the
+    export never holds the table in memory. Returns the number of rows.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    queryset = queryset if queryset is not None else Student.objects.all()
+    n_rows = queryset.count()
+    ids = np.lib.format.open_memmap(directory / 'ids.npy', mode='w+', dtype=np.int64, shape=(n_rows,))
+    features = np.lib.format.open_memmap(
+        directory / 'features.npy', mode='w+', dtype=DTYPE, shape=(n_rows, len(FIELDS))
+    )
+    gpa = np.lib.format.open_memmap(directory / 'gpa.npy', mode='w+', dtype=np.float32, shape=(n_rows,))
+    start = 0
+    for pks, matrix, extra in read_chunks(queryset, chunk_size, extra=('gpa',)):
+        # Rows added since the count are left for the next export.
+        stop = min(start + len(pks), n_rows)
+        ids[start:stop] = pks[:stop - start]
+        # Saturate inputs outside int16; the trees split within the schema's ranges.
+        features[start:stop] = np.clip(matrix[:stop - start], LIMITS.min, LIMITS.max)
+        gpa[start:stop] = [row[0] for row in extra[:stop - start]]
+        start = stop
+    arrays = {'ids': ids, 'features': features, 'gpa': gpa}
+    for array in arrays.values():
+        array.flush()
+    if start < n_rows:
+        # Rows deleted since the count: rewrite without the unused tail.
+        trimmed = {name: np.array(array[:start]) for name, array in arrays.items()}
+        del arrays, ids, features, gpa
+        for name, array in trimmed.items():
+            np.save(directory / f'{name}.npy', array)
+    return start
+
+
+def load_matrix(directory, mmap_mode='r'):
+    """``(ids, features, gpa)`` from ``export_matrix``, memory-mapped by default."""
+    directory = Path(directory)
+    return tuple(np.load(directory / f'{name}.npy', mmap_mode=mmap_mode) for name in ('ids', 'features', 'gpa'))
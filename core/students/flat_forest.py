@@ -0,0 +1,136 @@
+# In students/flat_forest.py
+"""Tree ensembles as flat NumPy arrays, scored without scikit-learn.
+
+``FlatForest.from_estimator`` copies a fitted random forest (or extra
+trees) into one set of node arrays shared by all trees:
+
+- ``feature``: split feature of each node, -1 at leaves
+- ``threshold``: split threshold, rounded down to float32
+- ``children``: left and right child of node ``i`` at ``2i`` and ``2i + 1``,
+  as global node ids; a leaf is its own child
+- ``value``: positive-class probability of each node (float64)
+- ``roots``: node id of each tree's root
+
+Indices are stored as ``intp`` so the walk never converts them. Pickled
+with joblib these arrays are the whole artifact, 36 bytes a node against
+about 80 for sklearn's trees, and loading one imports only NumPy and can
+memory-map them. ``predict_proba`` walks every tree for a block of rows at
+once, one gather per level, and equals ``RandomForestClassifier.predict_proba``:
+inputs are float32 as in sklearn, ``x <= threshold`` holds for the
+rounded-down float32 threshold exactly when it does for the float64 one,
+and tree probabilities are summed in tree order.
+"""
+import numpy as np
+
+# Rows walked together; bounds the (rows * trees) working arrays.
+BLOCK_ROWS = 2048
+
+# Levels walked between dropping the positions that reached a leaf.
+COMPACT_EVERY = 4
+
+
+def _round_down(threshold):
+    """The largest float32 at most each float64 threshold."""
+    rounded = threshold.astype(np.float32)
+    over = rounded.astype(np.float64) > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, children, value, roots, depth, n_features, classes,
+                 feature_importances=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.n_features_in_ = int(n_features)
+        self.classes_ = classes
+        if feature_importances is not None:
+            self.feature_importances_ = feature_importances
+
+    @classmethod
+    def from_estimator(cls, model):
+        """Flatten a fitted binary forest; ValueError for anything else."""
+        estimators = getattr(model, 'estimators_', None)
+        if not isinstance(estimators, list) or not all(hasattr(e, 'tree_') for e in estimators):
+            raise ValueError('Only forests of decision trees can be flattened')
+        if len(getattr(model, 'classes_', ())) != 2:
+            raise ValueError('Only binary classifiers can be flattened')
+
+        features, thresholds, children, values = [], [], [], []
+        roots, offset, depth = [], 0, 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            features.append(np.where(leaf, -1, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            children.append(np.column_stack((
+                np.where(leaf, nodes, tree.children_left),
+                np.where(leaf, nodes, tree.children_right),
+            )).ravel() + offset)
+            # As DecisionTreeClassifier.predict_proba normalises a leaf.
+            values.append(counts[:, -1] / np.where(totals > 0, totals, 1))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+
+        importances = getattr(model, 'feature_importances_', None)
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=_round_down(np.concatenate(thresholds)),
+            children=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            depth=depth,
+            n_features=model.n_features_in_,
+            classes=np.asarray(model.classes_),
+            feature_importances=None if importances is None else np.asarray(importances, dtype=float),
+        )
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def predict_positive(self, X):
+        """Positive-class probability of each row of ``X``."""
+        X = np.asarray(X, dtype=np.float32)
+        result = np.empty(len(X))
+        for start in range(0, len(X), BLOCK_ROWS):
+            result[start:start + BLOCK_ROWS] = self._walk(X[start:start + BLOCK_ROWS])
+        return result
+
+    def predict_proba(self, X):
+        """``(n, 2)`` class probabilities; the first column is the complement of the second."""
+        positive = self.predict_positive(X)
+        return np.column_stack((1 - positive, positive))
+
+    def _walk(self, X):
+        n_rows, n_trees = len(X), len(self.roots)
+        flat = X.ravel()
+        # One position per (row, tree): its node and its row's offset in ``flat``.
+        nodes = np.tile(self.roots, n_rows)
+        base = np.repeat(np.arange(n_rows, dtype=np.intp) * X.shape[1], n_trees)
+        reached = nodes.copy()
+        active = np.arange(len(nodes))
+        for level in range(0, self.depth, COMPACT_EVERY):
+            # A position already at a leaf reads some cell through feature
+            # -1 and stays put whichever way it compares.
+            for _ in range(min(COMPACT_EVERY, self.depth - level)):
+                right = flat[base + self.feature[nodes]] > self.threshold[nodes]
+                nodes = self.children[2 * nodes + right]
+            reached[active] = nodes
+            inner = self.feature[nodes] >= 0
+            if not inner.any():
+                break
+            active, nodes, base = active[inner], nodes[inner], base[inner]
+
+        total = np.zeros(n_rows)
+        for leaves in self.value[reached].reshape(n_rows, n_trees).T:
+            total += leaves
+        return total / n_trees
@@ -6,7 +6,7 @@ class StudentForm(forms.ModelForm):
     class Meta:
         model = Student
         fields = '__all__'
-        exclude = ['created_at', 'success_probability']
+        exclude = ['created_at', 'success_probability', 'model_version']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'age': forms.NumberInput(attrs={'class': 'form-control', 'min': 15, 'max': 22}),
@@ -23,4 +23,73 @@ class StudentForm(forms.ModelForm):
             'weekend_alcohol': forms.Select(attrs={'class': 'form-control'}),
             'health_status': forms.Select(attrs={'class': 'form-control'}),
             'absences': forms.NumberInput(attrs={'class': 'form-control', 'min': 0, 'max': 93}),
-        }
\ No newline at end of file
+        }
+
+
+class StudentFilterForm(forms.Form):
+    """Query parameters for filtering and sorting the student list."""
+
+    # Sortable columns; each has an index starting with it.
+    SORT_FIELDS = ('gpa', 'success_probability', 'absences', 'past_failures', 'name', 'created_at')
+
+    # (form field prefix, model field) for the min/max range filters.
+    RANGES = (
+        ('gpa', 'gpa'),
+        ('probability', 'success_probability'),
+        ('absences', 'absences'),
+        ('failures', 'past_failures'),
+    )
+
+    q = forms.CharField(required=False, max_length=100)
+    sort = forms.CharField(required=False, max_length=200)
+    gpa_min = forms.FloatField(required=False)
+    gpa_max = forms.FloatField(required=False)
+    probability_min = forms.FloatField(required=False, min_value=0, max_value=1)
+    probability_max = forms.FloatField(required=False, min_value=0, max_value=1)
+    absences_min = forms.IntegerField(required=False, min_value=0)
+    absences_max = forms.IntegerField(required=False, min_value=0)
+    failures_min = forms.IntegerField(required=False, min_value=0)
+    failures_max = forms.IntegerField(required=False, min_value=0)
+
+    def clean_sort(self):
+        """Parse ``"-absences,gpa"`` into ``[('absences', True), ('gpa', False)]``."""
+        ordering = []
+        for term in (self.cleaned_data.get('sort') or '').split(','):
+            term = term.strip()
+            if not term:
+                continue
+            name = term.lstrip('-')
+            if name not in self.SORT_FIELDS:
+                raise forms.ValidationError(f'Cannot sort by "{name}".')
+            if name not in (n for n, _ in ordering):
+                ordering.append((name, term.startswith('-')))
+        return ordering
+
+    def ordering(self):
+        """Keyset ordering for the list, ending in ``id`` so it is total."""
+        ordering = list(self.cleaned_data.get('sort') or [('gpa', True)])
+        ordering.append(('id', ordering[0][1]))
+        return ordering
+
+    def filter(self, queryset):
+        from .search import search_names
+
+        data = self.cleaned_data
+        for prefix, field in self.RANGES:
+            if data.get(f'{prefix}_min') is not None:
+                queryset = queryset.filter(**{f'{field}__gte': data[f'{prefix}_min']})
+            if data.get(f'{prefix}_max') is not None:
+                queryset = queryset.filter(**{f'{field}__lte': data[f'{prefix}_max']})
+        return search_names(queryset, data.get('q'))
+
+
+class StudentExportForm(StudentFilterForm):
+    """List filters plus the export options."""
+
+    format = forms.ChoiceField(required=False, choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')])
+    factors = forms.IntegerField(required=False, min_value=0, max_value=20)
+    gzip = forms.BooleanField(required=False)
+
+
+class StudentImportForm(forms.Form):
+    file = forms.FileField(help_text='Semicolon-separated CSV in the training dataset format')
@@ -0,0 +1,178 @@
+# In students/history.py
+"""Columnar monthly archives of old ``PredictionHistory`` rows.
+
+``compact`` moves rows recorded before a cutoff out of the table, one
+calendar month at a time, into ``history-YYYY-MM.npz`` under
+``STUDENT_HISTORY_ARCHIVE_DIR``. Each archive holds parallel arrays:
+
+- ``id`` and ``student_id`` (int64)
+- ``recorded_at`` (int64 microseconds since the epoch, UTC)
+- ``success_probability`` (float32)
+- ``version`` (int16 index into the archive's ``model_versions``)
+
+That is 22 bytes a row before compression, against roughly 100 for a
+table row with its two indexes. An archive is written under a temporary
+name and renamed into place before its rows are deleted. Rows already in
+an archive (after an interrupted run) are merged by ``id``, so compacting
+again is safe. ``prune`` removes archives whose month ended more than
+``retention_days`` ago.
+"""
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+ARCHIVE_PATTERN = re.compile(r'^history-(\d{4})-(\d{2})\.npz$')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+COLUMNS = ('id', 'student_id', 'recorded_at', 'success_probability', 'version')
+
+
+def archive_dir():
+    return Path(getattr(settings, 'STUDENT_HISTORY_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'prediction_history'))
+
+
+def archive_path(directory, month):
+    return Path(directory) / f'history-{month:%Y-%m}.npz'
+
+
+def _month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _micros(moment):
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def archives(directory=None):
+    """``[(month start, path)]`` of the archives in ``directory``, oldest first."""
+    directory = Path(directory or archive_dir())
+    if not directory.is_dir():
+        return []
+    found = []
+    for path in directory.iterdir():
+        match = ARCHIVE_PATTERN.match(path.name)
+        if match:
+            found.append((datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc), path))
+    return sorted(found)
+
+
+def read_archive(path):
+    """The archive's columns; ``model_version`` is decoded to an object array."""
+    with np.load(path, allow_pickle=False) as data:
+        columns = {name: data[name] for name in COLUMNS}
+        versions = data['model_versions']
+    columns['model_version'] = versions.astype(object)[columns.pop('version')]
+    return columns
+
+
+def _write_archive(path, columns):
+    versions, codes = np.unique(columns['model_version'].astype(str), return_inverse=True)
+    tmp = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.npz')
+    np.savez_compressed(
+        tmp,
+        id=columns['id'].astype(np.int64),
+        student_id=columns['student_id'].astype(np.int64),
+        recorded_at=columns['recorded_at'].astype(np.int64),
+        success_probability=columns['success_probability'].astype(np.float32),
+        version=codes.astype(np.int16),
+        model_versions=versions,
+    )
+    os.replace(tmp, path)
+
+
+def _merge(old, new):
+    merged = {name: np.concatenate([old[name], new[name]]) for name in new}
+    _, first = np.unique(merged['id'], return_index=True)
+    order = first[np.lexsort((merged['id'][first], merged['recorded_at'][first]))]
+    return {name: values[order] for name, values in merged.items()}
+
+
+def compact(before, directory=None, using='default'):
+    """Archive and delete the rows recorded before ``before``; returns ``(rows, archives written)``."""
+    from .models import PredictionHistory
+
+    directory = Path(directory or archive_dir())
+    queryset = PredictionHistory.objects.using(using).filter(recorded_at__lt=before)
+    oldest = queryset.order_by('recorded_at').values_list('recorded_at', flat=True).first()
+    if oldest is None:
+        return 0, 0
+    directory.mkdir(parents=True, exist_ok=True)
+
+    moved = written = 0
+    month = _month_start(oldest.astimezone(timezone.utc))
+    while month < before:
+        stop = min(_next_month(month), before)
+        rows = list(
+            queryset.filter(recorded_at__gte=month, recorded_at__lt=stop)
+            .order_by('recorded_at', 'pk')
+            .values_list('pk', 'student_id', 'recorded_at', 'success_probability', 'model_version')
+        )
+        if rows:
+            pks, student_ids, recorded, probabilities, versions = zip(*rows)
+            columns = {
+                'id': np.array(pks, dtype=np.int64),
+                'student_id': np.array(student_ids, dtype=np.int64),
+                'recorded_at': np.array([_micros(moment) for moment in recorded], dtype=np.int64),
+                'success_probability': np.array(probabilities, dtype=np.float32),
+                'model_version': np.array(versions, dtype=object),
+            }
+            path = archive_path(directory, month)
+            if path.exists():
+                columns = _merge(read_archive(path), columns)
+            _write_archive(path, columns)
+            # Only what was archived, should a row be written into the past meanwhile.
+            queryset.filter(recorded_at__gte=month, recorded_at__lt=stop, pk__lte=max(pks)).delete()
+            moved += len(rows)
+            written += 1
+        month = _next_month(month)
+    return moved, written
+
+
+def prune(retention_days, now=None, directory=None):
+    """Delete archives whose month ended more than ``retention_days`` ago; returns their paths."""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    removed = []
+    for month, path in archives(directory):
+        if _next_month(month) <= cutoff:
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def archived_trend(student_id, since=None, until=None, directory=None):
+    """``[(recorded_at, probability, model_version)]`` for one student from the archives."""
+    points = []
+    for month, path in archives(directory):
+        if (since is not None and _next_month(month) <= since) or (until is not None and month >= until):
+            continue
+        columns = read_archive(path)
+        mask = columns['student_id'] == student_id
+        if since is not None:
+            mask &= columns['recorded_at'] >= _micros(since)
+        if until is not None:
+            mask &= columns['recorded_at'] < _micros(until)
+        for micros, probability, version in zip(
+            columns['recorded_at'][mask], columns['success_probability'][mask], columns['model_version'][mask]
+        ):
+            points.append((EPOCH + timedelta(microseconds=int(micros)), float(probability), version))
+    return points
+
+
+def trend(student_id, since=None, until=None, directory=None):
+    """A student's full trend: archived points followed by those still in the table."""
+    from .models import PredictionHistory
+
+    recent = PredictionHistory.objects.trend(student_id, since, until).values_list(
+        'recorded_at', 'success_probability', 'model_version'
+    )
+    return archived_trend(student_id, since, until, directory) + list(recent)
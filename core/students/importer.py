@@ -0,0 +1,138 @@
+# In students/importer.py
+"""Bulk import of students from the dataset's semicolon-separated CSV format.
+
+The file is streamed: rows are read, validated, scored with one
+``predict_many`` call and inserted with ``bulk_create`` a chunk at a time,
+so memory does not grow with the file. ``bulk_create`` sends no
+``post_save`` signals; probabilities are written with the rows, and the
+risk snapshot, the prediction history and the cached list pages are
+updated once per chunk instead.
+
+Columns are the training features (``age``, ``Medu``, ... ``absences``).
+``name`` and ``gpa`` are optional: without them the name is
+``"<name_prefix> <line>"`` and the GPA is ``G3`` rescaled from 0-20 to 0-4.
+"""
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+from . import page_cache
+from .feature_schema import RANGES
+from .models import PREDICTION_FEATURES, PredictionHistory, RiskSnapshot, Student
+
+# Only the first errors are kept so a bad file cannot grow memory.
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def feature_validators():
+    """``(model field, column, allowed choices or None, bounds)`` per input.
+
+    Bounds are the schema's inclusive ``RANGES``; choices come from the model.
+    """
+    validators = []
+    for name, column in PREDICTION_FEATURES.items():
+        model_field = Student._meta.get_field(name)
+        choices = {value for value, _ in model_field.choices} if model_field.choices else None
+        validators.append((name, column, choices, RANGES[column]))
+    return validators
+
+
+def _parse_int(text):
+    value = float(text)
+    if value != int(value):
+        raise ValueError
+    return int(value)
+
+
+def parse_row(row, line, validators, name_prefix='Student'):
+    """Return the Student fields for one CSV row; raises ValueError if invalid."""
+    fields = {}
+    for name, column, choices, (low, high) in validators:
+        text = (row.get(column) or '').strip()
+        if not text:
+            raise ValueError(f'missing {column}')
+        try:
+            value = _parse_int(text)
+        except (ValueError, OverflowError):
+            raise ValueError(f'{column} is not an integer: {text!r}') from None
+        if choices is not None and value not in choices:
+            raise ValueError(f'{column} must be one of {sorted(choices)}, got {value}')
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f'{column} out of range: {value}')
+        fields[name] = value
+
+    gpa_text = (row.get('gpa') or '').strip()
+    grade_text = (row.get('G3') or '').strip()
+    if not (gpa_text or grade_text):
+        raise ValueError('missing gpa (or G3)')
+    try:
+        gpa = float(gpa_text) if gpa_text else round(float(grade_text) / 20 * 4, 2)
+    except ValueError:
+        raise ValueError(f'gpa is not a number: {gpa_text or grade_text!r}') from None
+    if not 0 <= gpa <= 4:
+        raise ValueError(f'gpa out of range: {gpa}')
+    fields['gpa'] = gpa
+
+    fields['name'] = ((row.get('name') or '').strip() or f'{name_prefix} {line}')[:100]
+    return fields
+
+
+def import_students(stream, chunk_size=5000, predictor=None, delimiter=';', name_prefix='Student'):
+    """Import students from a text stream of CSV; returns an ``ImportResult``.
+
+    Invalid rows are skipped and reported by line number. Each chunk is
+    inserted in its own transaction.
+    """
+    if predictor is None:
+        from .prediction_service import predictor
+
+    reader = csv.DictReader(stream, delimiter=delimiter)
+    missing = [column for column in PREDICTION_FEATURES.values() if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f'CSV is missing columns: {", ".join(missing)}')
+
+    validators = feature_validators()
+    result = ImportResult()
+    # Line 1 is the header.
+    rows = enumerate(reader, start=2)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return result
+
+        students = []
+        for line, row in chunk:
+            try:
+                students.append(Student(**parse_row(row, line, validators, name_prefix)))
+            except ValueError as e:
+                result.add_error(line, str(e))
+        if not students:
+            continue
+
+        # Pin one model per chunk so a hot swap cannot mix versions.
+        current = predictor.load()
+        probabilities = current.predict_many(students)
+        for student, probability in zip(students, probabilities):
+            student.success_probability = float(probability)
+            student.model_version = current.version or ''
+            student.packed_features = student.pack_features()
+        with transaction.atomic():
+            Student.objects.bulk_create(students)
+            RiskSnapshot.objects.apply_deltas(added=[student.risk_cell() for student in students])
+            PredictionHistory.objects.record(students)
+        page_cache.invalidate()
+        result.created += len(students)
@@ -0,0 +1,81 @@
+# In students/inference.py
+"""Bounded thread pool that keeps model work off the event loop.
+
+Async views hand ``predict_proba``/``explain`` calls to ``inference_pool``
+instead of running them inline. The pool accepts at most ``max_pending``
+calls (running or queued); beyond that ``run`` fails fast with
+``InferenceBusy`` so a burst is shed instead of queueing without bound.
+A caller that waits longer than ``timeout`` gets ``InferenceTimeout``; the
+call keeps its slot until the worker actually finishes, so abandoned work
+still counts against the limit.
+
+Threads rather than processes: the forest's tree traversal releases the
+GIL, and every worker shares the one loaded model.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .metrics import INFERENCE_REJECTIONS
+
+
+class InferenceBusy(Exception):
+    """The pool already holds ``max_pending`` calls."""
+
+
+class InferenceTimeout(Exception):
+    """The call did not finish within the pool's timeout."""
+
+
+class InferencePool:
+    def __init__(self, max_workers=2, max_pending=32, timeout=2.0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created on first use, so servers that fork after import do not
+        # inherit a pool whose threads exist only in the parent.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='student-inference')
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        if not self._slots.acquire(blocking=False):
+            INFERENCE_REJECTIONS.inc(reason='busy')
+            raise InferenceBusy
+        try:
+            future = self._pool().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Only drops it if it has not started; a running call finishes.
+            future.cancel()
+            INFERENCE_REJECTIONS.inc(reason='timeout')
+            raise InferenceTimeout from None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+inference_pool = InferencePool(
+    max_workers=getattr(settings, 'STUDENT_INFERENCE_WORKERS', 2),
+    max_pending=getattr(settings, 'STUDENT_INFERENCE_MAX_PENDING', 32),
+    timeout=getattr(settings, 'STUDENT_INFERENCE_TIMEOUT', 2.0),
+)
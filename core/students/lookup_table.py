@@ -0,0 +1,179 @@
+# In students/lookup_table.py
+"""Compiled probability table for tree models over the discrete feature space.
+
+A tree ensemble can only tell inputs apart at its split thresholds, so every
+numeric input falls into one of ``len(thresholds) + 1`` bins and every
+categorical input into one of its training codes (or "unknown"). Each
+combination of bins is a cell with a single probability. The table stores
+those probabilities against a mixed-radix cell key, so scoring is an index
+computation plus an array lookup instead of a forest traversal.
+"""
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from .flat_forest import FlatForest
+
+
+def table_path(model_path):
+    """Location of the compiled table for a model artifact."""
+    model_path = Path(model_path)
+    return model_path.with_name(f'{model_path.stem}.table.joblib')
+
+
+def split_thresholds(model, n_features):
+    """Return the sorted split thresholds used on each encoded feature."""
+    if isinstance(model, FlatForest):
+        inner = model.feature >= 0
+        features, thresholds = model.feature[inner], model.threshold[inner]
+        return [np.unique(thresholds[features == i]) for i in range(n_features)]
+    if hasattr(model, 'estimators_'):
+        estimators = np.asarray(model.estimators_, dtype=object).ravel()
+    else:
+        estimators = [model]
+    trees = [getattr(estimator, 'tree_', None) for estimator in estimators]
+    if not trees or any(tree is None for tree in trees):
+        raise ValueError('Lookup tables need a tree or forest of trees')
+
+    features = np.concatenate([tree.feature[tree.children_left != -1] for tree in trees])
+    thresholds = np.concatenate([tree.threshold[tree.children_left != -1] for tree in trees])
+    return [np.unique(thresholds[features == i]) for i in range(n_features)]
+
+
+class LookupTable:
+    def __init__(self, fingerprint, radices, edges, code_cells, keys, probabilities):
+        self.fingerprint = fingerprint
+        self.radices = np.asarray(radices, dtype=np.int64)
+        self.edges = edges
+        self.code_cells = code_cells
+        self.keys = keys
+        self.probabilities = probabilities
+        self.strides = np.ones(len(self.radices), dtype=np.int64)
+        if len(self.radices) > 1:
+            self.strides[:-1] = np.cumprod(self.radices[::-1])[::-1][1:]
+        self.n_cells = int(np.prod(self.radices, dtype=np.float64))
+        self.dense = len(keys) == self.n_cells
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, predictor, observed=(), max_cells=1_000_000, chunk_size=50_000):
+        """Compile a table for ``predictor``'s model.
+
+        If the whole cell space has at most ``max_cells`` cells it is
+        enumerated; otherwise only the cells hit by the ``observed`` raw
+        input matrices (laid out like ``encoder.input_columns``) are stored.
+        """
+        encoder = predictor.encoder
+        thresholds = split_thresholds(predictor.model, encoder.n_features)
+
+        edges = [thresholds[i] for _, i in encoder.numeric]
+        code_cells = []
+        for lut in encoder.lookups:
+            known = np.flatnonzero(lut >= 0)
+            cells = np.full(len(lut), len(known), dtype=np.int64)
+            cells[known] = np.arange(len(known))
+            code_cells.append(cells)
+        radices = [len(e) + 1 for e in edges] + [int((lut >= 0).sum()) + 1 for lut in encoder.lookups]
+
+        if np.prod(radices, dtype=np.float64) >= 2 ** 62:
+            raise ValueError('Feature space is too large to key with 64-bit integers')
+
+        table = cls(predictor.fingerprint, radices, edges, code_cells, np.empty(0, dtype=np.int64), np.empty(0))
+        if table.n_cells <= max_cells:
+            keys = np.arange(table.n_cells, dtype=np.int64)
+        else:
+            keys = np.unique(np.concatenate(
+                [table.cell_keys(raw) for raw in observed] or [np.empty(0, dtype=np.int64)]
+            ))
+            keys = keys[keys >= 0]
+
+        probabilities = np.empty(len(keys))
+        for start in range(0, len(keys), chunk_size):
+            raw = table.representatives(keys[start:start + chunk_size])
+            X = encoder.encode_matrix(raw)
+            probabilities[start:start + chunk_size] = predictor._positive_class(predictor._model_proba(X))
+
+        return cls(predictor.fingerprint, radices, edges, code_cells, keys, probabilities)
+
+    def cell_keys(self, raw):
+        """Cell key for each raw input row, or -1 where a numeric input is NaN."""
+        raw = np.asarray(raw, dtype=float)
+        keys = np.zeros(len(raw), dtype=np.int64)
+        invalid = np.zeros(len(raw), dtype=bool)
+        n_numeric = len(self.edges)
+
+        for j, edges in enumerate(self.edges):
+            # Trees compare float32 inputs against float64 thresholds.
+            values = raw[:, j].astype(np.float32).astype(np.float64)
+            invalid |= np.isnan(values)
+            keys += np.searchsorted(edges, values, side='left') * self.strides[j]
+
+        for j, cells in enumerate(self.code_cells, start=n_numeric):
+            codes = raw[:, j]
+            unknown = self.radices[j] - 1
+            with np.errstate(invalid='ignore'):
+                valid = (codes >= 0) & (codes < len(cells)) & (codes == np.floor(codes))
+            cell = np.full(len(raw), unknown, dtype=np.int64)
+            cell[valid] = cells[codes[valid].astype(np.intp)]
+            keys += cell * self.strides[j]
+
+        keys[invalid] = -1
+        return keys
+
+    def representatives(self, keys):
+        """Raw input rows that fall into the given cells."""
+        cells = np.unravel_index(keys, tuple(self.radices))
+        raw = np.empty((len(keys), len(self.radices)))
+        for j, edges in enumerate(self.edges):
+            values = np.empty(len(edges) + 1)
+            if len(edges):
+                below = edges.astype(np.float32)
+                too_high = below.astype(np.float64) > edges
+                below[too_high] = np.nextafter(below[too_high], np.float32(-np.inf))
+                values[:-1] = below
+                values[-1] = np.nextafter(np.float32(edges[-1]), np.float32(np.inf))
+            else:
+                values[0] = 0.0
+            raw[:, j] = values[cells[j]]
+        for j, lookup in enumerate(self.code_cells, start=len(self.edges)):
+            codes = np.full(self.radices[j], np.nan)
+            known = np.flatnonzero(lookup < self.radices[j] - 1)
+            codes[lookup[known]] = known
+            raw[:, j] = codes[cells[j]]
+        return raw
+
+    def lookup(self, raw):
+        """Probabilities for raw input rows; NaN where the table has no entry."""
+        keys = self.cell_keys(raw)
+        result = np.full(len(keys), np.nan)
+        found = np.flatnonzero(keys >= 0)
+        if self.dense:
+            result[found] = self.probabilities[keys[found]]
+            return result
+
+        index = np.searchsorted(self.keys, keys[found])
+        hit = index < len(self.keys)
+        hit[hit] = self.keys[index[hit]] == keys[found][hit]
+        result[found[hit]] = self.probabilities[index[hit]]
+        return result
+
+    def save(self, path):
+        joblib.dump({
+            'fingerprint': self.fingerprint,
+            'radices': self.radices,
+            'edges': self.edges,
+            'code_cells': self.code_cells,
+            'keys': self.keys,
+            'probabilities': self.probabilities,
+        }, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        return cls(
+            data['fingerprint'], data['radices'], data['edges'],
+            data['code_cells'], data['keys'], data['probabilities'],
+        )
@@ -0,0 +1,98 @@
+# In students/management/commands/benchmark_model_load.py
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from students.benchmarks import memory_usage, random_student_data, train_synthetic_model
+from students.prediction_service import LazyPredictor, StudentPerformancePredictor
+
+STRATEGIES = {
+    'eager-private': 'every worker unpickles its own copy (old import-time behaviour)',
+    'lazy-mmap': 'every worker loads on first use with mmap_mode="r"',
+    'preloaded': 'parent loads once before forking; workers share it copy-on-write',
+}
+
+
+def _worker(predictor, model_path, mmap_mode, data, start, results):
+    if predictor is None:
+        predictor = StudentPerformancePredictor(model_path, mmap_mode=mmap_mode)
+    predictor.predict_success_probability(data)
+    ready = time.perf_counter() - start
+    # Keep the process alive until every worker is loaded so PSS reflects sharing.
+    results.put((ready, memory_usage()))
+    time.sleep(0.5)
+
+
+class Command(BaseCommand):
+    help = 'Measure model start-up time and memory across N forked workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-path', type=str, default=None)
+        parser.add_argument(
+            '--synthetic',
+            action='store_true',
+            help='Train a throwaway model on synthetic data instead of loading one'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--n-estimators', type=int, default=300)
+
+    def handle(self, *args, **options):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('This benchmark needs the "fork" start method')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = options['model_path']
+            if options['synthetic']:
+                model_path = train_synthetic_model(
+                    Path(tmp) / 'model.pkl', n_rows=5000, n_estimators=options['n_estimators']
+                )
+            if model_path is None or StudentPerformancePredictor(model_path).model is None:
+                raise CommandError('No usable model found. Pass --model-path or --synthetic.')
+
+            size_mb = Path(model_path).stat().st_size / 2 ** 20
+            self.stdout.write(f'Model artifact: {size_mb:.1f} MiB, {options["workers"]} workers')
+            self.stdout.write(f'Import-time cost of the lazy predictor: {self._import_cost() * 1e6:.0f} us')
+
+            for strategy, description in STRATEGIES.items():
+                self._run(strategy, description, model_path, options['workers'])
+
+    def _import_cost(self):
+        start = time.perf_counter()
+        LazyPredictor()
+        return time.perf_counter() - start
+
+    def _run(self, strategy, description, model_path, n_workers):
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+        data = random_student_data(np.random.default_rng(0))
+
+        predictor = None
+        mmap_mode = 'r' if strategy == 'lazy-mmap' else None
+        start = time.perf_counter()
+        if strategy == 'preloaded':
+            predictor = StudentPerformancePredictor(model_path)
+
+        workers = [
+            ctx.Process(target=_worker, args=(predictor, model_path, mmap_mode, data, start, results))
+            for _ in range(n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        samples = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        ready = [s[0] for s in samples]
+        rss = [s[1]['rss_mb'] for s in samples]
+        pss = [s[1]['pss_mb'] for s in samples]
+        self.stdout.write(f'\n{strategy}: {description}')
+        self.stdout.write(
+            f'  all workers ready after {max(ready):.3f} s (mean {np.mean(ready):.3f} s)\n'
+            f'  RSS per worker {np.mean(rss):.1f} MiB, '
+            f'PSS per worker {np.mean(pss):.1f} MiB, total PSS {np.sum(pss):.1f} MiB'
+        )
@@ -0,0 +1,79 @@
+# In students/management/commands/benchmark_predictor.py
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from students.benchmarks import random_student_data, time_call, train_synthetic_model
+from students.prediction_service import StudentPerformancePredictor
+
+
+class Command(BaseCommand):
+    help = 'Compare the pandas and fast-path encoders for single-row prediction'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model-path',
+            type=str,
+            default=None,
+            help='Model artifact to benchmark (defaults to the app model)'
+        )
+        parser.add_argument(
+            '--synthetic',
+            action='store_true',
+            help='Train a throwaway model on synthetic data instead of loading one'
+        )
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = options['model_path']
+            if options['synthetic']:
+                model_path = train_synthetic_model(Path(tmp) / 'model.pkl', seed=options['seed'])
+
+            predictor = StudentPerformancePredictor(model_path)
+            if predictor.model is None or predictor.encoder is None:
+                raise CommandError('No usable model found. Pass --model-path or --synthetic.')
+
+            self._run(predictor, options['iterations'], options['seed'])
+
+    def _run(self, predictor, iterations, seed):
+        rng = np.random.default_rng(seed)
+        students = [random_student_data(rng) for _ in range(256)]
+
+        mismatches = 0
+        for data in students:
+            slow = predictor.model.predict_proba(predictor.preprocess_input(data))[0][1]
+            fast = predictor.predict_success_probability(data)
+            if abs(slow - fast) > 1e-12:
+                mismatches += 1
+
+        cursor = iter(range(10 ** 12))
+
+        def pick():
+            return students[next(cursor) % len(students)]
+
+        results = {
+            'encode (pandas)': time_call(lambda: predictor.preprocess_input(pick()), iterations),
+            'encode (fast)': time_call(lambda: predictor.encoder.encode(pick()), iterations),
+            'predict (pandas)': time_call(
+                lambda: predictor.model.predict_proba(predictor.preprocess_input(pick())), iterations
+            ),
+            'predict (fast)': time_call(lambda: predictor.predict_success_probability(pick()), iterations),
+        }
+
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<18} mean {stats["mean_us"]:9.1f} us   '
+                f'p50 {stats["p50_us"]:9.1f} us   p99 {stats["p99_us"]:9.1f} us'
+            )
+
+        speedup = results['encode (pandas)']['mean_us'] / results['encode (fast)']['mean_us']
+        self.stdout.write(f'Encoder speedup: {speedup:.1f}x')
+
+        if mismatches:
+            raise CommandError(f'{mismatches} of {len(students)} predictions differ between paths')
+        self.stdout.write(self.style.SUCCESS(f'Parity OK on {len(students)} students'))
@@ -0,0 +1,78 @@
+# In students/management/commands/benchmark_student_list.py
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.shortcuts import render
+from django.test import RequestFactory, override_settings
+
+from students.benchmarks import populate_students, time_call
+from students.models import Student
+from students.pagination import encode_cursor, order_expressions
+from students.views import LIST_ORDERING, student_list
+
+
+def legacy_student_list(request):
+    """The list view before keyset pagination: every row, every column."""
+    students = Student.objects.all().order_by('-gpa')
+    return render(request, "students/student_list.html", {"students": students})
+
+
+class Command(BaseCommand):
+    help = 'Measure student_list latency at several roster sizes (runs in a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--full-render-limit',
+            type=int,
+            default=100_000,
+            help='Skip the unpaginated legacy view above this many rows'
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Time rendering, not page cache hits.
+            with override_settings(STUDENT_PAGE_CACHE_TIMEOUT=0):
+                self._run(sorted(options['sizes']), options['iterations'], options['full_render_limit'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run(self, sizes, iterations, full_render_limit):
+        factory = RequestFactory()
+        populated = 0
+        for size in sizes:
+            populated += populate_students(size - populated, seed=size)
+
+            middle = Student.objects.order_by(*order_expressions(Student, LIST_ORDERING)).values_list(
+                *(name for name, _ in LIST_ORDERING)
+            )[size // 2]
+            deep_cursor = encode_cursor(list(middle))
+
+            results = {
+                'keyset, first page': time_call(
+                    lambda: student_list(factory.get('/students/')), iterations, warmup=2
+                ),
+                'keyset, middle page': time_call(
+                    lambda: student_list(factory.get('/students/', {'after': deep_cursor})), iterations, warmup=2
+                ),
+                'at-risk triage': time_call(
+                    lambda: student_list(factory.get('/students/', {'probability_max': 0.4, 'sort': '-absences'})),
+                    iterations, warmup=2
+                ),
+                'name search': time_call(
+                    lambda: student_list(factory.get('/students/', {'q': f'Student {size}-12'})),
+                    iterations, warmup=2
+                ),
+            }
+            if size <= full_render_limit:
+                results['legacy, all rows'] = time_call(
+                    lambda: legacy_student_list(factory.get('/students/')), max(1, iterations // 10), warmup=1
+                )
+
+            self.stdout.write(f'\n{size:,} students')
+            for name, stats in results.items():
+                self.stdout.write(
+                    f'  {name:<20} p50 {stats["p50_us"] / 1000:9.2f} ms   p99 {stats["p99_us"] / 1000:9.2f} ms'
+                )
@@ -0,0 +1,43 @@
+# In students/management/commands/compact_prediction_history.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from students.history import archive_dir, compact, prune
+
+
+class Command(BaseCommand):
+    help = 'Move old prediction history rows into monthly columnar archives and prune expired archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=getattr(settings, 'STUDENT_HISTORY_COMPACT_AFTER_DAYS', 90),
+            help='Archive rows recorded more than this many days ago'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'STUDENT_HISTORY_RETENTION_DAYS', None),
+            help='Delete archives whose month ended more than this many days ago (default: keep)'
+        )
+        parser.add_argument('--archive-dir', type=str, default=None)
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative')
+        retention = options['retention_days']
+        if retention is not None and retention < options['older_than']:
+            raise CommandError('--retention-days must be at least --older-than')
+
+        directory = options['archive_dir'] or archive_dir()
+        now = timezone.now()
+        moved, written = compact(now - timedelta(days=options['older_than']), directory=directory)
+        self.stdout.write(f'Archived {moved} rows into {written} monthly archives in {directory}')
+        if retention is not None:
+            removed = prune(retention, now=now, directory=directory)
+            self.stdout.write(f'Removed {len(removed)} expired archives')
+        self.stdout.write(self.style.SUCCESS('Prediction history compacted'))
@@ -0,0 +1,41 @@
+# In students/management/commands/early_warning.py
+from django.core.management.base import BaseCommand, CommandError
+
+from students.early_warning import run
+
+
+class Command(BaseCommand):
+    help = 'Flag students whose success probability dropped or entered high risk since the last scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop',
+            type=float,
+            default=None,
+            help='Flag a fall of at least this much (default STUDENT_ALERT_DROP)'
+        )
+        parser.add_argument(
+            '--high-risk-below',
+            type=float,
+            default=None,
+            help='Flag students crossing below this probability (default STUDENT_ALERT_HIGH_RISK_BELOW)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Scan every student, not just those updated since the last run'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['drop'] is not None and not 0 < options['drop'] <= 1:
+            raise CommandError('--drop must be in (0, 1]')
+        result = run(
+            drop=options['drop'],
+            high_risk_below=options['high_risk_below'],
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {result.scanned} students, raised {result.flagged} alerts'
+        ))
@@ -0,0 +1,26 @@
+# In students/management/commands/export_features.py
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.feature_vectors import export_matrix
+
+
+class Command(BaseCommand):
+    help = 'Write the packed feature vectors of all students to memory-mappable .npy files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            metavar='DIR',
+            required=True,
+            help='Directory for ids.npy, features.npy and gpa.npy (overwritten)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        output = Path(options['output']).expanduser()
+        if output.exists() and not output.is_dir():
+            raise CommandError(f'{output} is not a directory')
+        total = export_matrix(output, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Exported {total} students to {output}'))
@@ -0,0 +1,70 @@
+# In students/management/commands/export_students.py
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from students.export import stream_export
+from students.forms import StudentExportForm
+from students.models import Student
+from students.pagination import order_expressions
+
+
+class Command(BaseCommand):
+    help = 'Export students and their predictions as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='File to write (default: standard output)'
+        )
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument(
+            '--factors',
+            type=int,
+            default=0,
+            help='Include this many top explanation factors per student'
+        )
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument(
+            '--query',
+            default='',
+            help='Student list filters as a query string, e.g. "probability_max=0.4&sort=-absences"'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=getattr(settings, 'STUDENT_EXPORT_CHUNK_SIZE', 2000)
+        )
+
+    def handle(self, *args, **options):
+        data = QueryDict(options['query'], mutable=True)
+        data.update({'format': options['format'], 'factors': options['factors']})
+        if options['gzip']:
+            data['gzip'] = 'on'
+        form = StudentExportForm(data)
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        queryset = form.filter(Student.objects.order_by(*order_expressions(Student, form.ordering())))
+        chunks = stream_export(
+            queryset,
+            export_format=form.cleaned_data['format'],
+            factors=form.cleaned_data['factors'],
+            compress=form.cleaned_data['gzip'],
+            chunk_size=options['chunk_size'],
+        )
+
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+
+        with open(options['output'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {queryset.count()} students to {options['output']}"))
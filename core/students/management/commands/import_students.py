@@ -0,0 +1,50 @@
+# In students/management/commands/import_students.py
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from students.importer import import_students
+
+
+class Command(BaseCommand):
+    help = 'Import students from a semicolon-separated CSV (the retrain_model dataset format)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import, e.g. student-mat.csv')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=getattr(settings, 'STUDENT_IMPORT_CHUNK_SIZE', 5000),
+            help='Rows validated, scored and inserted per transaction'
+        )
+        parser.add_argument('--delimiter', default=';')
+        parser.add_argument(
+            '--name-prefix',
+            default='Student',
+            help='Name given to rows without a "name" column, followed by the line number'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path']).expanduser()
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            try:
+                result = import_students(
+                    f,
+                    chunk_size=options['chunk_size'],
+                    delimiter=options['delimiter'],
+                    name_prefix=options['name_prefix'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for line, message in result.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if result.skipped > len(result.errors):
+            self.stderr.write(f'... and {result.skipped - len(result.errors)} more invalid rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} students ({result.skipped} invalid rows skipped)'
+        ))
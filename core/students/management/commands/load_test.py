@@ -0,0 +1,219 @@
+# In students/management/commands/load_test.py
+import asyncio
+import importlib
+import io
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from students import page_cache
+from students.benchmarks import populate_students, train_synthetic_model
+from students.models import Student
+from students.prediction_service import StudentPerformancePredictor, predictor
+
+DEFAULT_PATHS = ['/students/', '/students/{id}/', '/students/{id}/prediction/']
+
+
+def _reload_urls():
+    for name in ('students.urls', 'students.api_urls', settings.ROOT_URLCONF):
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
+    clear_url_caches()
+
+
+@contextmanager
+def serving_views(use_async):
+    """Route the list/detail/prediction URLs to the async or the sync views."""
+    try:
+        with override_settings(STUDENT_ASYNC_VIEWS=use_async):
+            _reload_urls()
+            yield
+    finally:
+        _reload_urls()
+
+
+def _split(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+def wsgi_request(handler, path):
+    path, query = _split(path)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    response = handler(environ, lambda s, headers, exc_info=None: status.append(int(s.split()[0])))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_request(handler, path):
+    path, query = _split(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    status = []
+    body_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Django listens for a disconnect until the response is complete.
+            await done.wait()
+            return {'type': 'http.disconnect'}
+        body_sent = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            done.set()
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the list, detail and prediction pages through the WSGI handler with the sync '
+        'views and the ASGI handler with the async views, in process, on a throwaway database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=600)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--paths',
+            nargs='+',
+            default=DEFAULT_PATHS,
+            help='Paths requested in turn; {id} is replaced by a random student id'
+        )
+        parser.add_argument(
+            '--no-page-cache',
+            action='store_true',
+            help='Render every page instead of serving the cached list and detail pages'
+        )
+        parser.add_argument('--n-estimators', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Every request would be logged as slow.
+        logging.getLogger('students.metrics').setLevel(logging.ERROR)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                model_path = train_synthetic_model(
+                    Path(tmp) / 'model.pkl', n_rows=5000, n_estimators=options['n_estimators']
+                )
+                populate_students(options['students'], seed=options['seed'])
+                # Half the students unscored, so detail pages also predict.
+                ids = list(Student.objects.values_list('id', flat=True))
+                Student.objects.filter(id__in=ids[::2]).update(success_probability=None)
+
+                rng = np.random.default_rng(options['seed'])
+                paths = [
+                    options['paths'][i % len(options['paths'])].format(id=ids[rng.integers(len(ids))])
+                    for i in range(options['requests'])
+                ]
+                timeout = 0 if options['no_page_cache'] else getattr(settings, 'STUDENT_PAGE_CACHE_TIMEOUT', 300)
+                with predictor.serving(StudentPerformancePredictor(model_path)), \
+                        override_settings(STUDENT_PAGE_CACHE_TIMEOUT=timeout):
+                    for mode, use_async in (('wsgi', False), ('asgi', True)):
+                        # Each mode starts from a cold page cache.
+                        page_cache.invalidate(ids)
+                        with serving_views(use_async):
+                            self._report(mode, options['concurrency'], *self._run(mode, paths, options['concurrency']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _run(self, mode, paths, concurrency):
+        if mode == 'wsgi':
+            handler = WSGIHandler()
+
+            def timed(path):
+                start = time.perf_counter()
+                status = wsgi_request(handler, path)
+                return time.perf_counter() - start, status
+
+            for path in paths[:concurrency]:
+                wsgi_request(handler, path)  # warm up
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(timed, paths))
+            return results, time.perf_counter() - start
+
+        async def main():
+            handler = ASGIHandler()
+            for path in paths[:concurrency]:
+                await asgi_request(handler, path)
+            queue = iter(paths)
+            results = []
+
+            async def client():
+                for path in queue:
+                    begin = time.perf_counter()
+                    status = await asgi_request(handler, path)
+                    results.append((time.perf_counter() - begin, status))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            return results, time.perf_counter() - start
+
+        return asyncio.run(main())
+
+    def _report(self, mode, concurrency, results, elapsed):
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(status >= 400 for _, status in results)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{mode}: {len(results) / elapsed:7.1f} req/s   '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   '
+            f'{errors} errors   ({len(results)} requests, {concurrency} concurrent)'
+        )
@@ -0,0 +1,41 @@
+# In students/management/commands/model_versions.py
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from students.model_registry import ModelRegistry
+
+
+class Command(BaseCommand):
+    help = 'List published model versions or switch the active one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--activate',
+            type=str,
+            default=None,
+            help='Version to make active (e.g. to roll back)'
+        )
+
+    def handle(self, *args, **options):
+        registry = ModelRegistry()
+
+        if options['activate']:
+            try:
+                registry.activate(options['activate'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'Active model version: {options["activate"]}'))
+            return
+
+        active = registry.active_version()
+        versions = registry.versions()
+        if not versions:
+            self.stdout.write('No model versions published yet. Run retrain_model first.')
+            return
+        for meta in versions:
+            marker = '*' if meta['version'] == active else ' '
+            metrics = ', '.join(
+                f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}'
+                for k, v in meta.get('metrics', {}).items()
+            )
+            self.stdout.write(f'{marker} {meta["version"]}  {meta["created_at"]}  {metrics}')
@@ -0,0 +1,15 @@
+# In students/management/commands/pack_features.py
+from django.core.management.base import BaseCommand
+
+from students.feature_vectors import backfill
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the packed feature vector of every student from its input columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = backfill(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Packed the features of {total} students'))
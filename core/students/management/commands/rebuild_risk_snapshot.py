@@ -0,0 +1,30 @@
+# In students/management/commands/rebuild_risk_snapshot.py
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import RiskSnapshot, Student
+from students.prediction_service import PredictionUnavailable
+
+
+class Command(BaseCommand):
+    help = 'Recompute the risk snapshot behind the dashboard from the Student table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--score-unscored',
+            action='store_true',
+            help='Score students without a success probability first'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['score_unscored']:
+            try:
+                scored = Student.objects.filter(success_probability__isnull=True).rescore(
+                    chunk_size=options['chunk_size']
+                )
+            except PredictionUnavailable as e:
+                raise CommandError(f'Cannot score students: {e}')
+            self.stdout.write(f'Scored {scored} students')
+
+        cells = RiskSnapshot.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the risk snapshot ({cells} cells)'))
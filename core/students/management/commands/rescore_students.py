@@ -0,0 +1,39 @@
+# In students/management/commands/rescore_students.py
+from django.core.management.base import BaseCommand, CommandError
+
+from students.early_warning import run as run_early_warning
+from students.models import Student
+from students.prediction_service import PredictionUnavailable, predictor
+
+
+class Command(BaseCommand):
+    help = 'Rescore students that were not scored by the active model version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rescore every student, not just the stale ones'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--early-warning',
+            action='store_true',
+            help='Run the early-warning scan (see early_warning) afterwards'
+        )
+
+    def handle(self, *args, **options):
+        current = predictor.load()
+        if current.model is None:
+            raise CommandError('No model loaded; nothing rescored')
+
+        students = Student.objects.all() if options['all'] else Student.objects.stale(version=current.version)
+        try:
+            count = students.rescore(chunk_size=options['chunk_size'], predictor=current)
+        except PredictionUnavailable as e:
+            raise CommandError(f'{e}; students scored so far are kept, rerun to finish')
+        self.stdout.write(self.style.SUCCESS(f'Rescored {count} students with model {current.version}'))
+
+        if options['early_warning']:
+            result = run_early_warning()
+            self.stdout.write(f'Early warning: scanned {result.scanned} students, raised {result.flagged} alerts')
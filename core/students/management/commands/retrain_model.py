@@ -2,13 +2,24 @@
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 from django.conf import settings
+import time
+from dataclasses import asdict
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-import joblib
-import os
 from pathlib import Path
 
+from students.benchmarks import peak_rss_mb
+from students.lookup_table import LookupTable, table_path
+from students.model_registry import ModelRegistry
+from students.model_search import FOREST_FAMILIES, SEARCH_SPACE, candidates, search, select
+from students.feature_schema import SCHEMA_HASH
+from students.flat_forest import FlatForest
+from students.models import Student
+from students.prediction_service import PredictionUnavailable, StudentPerformancePredictor
+from students.training import CATEGORICAL, encode, raw_frame, read_csv, read_export, read_students
+
+
 class Command(BaseCommand):
     help = 'Retrain the student performance prediction model'
 
@@ -19,41 +30,107 @@ class Command(BaseCommand):
             default=None,
             help='Path to the CSV dataset (semicolon-separated), e.g. student-mat.csv'
         )
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Train on the Student table instead of a CSV (success means gpa >= 2.0)'
+        )
+        parser.add_argument(
+            '--from-export',
+            metavar='DIR',
+            default=None,
+            help='Train on a matrix written by "export_features" (memory-mapped, no database reads)'
+        )
+        parser.add_argument(
+            '--n-jobs',
+            type=int,
+            default=1,
+            help='Trees fitted in parallel (-1 for all cores)'
+        )
+        parser.add_argument(
+            '--read-chunk-size',
+            type=int,
+            default=100_000,
+            help='Rows read at a time from the CSV or the Student table'
+        )
+        parser.add_argument(
+            '--search',
+            action='store_true',
+            help='Cross-validate several model families and sizes (in --n-jobs processes) '
+                 'and keep the one picked on the accuracy/latency frontier'
+        )
+        parser.add_argument('--search-folds', type=int, default=5)
+        parser.add_argument(
+            '--max-accuracy-loss',
+            type=float,
+            default=0.01,
+            help='With --search, take the fastest candidate within this much CV accuracy of the best'
+        )
+        parser.add_argument(
+            '--latency-budget-ms',
+            type=float,
+            default=None,
+            help='With --search, take the most accurate candidate whose single-row latency fits this budget'
+        )
+        parser.add_argument(
+            '--compile-table',
+            action='store_true',
+            help='Also write a lookup table of precomputed probabilities next to the model'
+        )
+        parser.add_argument(
+            '--table-max-cells',
+            type=int,
+            default=1_000_000,
+            help='Enumerate the whole feature space when it has at most this many cells; '
+                 'otherwise tabulate only cells seen in the dataset and the Student table'
+        )
+        parser.add_argument(
+            '--flat',
+            action='store_true',
+            help='Publish the forest as flat NumPy arrays, served without importing scikit-learn'
+        )
+        parser.add_argument(
+            '--no-activate',
+            action='store_true',
+            help='Publish the new version without making it the active one'
+        )
+        parser.add_argument(
+            '--rescore',
+            action='store_true',
+            help='Rescore students not yet scored by the new model after saving it'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Students scored per batch when --rescore is given'
+        )
 
     def handle(self, *args, **options):
+        started = time.perf_counter()
         self.stdout.write('Training student performance prediction model...')
         
         # Load and preprocess data
-        if not options.get('data_path'):
-            raise CommandError('Missing --data-path. Example: python manage.py retrain_model --data-path /path/to/student-mat.csv')
+        try:
+            if options['from_export']:
+                raw, y = read_export(Path(options['from_export']).expanduser())
+            elif options['from_db']:
+                raw, y = read_students(Student.objects.all(), chunksize=options['read_chunk_size'])
+            else:
+                if not options.get('data_path'):
+                    raise CommandError('Missing --data-path. Example: python manage.py retrain_model --data-path /path/to/student-mat.csv')
 
-        data_path = Path(options['data_path']).expanduser()
-        if not data_path.exists():
-            raise CommandError(f'Dataset not found: {data_path}')
+                data_path = Path(options['data_path']).expanduser()
+                if not data_path.exists():
+                    raise CommandError(f'Dataset not found: {data_path}')
+                raw, y = read_csv(data_path, chunksize=options['read_chunk_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
 
-        df = pd.read_csv(data_path, sep=';')
-        
-        # Create binary target (1 if G3 >= 10, else 0)
-        df['success'] = (df['G3'] >= 10).astype(int)
-        
-        # Select features (same as create_initial_model.py)
-        features = [
-            'age', 'Medu', 'Fedu', 'traveltime', 'studytime',
-            'failures', 'famrel', 'freetime', 'goout', 'Dalc',
-            'Walc', 'health', 'absences'
-        ]
-
-        categorical = ['Medu', 'Fedu', 'traveltime', 'studytime', 'famrel',
-                      'freetime', 'goout', 'Dalc', 'Walc', 'health']
-
-        X = df[features].copy()
-
-        for col in categorical:
-            if col in X.columns:
-                X[col] = X[col].astype(str)
-
-        X = pd.get_dummies(X, columns=categorical)
-        y = df['success']
+        # One uint8 column per category, in get_dummies order
+        X, feature_names = encode(raw, CATEGORICAL)
+        X = pd.DataFrame(X, columns=feature_names, copy=False)
+        self.stdout.write(f'Loaded {len(X)} rows ({X.memory_usage(index=False).sum() / 2**20:.1f} MiB encoded)')
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -61,29 +138,130 @@ class Command(BaseCommand):
         )
         
         # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        search_metrics = None
+        if options['search']:
+            model, search_metrics = self._search(X_train, y_train, options)
+        else:
+            model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=options['n_jobs'])
+            model.fit(X_train, y_train)
         
         # Evaluate
         train_score = model.score(X_train, y_train)
         test_score = model.score(X_test, y_test)
+        if hasattr(model, 'n_jobs'):
+            # Served predictions are single rows; a worker pool per call only adds latency.
+            model.n_jobs = None
+        train_seconds = time.perf_counter() - started
+        peak_mb = peak_rss_mb()
+        peak_rss = f'{peak_mb:.0f} MiB' if peak_mb is not None else 'n/a'
         
         self.stdout.write(
             self.style.SUCCESS(f'Model trained successfully!\n'
                              f'Training accuracy: {train_score:.2f}\n'
-                             f'Test accuracy: {test_score:.2f}')
+                             f'Test accuracy: {test_score:.2f}\n'
+                             f'Wall time: {train_seconds:.1f}s\n'
+                             f'Peak RSS: {peak_rss}')
         )
         
-        # Save model
-        model_dir = Path(__file__).parent.parent.parent / 'ml_models'
-        os.makedirs(model_dir, exist_ok=True)
-        model_path = model_dir / 'student_performance_model.pkl'
+        if options['flat']:
+            try:
+                model = FlatForest.from_estimator(model)
+            except ValueError as e:
+                raise CommandError(f'Cannot flatten the {type(model).__name__}: {e}')
+            self.stdout.write(f'Flattened to {model.node_count:,} nodes')
 
+        # Save model
         model_data = {
             'model': model,
-            'feature_names': X.columns.tolist(),
-            'categorical_columns': categorical,
+            'feature_names': feature_names,
+            'categorical_columns': CATEGORICAL,
+            'feature_schema': SCHEMA_HASH,
+        }
+
+        def prepare(model_path):
+            if options['compile_table']:
+                self._compile_table(model_path, raw_frame(raw), options['table_max_cells'])
+
+        metrics = {
+            'train_accuracy': train_score,
+            'test_accuracy': test_score,
+            'n_rows': len(X),
+            'train_seconds': round(train_seconds, 2),
+            'peak_rss_mb': peak_mb,
         }
+        if search_metrics is not None:
+            metrics['search'] = search_metrics
+
+        registry = ModelRegistry()
+        version = registry.publish(
+            model_data,
+            metrics=metrics,
+            prepare=prepare,
+            activate=not options['no_activate'],
+        )
+        model_path = registry.model_path(version)
+        self.stdout.write(self.style.SUCCESS(f'Model version {version} saved to {model_path}'))
+        if not options['no_activate']:
+            self.stdout.write(self.style.SUCCESS('Activated; running servers pick it up without a restart'))
+
+        if options['rescore']:
+            new_predictor = StudentPerformancePredictor(model_path)
+            try:
+                count = Student.objects.stale(version=new_predictor.version).rescore(
+                    chunk_size=options['chunk_size'],
+                    predictor=new_predictor,
+                )
+            except PredictionUnavailable as e:
+                raise CommandError(f'Rescore stopped: {e}')
+            self.stdout.write(self.style.SUCCESS(f'Rescored {count} students'))
+
+    def _search(self, X, y, options):
+        """Run the model search on the training split; returns ``(model, metrics)``."""
+        space = SEARCH_SPACE
+        if options['flat'] or options['compile_table']:
+            # Only forests can be flattened or tabulated; leave the rest out
+            # rather than discover it after the search.
+            space = {family: grid for family, grid in space.items() if family in FOREST_FAMILIES}
+            if not space:
+                raise CommandError('--flat and --compile-table need a forest in the search space')
+        n_candidates = len(list(candidates(space)))
+        self.stdout.write(
+            f"Searching {n_candidates} candidates with {options['search_folds']}-fold cross-validation..."
+        )
+        results = search(X, y, space=space, folds=options['search_folds'], n_jobs=options['n_jobs'])
+
+        budget = options['latency_budget_ms']
+        chosen = select(
+            [result for result, _ in results],
+            max_accuracy_loss=options['max_accuracy_loss'],
+            latency_budget_us=budget * 1000 if budget is not None else None,
+        )
+        for result, _ in sorted(results, key=lambda item: -item[0].cv_accuracy):
+            marker = '>' if result is chosen else '*' if result.frontier else ' '
+            self.stdout.write(
+                f'{marker} {result.label:<42} accuracy {result.cv_accuracy:.3f} ± {result.cv_std:.3f}  '
+                f'single {result.single_us / 1000:.2f} ms  batch {result.batch_us:.1f} µs/row  '
+                f'{result.size_kb:,.0f} KiB'
+            )
+        self.stdout.write('(* on the accuracy/latency frontier, > selected)')
+
+        model = next(model for result, model in results if result is chosen)
+        metrics = {
+            'selected': chosen.label,
+            'candidates': [dict(asdict(result), label=result.label) for result, _ in results],
+        }
+        return model, metrics
+
+    def _compile_table(self, model_path, df, max_cells):
+        predictor = StudentPerformancePredictor(model_path)
+        observed = [df[predictor.encoder.input_columns].to_numpy(dtype=float)]
+        observed.extend(predictor.encoder.iter_raw(Student.objects.all()))
+
+        try:
+            table = LookupTable.build(predictor, observed=observed, max_cells=max_cells)
+        except ValueError as e:
+            raise CommandError(f'Cannot compile a lookup table: {e}')
 
-        joblib.dump(model_data, model_path)
-        self.stdout.write(self.style.SUCCESS(f'Model saved to {model_path}'))
\ No newline at end of file
+        table.save(table_path(model_path))
+        mode = 'full feature space' if table.dense else f'{len(table)} observed of {table.n_cells} cells'
+        self.stdout.write(self.style.SUCCESS(f'Lookup table compiled ({mode})'))
@@ -0,0 +1,107 @@
+# In students/management/commands/run_benchmarks.py
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+
+from students.benchmark_suite import DEFAULT_TOLERANCE, compare, regressions, run_suite
+from students.benchmarks import train_synthetic_model
+
+
+def default_baseline():
+    return Path(getattr(settings, 'STUDENT_BENCHMARK_BASELINE', Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark prediction, explanation, views, saves and model loading on synthetic data '
+        '(in a throwaway test database) and compare against a stored baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000])
+        parser.add_argument('--iterations', type=int, default=500, help='Calls per model benchmark')
+        parser.add_argument('--web-iterations', type=int, default=20, help='Calls per view or save benchmark')
+        parser.add_argument('--n-estimators', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', type=str, default=None, help='Write the results as JSON to this file')
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=None,
+            help='Baseline JSON to compare against (default: STUDENT_BENCHMARK_BASELINE)'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store these results as the baseline instead of comparing'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help='Fail if a result is more than this fraction above the baseline'
+        )
+
+    def handle(self, *args, **options):
+        baseline_path = Path(options['baseline']) if options['baseline'] else default_baseline()
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                model_path = train_synthetic_model(
+                    Path(tmp) / 'model.pkl', n_rows=5000, n_estimators=options['n_estimators'], seed=options['seed']
+                )
+                report = run_suite(
+                    model_path,
+                    sizes=options['sizes'],
+                    iterations=options['iterations'],
+                    web_iterations=options['web_iterations'],
+                    seed=options['seed'],
+                    progress=lambda name: self.stdout.write(f'Benchmarking {name}...'),
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report['config']['n_estimators'] = options['n_estimators']
+        text = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(text)
+        if options['save_baseline']:
+            baseline_path.write_text(text)
+            self._print(compare(report['results'], {}))
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline to {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self._print(compare(report['results'], {}))
+            self.stdout.write(f'No baseline at {baseline_path}; run with --save-baseline to create one.')
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get('config') != report['config']:
+            self.stdout.write(self.style.WARNING('The baseline was recorded with different options.'))
+        if baseline.get('environment') != report['environment']:
+            self.stdout.write(self.style.WARNING('The baseline was recorded in a different environment.'))
+
+        rows = compare(report['results'], baseline.get('results', {}))
+        self._print(rows, options['tolerance'])
+        failed = regressions(rows, options['tolerance'])
+        if failed:
+            names = ', '.join(name for name, *_ in failed)
+            raise CommandError(f'{len(failed)} result(s) regressed by more than {options["tolerance"]:.0%}: {names}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {baseline_path}'))
+
+    def _print(self, rows, tolerance=None):
+        for name, value, reference, change in rows:
+            line = f'{name:<38} {value:12.2f}'
+            if change is not None:
+                line += f'   baseline {reference:12.2f}   {change:+7.1%}'
+                if change > tolerance:
+                    line = self.style.ERROR(line + '   REGRESSION')
+            self.stdout.write(line)
@@ -0,0 +1,268 @@
+# In students/metrics.py
+"""In-process counters and histograms, exposed as Prometheus text on /metrics.
+
+Values are per process: behind a server with several worker processes each
+scrape reports the worker that answered it, so scrape workers individually
+(or run one) when exact totals matter.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from half a millisecond to ten seconds.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def labels(self, **labels):
+        """This metric with its labels fixed, for hot paths."""
+        return BoundMetric(self, self._key(labels))
+
+    def _labels(self, key, extra=()):
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(key, value) for key, value in items)
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self._inc(self._key(labels), amount)
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, key, value):
+        return f'{self.name}{self._labels(key)} {value}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key, value):
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum, count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the time spent in its block."""
+        return self.labels(**labels).time()
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _samples(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{self._labels(key, [("le", bound)])} {cumulative}')
+        lines.append(f'{self.name}_sum{self._labels(key)} {total}')
+        lines.append(f'{self.name}_count{self._labels(key)} {count}')
+        return '\n'.join(lines)
+
+
+class BoundMetric:
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('bound', 'start')
+
+    def __init__(self, bound):
+        self.bound = bound
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.bound.observe(time.perf_counter() - self.start)
+
+
+PREDICTION_SECONDS = Histogram(
+    'student_prediction_seconds',
+    'Time spent in each prediction stage (encode, lookup, predict, explain, db_write).',
+    ['stage'],
+)
+PREDICTIONS = Counter(
+    'student_predictions_total',
+    'Probabilities served, by where they came from (table, cache or model).',
+    ['source'],
+)
+PREDICTION_FALLBACKS = Counter(
+    'student_prediction_fallbacks_total',
+    'Predictions answered with the neutral 0.5 instead of a model output.',
+    ['reason'],
+)
+PREDICTION_CACHE_EVENTS = Counter(
+    'student_prediction_cache_total',
+    'Prediction cache lookups (hit, shared_hit, miss) and LRU evictions, in rows.',
+    ['event'],
+)
+INFERENCE_REJECTIONS = Counter(
+    'student_inference_rejections_total',
+    'Off-thread inference calls refused because the pool was full, or abandoned after the timeout.',
+    ['reason'],
+)
+MICROBATCH_SIZE = Histogram(
+    'student_microbatch_size',
+    'Rows scored per micro-batched predict_proba call.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+VIEW_SECONDS = Histogram(
+    'student_view_seconds',
+    'Time to produce a response (streamed bodies excluded), by view.',
+    ['view', 'method'],
+)
+VIEW_REQUESTS = Counter(
+    'student_view_requests_total',
+    'Responses by view and status code.',
+    ['view', 'method', 'status'],
+)
+
+
+def render():
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus text exposition of every metric in this process."""
+    if not getattr(settings, 'STUDENT_METRICS_ENDPOINT', True):
+        raise Http404
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """Records per-view latency and status, and logs each request.
+
+    Requests slower than ``STUDENT_SLOW_REQUEST_MS`` are logged at WARNING,
+    the rest at DEBUG. Works in both the sync (WSGI) and async (ASGI) chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'STUDENT_SLOW_REQUEST_MS', 500)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, elapsed):
+        match = request.resolver_match
+        # Unresolved paths share one label so scanners cannot grow the series.
+        view = match.view_name if match else '<unmatched>'
+        VIEW_SECONDS.observe(elapsed, view=view, method=request.method)
+        VIEW_REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+
+        duration_ms = round(elapsed * 1000, 2)
+        logger.log(
+            logging.WARNING if duration_ms >= self.slow_ms else logging.DEBUG,
+            'request',
+            extra={'view': view, 'method': request.method, 'status': response.status_code, 'duration_ms': duration_ms},
+        )
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and ``extra`` fields."""
+
+    _reserved = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in self._reserved)
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
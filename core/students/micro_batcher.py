@@ -0,0 +1,93 @@
+# In students/micro_batcher.py
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .metrics import MICROBATCH_SIZE
+from .prediction_service import PredictionUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one ``predict_many`` call.
+
+    ``submit`` queues a student dict and returns a ``Future`` of
+    ``(probability, model_version)``. A daemon thread takes the first queued
+    row, waits up to ``max_delay`` seconds for more (or until ``max_batch``
+    are queued) and scores them all with one model call. A lone request
+    pays at most ``max_delay`` extra; many concurrent ones share the call's
+    fixed cost. With ``max_delay=0`` nothing waits and rows are scored as
+    they arrive, still in batches of whatever queued up meanwhile.
+
+    Rows are never answered with the 0.5 fallback: without a model, or if
+    scoring raises, the futures get ``PredictionUnavailable``.
+    """
+
+    def __init__(self, max_batch=64, max_delay=0.002, predictor=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.predictor = predictor
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, student_data):
+        future = Future()
+        with self._condition:
+            self._pending.append((student_data, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='student-micro-batcher', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def predict(self, student_data, timeout=None):
+        """Blocking ``submit``: ``(probability, model_version)`` for one student."""
+        return self.submit(student_data).result(timeout)
+
+    def _take(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            self._score(batch)
+
+    def _score(self, batch):
+        predictor = self.predictor
+        if predictor is None:
+            from .prediction_service import predictor
+        try:
+            # Pin one model per batch so a hot swap cannot mix versions.
+            current = predictor.load()
+            probabilities = current.predict_many([data for data, _ in batch], fallback=False)
+        except Exception as e:
+            if not isinstance(e, PredictionUnavailable):
+                logger.exception('Micro-batch prediction failed')
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        MICROBATCH_SIZE.observe(len(batch))
+        for (_, future), probability in zip(batch, probabilities):
+            future.set_result((float(probability), current.version))
+
+
+micro_batcher = MicroBatcher(
+    max_batch=getattr(settings, 'STUDENT_MICROBATCH_SIZE', 64),
+    max_delay=getattr(settings, 'STUDENT_MICROBATCH_DELAY_MS', 2) / 1000,
+)
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0002_alter_student_options_student_absences_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="model_version",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                max_length=64,
+                verbose_name="Model version that produced success_probability",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0003_student_model_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["-gpa", "-id"], name="student_gpa_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="student_created_id_idx"
+            ),
+        ),
+    ]
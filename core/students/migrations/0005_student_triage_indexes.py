@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+from students.search import install_fts, remove_fts
+
+
+def create_name_index(apps, schema_editor):
+    install_fts(schema_editor)
+
+
+def drop_name_index(apps, schema_editor):
+    remove_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0004_student_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["success_probability", "id"], name="student_probability_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["absences", "id"], name="student_absences_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["past_failures", "id"], name="student_failures_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["name", "id"], name="student_name_id_idx"),
+        ),
+        migrations.RunPython(create_name_index, drop_name_index),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import Case, Count, FloatField, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def build_snapshot(apps, schema_editor):
+    # Same grouping as RiskSnapshot.objects.rebuild(), on the historical models.
+    Student = apps.get_model("students", "Student")
+    RiskSnapshot = apps.get_model("students", "RiskSnapshot")
+    db = schema_editor.connection.alias
+    band = Case(
+        When(success_probability__isnull=True, then=Value("unscored")),
+        When(success_probability__lt=0.4, then=Value("high")),
+        When(success_probability__lt=0.7, then=Value("medium")),
+        default=Value("low"),
+    )
+    rows = (
+        Student.objects.using(db)
+        .annotate(band=band)
+        .values("band", "study_time", "past_failures")
+        .annotate(
+            count=Count("pk"),
+            probability_sum=Coalesce(
+                Sum("success_probability"), Value(0.0), output_field=FloatField()
+            ),
+        )
+        .order_by()
+    )
+    RiskSnapshot.objects.using(db).bulk_create([RiskSnapshot(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0005_student_triage_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RiskSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "band",
+                    models.CharField(
+                        choices=[
+                            ("high", "High risk"),
+                            ("medium", "Medium risk"),
+                            ("low", "Low risk"),
+                            ("unscored", "Not scored"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("study_time", models.IntegerField()),
+                ("past_failures", models.IntegerField()),
+                ("count", models.IntegerField(default=0)),
+                ("probability_sum", models.FloatField(default=0.0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("band", "study_time", "past_failures"),
+                        name="risk_snapshot_cell",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+from students.search import install_fts
+
+
+def repair_name_index(apps, schema_editor):
+    # Adding or removing the column makes SQLite rebuild students_student,
+    # which drops the search index's triggers.
+    install_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0006_risk_snapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, repair_name_index),
+        migrations.AddField(
+            model_name="student",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(repair_name_index, migrations.RunPython.noop),
+    ]
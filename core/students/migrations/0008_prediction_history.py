@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_current_scores(apps, schema_editor):
+    # Start every scored student's history with the probability it has now.
+    Student = apps.get_model("students", "Student")
+    PredictionHistory = apps.get_model("students", "PredictionHistory")
+    db = schema_editor.connection.alias
+    rows = (
+        Student.objects.using(db)
+        .filter(success_probability__isnull=False)
+        .values_list("pk", "model_version", "success_probability", "updated_at")
+        .iterator(chunk_size=5000)
+    )
+    batch = []
+    for pk, version, probability, updated_at in rows:
+        batch.append(
+            PredictionHistory(
+                student_id=pk,
+                model_version=version,
+                success_probability=probability,
+                recorded_at=updated_at,
+            )
+        )
+        if len(batch) == 5000:
+            PredictionHistory.objects.using(db).bulk_create(batch)
+            batch = []
+    PredictionHistory.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0007_student_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PredictionHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_version",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("success_probability", models.FloatField()),
+                (
+                    "recorded_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prediction_history",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["student", "-recorded_at"],
+                        name="history_student_time_idx",
+                    ),
+                    models.Index(
+                        fields=["recorded_at"], name="history_recorded_at_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(record_current_scores, migrations.RunPython.noop),
+    ]
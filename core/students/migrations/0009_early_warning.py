@@ -0,0 +1,106 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0008_prediction_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EarlyWarningBaseline",
+            fields=[
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="students.student",
+                    ),
+                ),
+                ("success_probability", models.FloatField()),
+                ("inputs", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EarlyWarningRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField()),
+                ("watermark", models.DateTimeField()),
+                ("scanned", models.IntegerField(default=0)),
+                ("flagged", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RiskAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("high_risk", "Entered high risk"),
+                            ("drop", "Probability dropped"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("previous_probability", models.FloatField()),
+                ("success_probability", models.FloatField()),
+                (
+                    "changed_inputs",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                (
+                    "model_version",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alerts",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["updated_at"], name="student_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 17:15
+
+import numpy as np
+from django.db import migrations, models
+
+from students.search import install_fts
+
+# PREDICTION_FEATURES as of this migration, in packing order.
+FIELDS = [
+    "age",
+    "mother_education",
+    "father_education",
+    "travel_time",
+    "study_time",
+    "past_failures",
+    "family_relations",
+    "free_time",
+    "go_out",
+    "workday_alcohol",
+    "weekend_alcohol",
+    "health_status",
+    "absences",
+]
+
+
+def pack(values):
+    # Inputs outside int16 stay NULL and are read from the columns.
+    if not all(-32768 <= value <= 32767 for value in values):
+        return None
+    return np.asarray(values, dtype="<i2").tobytes()
+
+
+def pack_existing(apps, schema_editor):
+    Student = apps.get_model("students", "Student")
+    db = schema_editor.connection.alias
+    queryset = Student.objects.using(db).order_by("pk")
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list("pk", *FIELDS)[:5000])
+        if not rows:
+            return
+        Student.objects.using(db).bulk_update(
+            [Student(pk=pk, packed_features=pack(values)) for pk, *values in rows],
+            ["packed_features"],
+        )
+        last_pk = rows[-1][0]
+
+
+def repair_name_index(apps, schema_editor):
+    # Should SQLite rebuild students_student for the column, the search
+    # index loses its triggers.
+    install_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0009_early_warning"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, repair_name_index),
+        migrations.AddField(
+            model_name="student",
+            name="packed_features",
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.RunPython(repair_name_index, migrations.RunPython.noop),
+        migrations.RunPython(pack_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 17:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0010_student_packed_features"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="student",
+            name="absences",
+            field=models.IntegerField(
+                default=0,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(93),
+                ],
+                verbose_name="Number of school absences",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="age",
+            field=models.IntegerField(
+                validators=[
+                    django.core.validators.MinValueValidator(15),
+                    django.core.validators.MaxValueValidator(22),
+                ]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="past_failures",
+            field=models.IntegerField(
+                default=0,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(4),
+                ],
+                verbose_name="Number of past class failures (0-4)",
+            ),
+        ),
+    ]
@@ -5,6 +5,11 @@ from sklearn.metrics import accuracy_score
 import joblib
 from pathlib import Path
 import os
+import sys
+
+# Run as a script: make the students package importable for the schema.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from students.feature_schema import CATEGORICAL, FEATURES, SCHEMA_HASH
 
 def create_model():
     # Load the dataset
@@ -13,16 +18,9 @@ def create_model():
     # Create binary target: 1 if final grade (G3) >= 10, else 0
     df['success'] = (df['G3'] >= 10).astype(int)
     
-    # Select features - using the same features as in the notebook
-    feature_columns = [
-        'age', 'Medu', 'Fedu', 'traveltime', 'studytime', 
-        'failures', 'famrel', 'freetime', 'goout', 'Dalc', 
-        'Walc', 'health', 'absences'
-    ]
-    
-    # One-hot encode categorical variables
-    categorical = ['Medu', 'Fedu', 'traveltime', 'studytime', 'famrel', 
-                  'freetime', 'goout', 'Dalc', 'Walc', 'health']
+    # Select features from the shared schema
+    feature_columns = FEATURES
+    categorical = CATEGORICAL
     
     # Convert categorical columns to string type for one-hot encoding
     for col in categorical:
@@ -65,7 +63,8 @@ def create_model():
     model_data = {
         'model': model,
         'feature_names': X.columns.tolist(),
-        'categorical_columns': categorical
+        'categorical_columns': categorical,
+        'feature_schema': SCHEMA_HASH,
     }
     
     joblib.dump(model_data, model_path)
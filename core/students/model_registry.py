@@ -0,0 +1,124 @@
+# In students/model_registry.py
+"""Versioned model artifacts with an atomically switched active version.
+
+Layout under ``ml_models/``::
+
+    versions/<version>/model.pkl           joblib artifact (model, feature_names, ...)
+    versions/<version>/model.table.joblib  optional compiled lookup table
+    versions/<version>/metadata.json       features, metrics, timestamp, content hash
+    ACTIVE                                 name of the version being served
+
+A version directory is fully written under a temporary name and then renamed
+into place, and ``ACTIVE`` is replaced with ``os.replace``, so readers only
+ever see complete artifacts.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+
+from .feature_schema import SCHEMA_HASH
+
+MODEL_FILE = 'model.pkl'
+METADATA_FILE = 'metadata.json'
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(f'.{path.name}.{uuid.uuid4().hex}')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root=None):
+        if root is None:
+            root = Path(settings.BASE_DIR) / 'students' / 'ml_models'
+        self.root = Path(root)
+        self.versions_dir = self.root / 'versions'
+        self.active_file = self.root / 'ACTIVE'
+
+    def model_path(self, version):
+        return self.versions_dir / version / MODEL_FILE
+
+    def active_version(self):
+        try:
+            version = self.active_file.read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def active_model_path(self):
+        version = self.active_version()
+        return self.model_path(version) if version else None
+
+    def metadata(self, version):
+        return json.loads((self.versions_dir / version / METADATA_FILE).read_text())
+
+    def versions(self):
+        """Metadata of every published version, oldest first."""
+        if not self.versions_dir.exists():
+            return []
+        found = [
+            self.metadata(path.name) for path in self.versions_dir.iterdir()
+            if (path / METADATA_FILE).exists()
+        ]
+        return sorted(found, key=lambda meta: meta['created_at'])
+
+    def publish(self, model_data, metrics=None, prepare=None, activate=True):
+        """Write a new version and (by default) make it the active one.
+
+        ``prepare`` is called with the staged model path before the version
+        is renamed into place, so extra artifacts such as a lookup table land
+        atomically with the model. Returns the new version name.
+        """
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        staging = self.versions_dir / f'.staging-{uuid.uuid4().hex}'
+        staging.mkdir()
+        try:
+            model_path = staging / MODEL_FILE
+            joblib.dump(model_data, model_path)
+            content_hash = file_hash(model_path)
+
+            created_at = datetime.now(timezone.utc)
+            version = f'{created_at:%Y%m%dT%H%M%S}-{content_hash[:8]}'
+            if prepare is not None:
+                prepare(model_path)
+
+            metadata = {
+                'version': version,
+                'created_at': created_at.isoformat(),
+                'content_hash': content_hash,
+                'feature_names': list(model_data.get('feature_names', [])),
+                'categorical_columns': list(model_data.get('categorical_columns', [])),
+                'feature_schema': model_data.get('feature_schema'),
+                'metrics': metrics or {},
+            }
+            (staging / METADATA_FILE).write_text(json.dumps(metadata, indent=2))
+            os.rename(staging, self.versions_dir / version)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if not self.model_path(version).exists():
+            raise ValueError(f'Unknown model version: {version}')
+        metadata_path = self.versions_dir / version / METADATA_FILE
+        schema = json.loads(metadata_path.read_text()).get('feature_schema') if metadata_path.exists() else None
+        if schema is not None and schema != SCHEMA_HASH:
+            raise ValueError(f'Model version {version} was trained on feature schema {schema}, not {SCHEMA_HASH}')
+        _write_atomic(self.active_file, f'{version}\n')
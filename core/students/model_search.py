@@ -0,0 +1,153 @@
+# In students/model_search.py
+"""Cross-validated model search for ``retrain_model --search``.
+
+Every candidate (a model family and hyperparameters) is cross-validated
+and fitted in a worker process. The fitted candidates are then timed one
+at a time in the parent, for single-row and batch ``predict_proba``, and
+their pickled size is recorded. ``select`` picks one from the
+accuracy/latency trade-off.
+"""
+import itertools
+import pickle
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+from .benchmarks import time_call
+
+MODELS = {
+    'forest': RandomForestClassifier,
+    'hist_gb': HistGradientBoostingClassifier,
+}
+
+# Families whose fitted models are forests of decision trees, the only
+# ones that can be flattened or compiled into a lookup table.
+FOREST_FAMILIES = ('forest',)
+
+# Hyperparameter grid per model family; every combination is a candidate.
+SEARCH_SPACE = {
+    'forest': {'n_estimators': [25, 50, 100], 'max_depth': [8, 16, None]},
+    'hist_gb': {'max_iter': [50, 100, 200], 'max_depth': [3, 6]},
+}
+
+
+@dataclass
+class CandidateResult:
+    family: str
+    params: dict
+    cv_accuracy: float
+    cv_std: float
+    single_us: float = 0.0  # median predict_proba time for one row
+    batch_us: float = 0.0  # per-row time when scoring a batch
+    size_kb: float = 0.0
+    frontier: bool = False
+
+    @property
+    def label(self):
+        params = ', '.join(f'{name}={value}' for name, value in self.params.items())
+        return f'{self.family}({params})'
+
+
+def candidates(space=None):
+    space = SEARCH_SPACE if space is None else space
+    for family, grid in space.items():
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            yield family, dict(zip(names, values))
+
+
+def build(family, params, seed=42):
+    return MODELS[family](random_state=seed, **params)
+
+
+# Training data of a worker process, set once by the pool initializer.
+_X = _y = None
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _evaluate(family, params, folds, seed):
+    model = build(family, params, seed)
+    cv = StratifiedKFold(folds, shuffle=True, random_state=seed)
+    scores = cross_val_score(model, _X, _y, cv=cv)
+    model.fit(_X, _y)
+    return family, params, float(scores.mean()), float(scores.std()), model
+
+
+def search(X, y, space=None, folds=5, n_jobs=1, seed=42, iterations=200, batch_size=1000):
+    """Cross-validate and time every candidate; returns ``[(CandidateResult, fitted model)]``.
+
+    ``n_jobs`` worker processes share the candidates (-1: one per core).
+    Latency is measured afterwards in this process so candidates are not
+    timed while competing with each other for the CPU.
+    """
+    jobs = list(candidates(space))
+    if n_jobs == 1:
+        _init_worker(X, y)
+        try:
+            evaluated = [_evaluate(family, params, folds, seed) for family, params in jobs]
+        finally:
+            _init_worker(None, None)
+    else:
+        workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+            evaluated = list(pool.map(
+                _evaluate,
+                [family for family, _ in jobs],
+                [params for _, params in jobs],
+                [folds] * len(jobs),
+                [seed] * len(jobs),
+            ))
+
+    # Served predictions see float rows, not the training DataFrame.
+    sample = np.asarray(X[:batch_size], dtype=float)
+    row = sample[:1]
+    results = []
+    for family, params, accuracy, std, model in evaluated:
+        result = CandidateResult(family, params, accuracy, std)
+        with warnings.catch_warnings():
+            # Fitted on a DataFrame, timed on the same columns as an array.
+            warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+            result.single_us = time_call(lambda: model.predict_proba(row), iterations)['p50_us']
+            batch_iterations = max(iterations // 20, 3)
+            result.batch_us = time_call(lambda: model.predict_proba(sample), batch_iterations)['p50_us'] / len(sample)
+        result.size_kb = len(pickle.dumps(model)) / 1024
+        results.append((result, model))
+    return results
+
+
+def select(results, max_accuracy_loss=0.01, latency_budget_us=None):
+    """Mark the accuracy/latency frontier on ``results`` and return the chosen one.
+
+    A candidate is on the frontier if no other is both at least as accurate
+    and at least as fast (single row). With a latency budget the most
+    accurate frontier candidate within it wins (or the fastest, if none
+    is). Otherwise the fastest candidate whose accuracy is within
+    ``max_accuracy_loss`` of the best wins.
+    """
+    for result in results:
+        result.frontier = not any(
+            other is not result
+            and other.cv_accuracy >= result.cv_accuracy
+            and other.single_us <= result.single_us
+            and (other.cv_accuracy > result.cv_accuracy or other.single_us < result.single_us)
+            for other in results
+        )
+    frontier = [result for result in results if result.frontier]
+
+    if latency_budget_us is not None:
+        within = [result for result in frontier if result.single_us <= latency_budget_us]
+        if not within:
+            return min(frontier, key=lambda result: result.single_us)
+        return max(within, key=lambda result: (result.cv_accuracy, -result.single_us))
+
+    best = max(result.cv_accuracy for result in results)
+    eligible = [result for result in frontier if result.cv_accuracy >= best - max_accuracy_loss]
+    return min(eligible, key=lambda result: (result.single_us, result.size_kb))
@@ -1,11 +1,118 @@
 # In students/models.py
-from django.db import models
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import page_cache
+from .feature_schema import PREDICTION_FEATURES, RANGES
+from .metrics import PREDICTION_SECONDS
+
+# Risk bands of success_probability, matching the detail page's red, yellow
+# and green bar; students without a probability get their own band.
+HIGH_RISK_BELOW = 0.4
+LOW_RISK_FROM = 0.7
+RISK_BANDS = [
+    ('high', 'High risk'),
+    ('medium', 'Medium risk'),
+    ('low', 'Low risk'),
+    ('unscored', 'Not scored'),
+]
+
+
+def risk_band(probability):
+    if probability is None:
+        return 'unscored'
+    if probability < HIGH_RISK_BELOW:
+        return 'high'
+    if probability < LOW_RISK_FROM:
+        return 'medium'
+    return 'low'
+
+
+def schema_range(field):
+    """Validators bounding a numeric input to its range in the feature schema."""
+    low, high = RANGES[PREDICTION_FEATURES[field]]
+    return [MinValueValidator(low), MaxValueValidator(high)]
+
+
+# Student._risk_cell when the row was loaded without the fields it depends on.
+_UNTRACKED = object()
+
+
+class StudentQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # A changed input makes the packed vector stale; clear it in the same
+        # statement so readers fall back to the columns.
+        if 'packed_features' not in kwargs and not set(kwargs).isdisjoint(PREDICTION_FEATURES):
+            kwargs['packed_features'] = None
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+    def stale(self, version=None):
+        """Students not yet scored by ``version`` (default: the serving model)."""
+        if version is None:
+            from .prediction_service import predictor
+            version = predictor.load().version
+        return self.exclude(model_version=version)
+
+    def rescore(self, chunk_size=2000, predictor=None):
+        """Recompute success_probability for every student in the queryset.
+
+        Rows are read in primary-key chunks as packed feature vectors (no
+        model instances), scored with one vectorized call per chunk and
+        written back with ``bulk_update``. Returns the number of students
+        rescored. Without a model, or if a chunk fails to score, raises
+        ``PredictionUnavailable``; chunks already written are kept, and no
+        student is given the 0.5 fallback.
+        """
+        from .feature_vectors import COLUMNS, FIELDS, read_chunks
+
+        if predictor is None:
+            from .prediction_service import predictor
+
+        cell_columns = [FIELDS.index('study_time'), FIELDS.index('past_failures')]
+        total = 0
+        for pks, matrix, extra in read_chunks(self, chunk_size, extra=('success_probability',)):
+            # Pin one model per chunk so a hot swap cannot mix versions.
+            current = predictor.load()
+            probabilities = current.predict_matrix(matrix, COLUMNS, fallback=False)
+            cells = matrix[:, cell_columns].tolist()
+            removed = [(old, *cell) for (old,), cell in zip(extra, cells)]
+            now = timezone.now()
+            students = [
+                self.model(
+                    pk=pk,
+                    success_probability=probability,
+                    model_version=current.version or '',
+                    updated_at=now,
+                )
+                for pk, probability in zip(pks.tolist(), probabilities.tolist())
+            ]
+            with PREDICTION_SECONDS.time(stage='db_write'), transaction.atomic(using=self.db):
+                self.model.objects.using(self.db).bulk_update(
+                    students, ['success_probability', 'model_version', 'updated_at'], batch_size=chunk_size
+                )
+                RiskSnapshot.objects.using(self.db).apply_deltas(
+                    removed=removed,
+                    added=[(student.success_probability, *cell) for student, cell in zip(students, cells)],
+                )
+                PredictionHistory.objects.using(self.db).record(students, recorded_at=now)
+            page_cache.invalidate([student.pk for student in students])
+            total += len(students)
+        return total
+
 
 class Student(models.Model):
     name = models.CharField(max_length=100)
-    age = models.IntegerField()
+    age = models.IntegerField(validators=schema_range('age'))
     gpa = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped by rescoring, which writes with bulk_update/update().
+    updated_at = models.DateTimeField(auto_now=True)
     
     # New fields for prediction
     mother_education = models.IntegerField(
@@ -36,7 +143,8 @@ class Student(models.Model):
     )
     past_failures = models.IntegerField(
         "Number of past class failures (0-4)",
-        default=0
+        default=0,
+        validators=schema_range('past_failures')
     )
     family_relations = models.IntegerField(
         "Quality of family relationships (1-5)",
@@ -76,38 +184,304 @@ class Student(models.Model):
     )
     absences = models.IntegerField(
         "Number of school absences",
-        default=0
+        default=0,
+        validators=schema_range('absences')
     )
+    # The inputs above packed into one int16 vector (see feature_vectors);
+    # NULL until packed.
+    packed_features = models.BinaryField(null=True, editable=False)
     success_probability = models.FloatField(
         "Predicted success probability (0-1)",
         null=True,
         blank=True
     )
+    model_version = models.CharField(
+        "Model version that produced success_probability",
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True
+    )
+
+    objects = StudentQuerySet.as_manager()
+
+    # The cell this row is counted in by RiskSnapshot (None: not counted yet).
+    _risk_cell = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in field_names for name in ('success_probability', 'study_time', 'past_failures')):
+            instance._risk_cell = instance.risk_cell()
+        else:
+            instance._risk_cell = _UNTRACKED
+        return instance
+
+    def risk_cell(self):
+        """``(success_probability, study_time, past_failures)`` for RiskSnapshot."""
+        return (self.success_probability, self.study_time, self.past_failures)
+
+    def sync_risk_snapshot(self, deleted=False):
+        """Move this student's RiskSnapshot contribution to its current cell.
+
+        Rows loaded with those fields deferred are skipped; the rebuild
+        command reconciles them.
+        """
+        old = self._risk_cell
+        new = None if deleted else self.risk_cell()
+        if old is _UNTRACKED or old == new:
+            return
+        RiskSnapshot.objects.using(self._state.db).apply_deltas(
+            removed=[] if old is None else [old],
+            added=[] if new is None else [new],
+        )
+        self._risk_cell = new
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not set(update_fields).isdisjoint(PREDICTION_FEATURES):
+            self.packed_features = self.pack_features()
+            written = {'packed_features'}
+            if getattr(settings, 'STUDENT_PREDICTION_MODE', 'sync') == 'deferred':
+                # The stored score is stale until the queue rescores the
+                # student; clear it so pages compute it on the fly meanwhile.
+                self.success_probability = None
+                self.model_version = ''
+                written |= {'success_probability', 'model_version'}
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *written}
+        super().save(*args, **kwargs)
+
+    def pack_features(self):
+        """This student's packed input vector, or None with ``STUDENT_PACKED_FEATURES`` off.
+
+        Also None when an input does not fit int16; the row is then read
+        from its columns.
+        """
+        from . import feature_vectors
+        if not feature_vectors.enabled():
+            return None
+        return feature_vectors.pack([getattr(self, field) for field in PREDICTION_FEATURES])
+
+    def prediction_data(self):
+        """Return the model inputs keyed by training feature name."""
+        return {feature: getattr(self, field) for field, feature in PREDICTION_FEATURES.items()}
 
     def update_success_probability(self):
         from .prediction_service import predictor
         if not self.pk:
             return None
         
-        # Prepare student data for prediction
-        student_data = {
-            'age': self.age,
-            'Medu': self.mother_education,
-            'Fedu': self.father_education,
-            'traveltime': self.travel_time,
-            'studytime': self.study_time,
-            'failures': self.past_failures,
-            'famrel': self.family_relations,
-            'freetime': self.free_time,
-            'goout': self.go_out,
-            'Dalc': self.workday_alcohol,
-            'Walc': self.weekend_alcohol,
-            'health': self.health_status,
-            'absences': self.absences
-        }
-        self.success_probability = predictor.predict_success_probability(student_data)
-        self.__class__.objects.filter(pk=self.pk).update(success_probability=self.success_probability)
+        student_data = self.prediction_data()
+        current = predictor.load()
+        self.success_probability = current.predict_success_probability(student_data)
+        self.model_version = current.version or ''
+        self.updated_at = timezone.now()
+        with PREDICTION_SECONDS.time(stage='db_write'), transaction.atomic(using=self._state.db):
+            self.__class__.objects.filter(pk=self.pk).update(
+                success_probability=self.success_probability,
+                model_version=self.model_version,
+                updated_at=self.updated_at,
+            )
+            PredictionHistory.objects.using(self._state.db).record([self], recorded_at=self.updated_at)
+        self.sync_risk_snapshot()
+        page_cache.invalidate([self.pk])
         return self.success_probability
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-gpa', '-id'], name='student_gpa_id_idx'),
+            models.Index(fields=['-created_at', '-id'], name='student_created_id_idx'),
+            models.Index(fields=['success_probability', 'id'], name='student_probability_id_idx'),
+            models.Index(fields=['absences', 'id'], name='student_absences_id_idx'),
+            models.Index(fields=['past_failures', 'id'], name='student_failures_id_idx'),
+            models.Index(fields=['name', 'id'], name='student_name_id_idx'),
+            # Students changed since the last early-warning scan.
+            models.Index(fields=['updated_at'], name='student_updated_at_idx'),
+        ]
+
+
+class RiskSnapshotQuerySet(models.QuerySet):
+    def apply_deltas(self, removed=(), added=()):
+        """Move students out of and into cells.
+
+        Items are ``Student.risk_cell()`` tuples. Deltas are summed per cell
+        and written as ``F()`` increments, so concurrent writers cannot lose
+        each other's updates. Three queries however many cells are touched.
+        """
+        deltas = {}
+        for sign, cells in ((-1, removed), (1, added)):
+            for probability, study_time, past_failures in cells:
+                key = (risk_band(probability), study_time, past_failures)
+                count, total = deltas.get(key, (0, 0.0))
+                deltas[key] = (count + sign, total + sign * (probability or 0.0))
+        deltas = {key: delta for key, delta in deltas.items() if delta != (0, 0.0)}
+        if not deltas:
+            return
+
+        fields = ('band', 'study_time', 'past_failures')
+        with transaction.atomic(using=self.db, savepoint=False):
+            self.bulk_create(
+                [self.model(**dict(zip(fields, key))) for key in deltas], ignore_conflicts=True
+            )
+            match = Q()
+            for key in deltas:
+                match |= Q(**dict(zip(fields, key)))
+            cells = list(self.filter(match).only('pk', *fields))
+            for cell in cells:
+                count, total = deltas[(cell.band, cell.study_time, cell.past_failures)]
+                cell.count = F('count') + count
+                cell.probability_sum = F('probability_sum') + total
+            self.bulk_update(cells, ['count', 'probability_sum'])
+
+    def rebuild(self):
+        """Recompute every cell from the Student table with one GROUP BY query."""
+        band = Case(
+            When(success_probability__isnull=True, then=Value('unscored')),
+            When(success_probability__lt=HIGH_RISK_BELOW, then=Value('high')),
+            When(success_probability__lt=LOW_RISK_FROM, then=Value('medium')),
+            default=Value('low'),
+        )
+        rows = (
+            Student.objects.using(self.db)
+            .annotate(band=band)
+            .values('band', 'study_time', 'past_failures')
+            .annotate(
+                count=Count('pk'),
+                probability_sum=Coalesce(Sum('success_probability'), Value(0.0), output_field=FloatField()),
+            )
+            .order_by()
+        )
+        with transaction.atomic(using=self.db):
+            cells = [self.model(**row) for row in rows]
+            self.all().delete()
+            self.bulk_create(cells)
+        return len(cells)
+
+
+class RiskSnapshot(models.Model):
+    """Student count and probability sum per risk band, study time and failures.
+
+    Kept current by deltas when students are saved, rescored, imported or
+    deleted, so the dashboard reads a few dozen rows however large the
+    roster is. ``rebuild_risk_snapshot`` recomputes it from scratch.
+    """
+
+    band = models.CharField(max_length=10, choices=RISK_BANDS)
+    study_time = models.IntegerField()
+    past_failures = models.IntegerField()
+    count = models.IntegerField(default=0)
+    probability_sum = models.FloatField(default=0.0)
+
+    objects = RiskSnapshotQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['band', 'study_time', 'past_failures'], name='risk_snapshot_cell'),
+        ]
+
+
+class PredictionHistoryQuerySet(models.QuerySet):
+    def record(self, students, recorded_at=None):
+        """Append each scored student's probability with one bulk INSERT."""
+        if not getattr(settings, 'STUDENT_PREDICTION_HISTORY', True):
+            return
+        if recorded_at is None:
+            recorded_at = timezone.now()
+        self.bulk_create([
+            self.model(
+                student_id=student.pk,
+                model_version=student.model_version,
+                success_probability=student.success_probability,
+                recorded_at=recorded_at,
+            )
+            for student in students
+            if student.success_probability is not None
+        ])
+
+    def latest_per_student(self):
+        """The most recent entry of each student (ids grow with time, so the highest id)."""
+        latest = self.order_by().values('student').annotate(latest=Max('pk')).values('latest')
+        return self.filter(pk__in=latest)
+
+    def trend(self, student, since=None, until=None):
+        """One student's entries, oldest first, optionally within ``[since, until)``."""
+        queryset = self.filter(student=student)
+        if since is not None:
+            queryset = queryset.filter(recorded_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(recorded_at__lt=until)
+        return queryset.order_by('recorded_at', 'pk')
+
+
+class PredictionHistory(models.Model):
+    """Append-only log of every probability a student was given.
+
+    Written alongside ``success_probability`` (one row per save, one bulk
+    INSERT per rescore or import chunk). ``compact_prediction_history``
+    moves old rows into monthly archives; see ``students.history``.
+    """
+
+    # The (student, recorded_at) index below also serves the foreign key.
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name='prediction_history', db_index=False
+    )
+    model_version = models.CharField(max_length=64, blank=True, default='')
+    success_probability = models.FloatField()
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    objects = PredictionHistoryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', '-recorded_at'], name='history_student_time_idx'),
+            models.Index(fields=['recorded_at'], name='history_recorded_at_idx'),
+        ]
+
+
+class EarlyWarningBaseline(models.Model):
+    """What the early-warning job last saw of a student.
+
+    ``inputs`` holds the ``PREDICTION_FEATURES`` values in order as
+    little-endian int16, so a whole chunk decodes with one ``frombuffer``.
+    """
+
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    success_probability = models.FloatField()
+    inputs = models.BinaryField()
+
+
+class RiskAlert(models.Model):
+    """A student whose probability dropped, or who entered the high-risk band, between two scans."""
+
+    KINDS = [
+        ('high_risk', 'Entered high risk'),
+        ('drop', 'Probability dropped'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='alerts')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    previous_probability = models.FloatField()
+    success_probability = models.FloatField()
+    # e.g. "absences +6, study_time -1": the inputs that moved since the last scan.
+    changed_inputs = models.CharField(max_length=255, blank=True, default='')
+    model_version = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    @property
+    def change(self):
+        return self.success_probability - self.previous_probability
+
+
+class EarlyWarningRun(models.Model):
+    """One pass of the early-warning job; the next pass scans students updated after ``watermark``."""
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    watermark = models.DateTimeField()
+    scanned = models.IntegerField(default=0)
+    flagged = models.IntegerField(default=0)
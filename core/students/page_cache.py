@@ -0,0 +1,112 @@
+# In students/page_cache.py
+"""Conditional GET and a rendered-page cache for the student pages.
+
+A detail page is a function of the student row and the serving model, so
+its ETag hashes the row's ``VALIDATOR_FIELDS`` with the model version and
+the explanation method. A request whose ``If-None-Match`` (or
+``If-Modified-Since``) still matches gets a 304 after one primary-key
+lookup; otherwise the page rendered for that ETag is served from the cache
+when there is one. A model swap changes every ETag, so pages rendered for
+the previous model are never served, and since the ETag is read from the
+database a stale entry cannot be served even by another process.
+
+List pages are cached per URL under a generation number that every
+``invalidate`` bumps. The Student save/delete signals,
+``update_success_probability``, ``rescore`` and the importer call it;
+code that changes students with ``QuerySet.update()`` must too. With
+several worker processes point ``STUDENT_PAGE_CACHE_ALIAS`` at a shared
+backend, or a list page can stay stale in the other workers for up to
+``STUDENT_PAGE_CACHE_TIMEOUT`` seconds.
+"""
+import hashlib
+import time
+from calendar import timegm
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Student columns a detail page's validators are derived from.
+VALIDATOR_FIELDS = ('updated_at', 'success_probability', 'model_version')
+
+LIST_GENERATION_KEY = 'students:page:list-generation'
+
+
+def _cache():
+    return caches[getattr(settings, 'STUDENT_PAGE_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'STUDENT_PAGE_CACHE_TIMEOUT', 300)
+
+
+def cacheable(request):
+    """False for requests whose page carries flash messages meant for them alone."""
+    return request.method in ('GET', 'HEAD') and not get_messages(request)
+
+
+def detail_validators(student_id, row, current):
+    """``(etag, last_modified)`` for a detail page from a ``VALIDATOR_FIELDS`` row and the serving predictor."""
+    updated_at, success_probability, model_version = row
+    method = getattr(settings, 'STUDENT_EXPLANATION_METHOD', 'importance')
+    key = f'{student_id}|{updated_at.isoformat()}|{success_probability!r}|{model_version}|{current.version}|{method}'
+    etag = '"%s"' % hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+    if current.modified_at is not None and current.modified_at > updated_at:
+        return etag, current.modified_at
+    return etag, updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) the request's preconditions call for, else None."""
+    return get_conditional_response(request, etag=etag, last_modified=timegm(last_modified.utctimetuple()))
+
+
+def with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Revalidate every time instead of guessing freshness from Last-Modified.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def detail_key(student_id):
+    return f'students:page:detail:{student_id}'
+
+
+def list_key(request):
+    """Cache key of a list page, or None if it must not be cached."""
+    if not _timeout() or not cacheable(request):
+        return None
+    generation = _cache().get_or_set(LIST_GENERATION_KEY, time.time_ns, None)
+    digest = hashlib.blake2b(request.get_full_path().encode(), digest_size=12).hexdigest()
+    return f'students:page:list:{generation}:{digest}'
+
+
+def cached_page(key, etag=None):
+    """The page stored under ``key`` for ``etag``, as a fresh response."""
+    if key is None or not _timeout():
+        return None
+    entry = _cache().get(key)
+    if entry is None or entry[0] != etag:
+        return None
+    return HttpResponse(entry[1])
+
+
+def store_page(key, response, etag=None):
+    if key is not None and _timeout() and response.status_code == 200:
+        _cache().set(key, (etag, response.content), _timeout())
+
+
+def invalidate(student_ids=()):
+    """Drop the cached detail pages of ``student_ids`` and every cached list page."""
+    cache = _cache()
+    if student_ids:
+        cache.delete_many([detail_key(pk) for pk in student_ids])
+    try:
+        cache.incr(LIST_GENERATION_KEY)
+    except ValueError:
+        # Evicted; start from the clock so old keys are not reused.
+        cache.set(LIST_GENERATION_KEY, time.time_ns(), None)
@@ -0,0 +1,143 @@
+# In students/pagination.py
+"""Keyset ("seek") pagination.
+
+Instead of ``OFFSET n``, each page asks for the rows that sort after the
+last row of the previous page. With an index matching the ordering the
+database reads only ``page_size`` rows per page, however deep the page.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None = None
+    ordering: list = field(default_factory=list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the cursor's values, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _nullable(model, name):
+    return model._meta.get_field(name).null
+
+
+def cursor_values(model, ordering, cursor):
+    """The cursor's values as the ordering fields' Python types, or None if they do not fit."""
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(ordering):
+        return None
+    coerced = []
+    for (name, _), value in zip(ordering, values):
+        model_field = model._meta.get_field(name)
+        if value is None:
+            if not model_field.null:
+                return None
+            coerced.append(None)
+            continue
+        try:
+            value = model_field.to_python(value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if value is None:
+            return None
+        coerced.append(value)
+    return coerced
+
+
+def order_expressions(model, ordering):
+    """ORDER BY terms for ``[(field, descending), ...]``; NULLs always sort last."""
+    terms = []
+    for name, descending in ordering:
+        expression = F(name)
+        if _nullable(model, name):
+            terms.append(expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True))
+        else:
+            terms.append(expression.desc() if descending else expression.asc())
+    return terms
+
+
+def after_cursor(model, ordering, values):
+    """Filter matching the rows that sort strictly after ``values``."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending), value in zip(ordering, values):
+        if value is None:
+            # NULLs sort last, so nothing is strictly after a NULL in this column.
+            step = Q(pk__in=[])
+            same = Q(**{f'{name}__isnull': True})
+        else:
+            step = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if _nullable(model, name):
+                step |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        condition |= equal & step
+        equal &= same
+
+    # Redundant bound on the leading column: the OR above hides it from the
+    # planner, and without it the index is scanned from the start.
+    name, descending = ordering[0]
+    if values[0] is None:
+        bound = Q(**{f'{name}__isnull': True})
+    else:
+        bound = Q(**{f'{name}__lte' if descending else f'{name}__gte': values[0]})
+        if _nullable(model, name):
+            bound |= Q(**{f'{name}__isnull': True})
+    return bound & condition
+
+
+def _seek(queryset, ordering, cursor):
+    model = queryset.model
+    queryset = queryset.order_by(*order_expressions(model, ordering))
+
+    values = cursor_values(model, ordering, cursor)
+    if values is not None:
+        queryset = queryset.filter(after_cursor(model, ordering, values))
+    return queryset
+
+
+def _page(rows, ordering, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name, _ in ordering])
+    return KeysetPage(items=rows, next_cursor=next_cursor, ordering=ordering)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=50):
+    """Return one page of ``queryset`` sorted by ``ordering``.
+
+    ``ordering`` is a list of ``(field, descending)`` pairs and must end in a
+    unique column (normally the primary key) so the order is total.
+    """
+    queryset = _seek(queryset, ordering, cursor)
+    return _page(list(queryset[:page_size + 1]), ordering, page_size)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, page_size=50):
+    """Async ``keyset_paginate``, fetching the page with the async ORM."""
+    queryset = _seek(queryset, ordering, cursor)
+    return _page([row async for row in queryset[:page_size + 1]], ordering, page_size)
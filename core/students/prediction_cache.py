@@ -0,0 +1,128 @@
+# In students/prediction_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .metrics import PREDICTION_CACHE_EVENTS
+
+_EVENT = {event: PREDICTION_CACHE_EVENTS.labels(event=event) for event in ('hit', 'shared_hit', 'miss', 'eviction')}
+
+
+class PredictionCache:
+    """Bounded LRU of predicted probabilities.
+
+    Keys are the encoded feature row (as bytes) plus the fingerprint of the
+    model that produced the value, so a different model can never be served
+    a stale probability. With ``backend_alias`` set, misses in the local LRU
+    fall through to that Django cache, which lets several processes share
+    results. Shared entries expire after ``timeout`` seconds (by default the
+    backend's own timeout), so those of replaced models do not pile up.
+    Lookups and evictions are also counted on ``/metrics``.
+    """
+
+    def __init__(self, max_size=4096, backend_alias=None, timeout=DEFAULT_TIMEOUT):
+        self.max_size = max_size
+        self.backend_alias = backend_alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 or self.backend_alias is not None
+
+    def _backend(self):
+        return caches[self.backend_alias] if self.backend_alias else None
+
+    @staticmethod
+    def _shared_key(fingerprint, row_key):
+        return f'students:prediction:{fingerprint}:{hashlib.blake2b(row_key, digest_size=16).hexdigest()}'
+
+    def get_many(self, fingerprint, row_keys):
+        """Return ``{row_key: probability}`` for every key found."""
+        found = {}
+        with self._lock:
+            for row_key in row_keys:
+                value = self._entries.get((fingerprint, row_key))
+                if value is not None:
+                    self._entries.move_to_end((fingerprint, row_key))
+                    found[row_key] = value
+            self.hits += len(found)
+        _EVENT['hit'].inc(len(found))
+
+        missing = [row_key for row_key in row_keys if row_key not in found]
+        backend = self._backend()
+        if backend is not None and missing:
+            shared_keys = {self._shared_key(fingerprint, row_key): row_key for row_key in missing}
+            shared = {shared_keys[key]: value for key, value in backend.get_many(list(shared_keys)).items()}
+            if shared:
+                self._store(fingerprint, shared)
+                found.update(shared)
+                with self._lock:
+                    self.shared_hits += len(shared)
+                _EVENT['shared_hit'].inc(len(shared))
+
+        with self._lock:
+            self.misses += len(row_keys) - len(found)
+        _EVENT['miss'].inc(len(row_keys) - len(found))
+        return found
+
+    def get(self, fingerprint, row_key):
+        return self.get_many(fingerprint, [row_key]).get(row_key)
+
+    def set_many(self, fingerprint, values):
+        """Store ``{row_key: probability}`` locally and in the shared backend."""
+        self._store(fingerprint, values)
+        backend = self._backend()
+        if backend is not None and values:
+            backend.set_many(
+                {self._shared_key(fingerprint, row_key): value for row_key, value in values.items()},
+                timeout=self.timeout,
+            )
+
+    def set(self, fingerprint, row_key, value):
+        self.set_many(fingerprint, {row_key: value})
+
+    def _store(self, fingerprint, values):
+        if self.max_size <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            for row_key, value in values.items():
+                self._entries[(fingerprint, row_key)] = value
+                self._entries.move_to_end((fingerprint, row_key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            _EVENT['eviction'].inc(evicted)
+
+    def clear(self):
+        """Drop every local entry.
+
+        Shared entries are keyed by fingerprint, so no other model reads
+        them, and they expire with the cache timeout.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,94 @@
+# In students/prediction_queue.py
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionQueue:
+    """Coalescing set of student ids waiting for a prediction.
+
+    Saves only record the id, so repeated edits of one student collapse into
+    a single entry. A daemon thread wakes up after the first enqueue, waits
+    ``delay`` seconds for the burst to settle and rescores everything pending
+    in batches of ``batch_size`` (one SELECT and one ``bulk_update`` each).
+    """
+
+    def __init__(self, batch_size=500, delay=0.5, predictor=None, background=True):
+        self.batch_size = batch_size
+        self.delay = delay
+        self.predictor = predictor
+        self.background = background
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def enqueue(self, student_id):
+        with self._lock:
+            self._pending.add(student_id)
+            if self.background and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(
+                    target=self._run, name='student-prediction-queue', daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def drain(self):
+        """Rescore everything queued so far in the calling thread.
+
+        Returns the number of students rescored. Ids of a failed batch are
+        put back so the next drain retries them.
+        """
+        from .models import Student
+
+        total = 0
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return total
+                batch = [self._pending.pop() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                total += Student.objects.filter(pk__in=batch).rescore(
+                    chunk_size=self.batch_size, predictor=self.predictor
+                )
+            except Exception:
+                with self._lock:
+                    self._pending.update(batch)
+                raise
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.delay)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Deferred prediction batch failed')
+            finally:
+                close_old_connections()
+
+
+prediction_queue = PredictionQueue(
+    batch_size=getattr(settings, 'STUDENT_PREDICTION_BATCH_SIZE', 500),
+    delay=getattr(settings, 'STUDENT_PREDICTION_DELAY', 0.5),
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    if len(prediction_queue):
+        try:
+            prediction_queue.drain()
+        except Exception:
+            logger.exception('Could not flush deferred predictions on exit')
@@ -1,22 +1,106 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import warnings
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime, timezone
 import joblib
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from django.conf import settings
 
+from .feature_schema import FeatureEncoder, SchemaMismatch, check_artifact
+from .flat_forest import FlatForest
+from .lookup_table import LookupTable, table_path
+from .metrics import PREDICTION_FALLBACKS, PREDICTION_SECONDS, PREDICTIONS
+from .model_registry import METADATA_FILE, ModelRegistry
+from .prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+# Label-bound metrics for the hot paths.
+_STAGE = {stage: PREDICTION_SECONDS.labels(stage=stage) for stage in ('encode', 'lookup', 'predict', 'explain')}
+_SOURCE = {source: PREDICTIONS.labels(source=source) for source in ('table', 'cache', 'model')}
+
+
+def _top_indices(scores, top_n):
+    """Indices of the ``top_n`` largest scores, highest first.
+
+    Ties keep column order, matching a stable sort of the whole row.
+    """
+    n = len(scores)
+    if top_n <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_n < n:
+        kth = scores[np.argpartition(scores, n - top_n)[n - top_n]]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return order[:top_n]
+
+
+def factor_label(item):
+    """Short label for one ``explain`` entry, e.g. ``Medu=4`` or ``absences=12``."""
+    feature = str(item.get('feature', ''))
+    value = item.get('value', None)
+    if '_' in feature:
+        prefix, suffix = feature.split('_', 1)
+        return f"{prefix}={suffix}"
+    if value is not None:
+        try:
+            return f"{feature}={float(value):.0f}"
+        except Exception:
+            return f"{feature}={value}"
+    return feature
+
+
+class PredictionUnavailable(RuntimeError):
+    """No model is loaded or scoring failed, where a 0.5 answer is not wanted."""
+
+
 class StudentPerformancePredictor:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, cache=None, mmap_mode=None, registry=None):
+        if model_path is None:
+            model_path = (registry or ModelRegistry()).active_model_path()
         if model_path is None:
+            # Artifacts written before the version registry existed.
             model_path = Path(settings.BASE_DIR) / 'students' / 'ml_models' / 'student_performance_model.pkl'
+        self.model_path = Path(model_path)
 
         self.model = None
         self.feature_names = []
         self.categorical_columns = []
         self._use_one_hot = False
+        self.encoder = None
+        self.fingerprint = None
+        # When the artifact was written; bounds the student pages' Last-Modified.
+        self.modified_at = None
+        self.metadata = {}
+        self._feature_importances = None
+        self._forest = None
+        if cache is None:
+            cache = PredictionCache(
+                max_size=getattr(settings, 'STUDENT_PREDICTION_CACHE_SIZE', 4096),
+                backend_alias=getattr(settings, 'STUDENT_PREDICTION_CACHE_ALIAS', None),
+                timeout=getattr(settings, 'STUDENT_PREDICTION_CACHE_TIMEOUT', 3600),
+            )
+        self.cache = cache
 
         try:
-            model_data = joblib.load(model_path)
+            with open(model_path, 'rb') as f:
+                self.fingerprint = hashlib.file_digest(f, 'sha256').hexdigest()[:16]
+            self.modified_at = datetime.fromtimestamp(self.model_path.stat().st_mtime, tz=timezone.utc)
+            # Array payloads (lookup tables, flat models) are mapped instead of
+            # copied; estimator internals are still unpickled normally.
+            model_data = joblib.load(model_path, mmap_mode=mmap_mode)
 
             if isinstance(model_data, dict) and 'model' in model_data:
+                check_artifact(model_data)
                 self.model = model_data['model']
                 self.feature_names = model_data.get('feature_names', [])
                 self.categorical_columns = model_data.get('categorical_columns', [])
@@ -27,9 +111,59 @@ class StudentPerformancePredictor:
                 self.feature_names = list(getattr(self.model, 'feature_names_in_', []))
                 self.categorical_columns = []
                 self._use_one_hot = False
+        except SchemaMismatch as e:
+            logger.error('Not serving %s: %s', model_path, e)
+            self.model = None
         except Exception:
             self.model = None
-    
+
+        metadata_path = self.model_path.with_name(METADATA_FILE)
+        if self.model is not None and metadata_path.exists():
+            self.metadata = json.loads(metadata_path.read_text())
+        # Stored on Student.model_version, so rescoring can skip up-to-date rows.
+        self.version = self.metadata.get('version') or self.fingerprint
+
+        if self.model is not None and self.feature_names:
+            self.encoder = FeatureEncoder(
+                self.feature_names,
+                self.categorical_columns if self._use_one_hot else [],
+            )
+        # Whatever was cached belongs to the previous model.
+        self.cache.clear()
+
+        self.table = None
+        if self.encoder is not None and getattr(settings, 'STUDENT_PREDICTION_LOOKUP_TABLE', True):
+            self.table = self._load_table(table_path(model_path), mmap_mode)
+
+    def _load_table(self, path, mmap_mode=None):
+        if not path.exists():
+            return None
+        try:
+            table = LookupTable.load(path, mmap_mode=mmap_mode)
+        except Exception:
+            return None
+        # A table compiled for another model would silently serve wrong values.
+        if table.fingerprint != self.fingerprint or len(table.radices) != len(self.encoder.input_columns):
+            return None
+        return table
+
+    def load(self):
+        """Return the predictor to use; lets callers treat this and LazyPredictor alike."""
+        return self
+
+    def encode(self, student_data):
+        """Return the model input for one student, skipping pandas when possible."""
+        with _STAGE['encode'].time():
+            return self._encode(student_data)
+
+    def _encode(self, student_data):
+        if self.encoder is not None:
+            try:
+                return self.encoder.encode(student_data)
+            except (TypeError, ValueError):
+                pass
+        return self.preprocess_input(student_data)
+
     def preprocess_input(self, student_data):
         if self.model is None:
             return pd.DataFrame([student_data])
@@ -59,60 +193,384 @@ class StudentPerformancePredictor:
 
         return student_df[self.feature_names]
 
-    def explain(self, student_data, top_n=5):
+    def explain(self, student_data, top_n=5, method='importance', row=None):
+        """Top ``top_n`` factors behind a student's prediction.
+
+        ``method='importance'`` ranks features by global importance times the
+        magnitude of the student's value. ``method='contributions'`` follows
+        the student's path through every tree and ranks inputs by how much
+        they moved this prediction (only for forests of decision trees; other
+        models fall back to importance). Pass ``row`` to reuse an encoding
+        the caller already has.
+        """
         try:
             if self.model is None:
                 return []
+            if row is None:
+                row = self.encode(student_data)
+            with _STAGE['explain'].time():
+                return self._explain_row(student_data, row, top_n, method)
+        except Exception:
+            logger.exception('Explanation failed', extra={'model_version': self.version})
+            return []
 
-            if not hasattr(self.model, 'feature_importances_'):
-                return []
+    def _explain_row(self, student_data, row, top_n, method):
+        names = list(row.columns) if isinstance(row, pd.DataFrame) else self.feature_names
+        values = np.asarray(row, dtype=float)[0]
+
+        if method == 'contributions' and self._flat_forest() is not None:
+            return self._explain_contributions(student_data, values, top_n)
 
-            processed = self.preprocess_input(student_data)
-            row = processed.iloc[0]
+        importances = self._importances()
+        if importances is None:
+            return []
+        n = min(len(importances), len(values))
+        importances = importances[:n]
+        scores = importances * np.abs(values[:n])
+        return [
+            {'feature': str(names[i]), 'value': float(values[i]), 'importance': float(importances[i])}
+            for i in _top_indices(scores, top_n)
+        ]
+
+    def _importances(self):
+        # Forests recompute feature_importances_ from every tree on each access.
+        if self._feature_importances is None:
             importances = getattr(self.model, 'feature_importances_', None)
-            if importances is None:
-                return []
+            if importances is not None:
+                self._feature_importances = np.asarray(importances, dtype=float)
+        return self._feature_importances
 
-            scores = []
-            for i, feature in enumerate(processed.columns):
-                if i >= len(importances):
-                    break
-                value = row[feature]
-                imp = float(importances[i])
-                scores.append((imp * (abs(float(value)) if value is not None else 0.0), feature, value, imp))
-
-            scores.sort(reverse=True, key=lambda x: x[0])
-            result = []
-            for _, feature, value, imp in scores[:top_n]:
-                result.append({
-                    'feature': str(feature),
-                    'value': float(value) if value is not None else 0.0,
-                    'importance': float(imp),
-                })
-            return result
+    def _flat_forest(self):
+        """The model as a ``FlatForest`` (flattened once); None if it is no forest."""
+        if self._forest is None:
+            if isinstance(self.model, FlatForest):
+                self._forest = self.model
+            else:
+                try:
+                    self._forest = FlatForest.from_estimator(self.model)
+                except ValueError:
+                    self._forest = False
+        return self._forest or None
+
+    def contributions(self, row):
+        """Per-feature contributions to one encoded row's probability.
+
+        Returns ``(bias, contributions)`` where ``bias`` is the forest's mean
+        root probability and ``bias + contributions.sum()`` equals the
+        predicted probability: each split on the student's path credits its
+        feature with the change in probability it caused.
+        """
+        forest = self._flat_forest()
+        # Trees compare float32 inputs, as in predict_proba.
+        x = np.asarray(row, dtype=np.float32)[0]
+        value = forest.value
+        totals = np.zeros(len(x))
+        nodes = forest.roots
+        while len(nodes):
+            feature = forest.feature[nodes]
+            inner = feature >= 0
+            nodes, feature = nodes[inner], feature[inner]
+            children = forest.children[2 * nodes + (x[feature] > forest.threshold[nodes])]
+            totals += np.bincount(feature, weights=value[children] - value[nodes], minlength=len(x))
+            nodes = children
+        roots = forest.roots
+        return float(value[roots].mean()), totals / len(roots)
+
+    def _explain_contributions(self, student_data, values, top_n):
+        _, contributions = self.contributions(values.reshape(1, -1))
+        if self.encoder is None:
+            labels = [(str(name), float(values[i])) for i, name in enumerate(self.feature_names)]
+            totals = contributions
+        else:
+            # One entry per input: the dummies of a categorical add up, and the
+            # student's own category names the entry.
+            labels, groups = [], np.empty(len(self.feature_names), dtype=np.intp)
+            for feature, i in self.encoder.numeric:
+                groups[i] = len(labels)
+                labels.append((feature, float(values[i])))
+            for col, dummies in self.encoder.categories.items():
+                index = list(dummies.values())
+                groups[index] = len(labels)
+                labels.append((f'{col}_{student_data.get(col)}', 1.0))
+            totals = np.bincount(groups, weights=contributions, minlength=len(labels))
+        return [
+            {'feature': labels[g][0], 'value': labels[g][1], 'contribution': float(totals[g])}
+            for g in _top_indices(np.abs(totals), top_n)
+        ]
+
+    def predict_and_explain(self, student_data, top_n=5, method='importance'):
+        """Probability and top factors for one student, encoding it only once."""
+        if self.model is None:
+            return 0.5, []
+        try:
+            row = self.encode(student_data)
         except Exception:
-            return []
-    
-    def predict_success_probability(self, student_data):
+            return self.predict_success_probability(student_data), []
+        probability = self.predict_success_probability(student_data, row=row)
+        return probability, self.explain(student_data, top_n=top_n, method=method, row=row)
+
+    @staticmethod
+    def _positive_class(proba):
+        if proba.ndim == 1:
+            return proba
+        return proba[:, 1]
+
+    def _score_encoded(self, X):
+        """Positive-class probabilities for an encoded matrix, through the cache."""
+        if not self.cache.enabled:
+            return self._predict_proba(X)
+
+        keys = [x.tobytes() for x in X]
+        cached = self.cache.get_many(self.fingerprint, keys)
+        result = np.array([cached.get(key, np.nan) for key in keys])
+        missing = np.flatnonzero(np.isnan(result))
+        _SOURCE['cache'].inc(len(keys) - len(missing))
+        if len(missing):
+            result[missing] = self._predict_proba(X[missing])
+            self.cache.set_many(self.fingerprint, {keys[i]: float(result[i]) for i in missing})
+        return result
+
+    def _model_proba(self, X):
+        """``self.model.predict_proba(X)``.
+
+        The fast path hands the model plain arrays laid out exactly like the
+        DataFrame it was fitted on, so scikit-learn's feature-name warning
+        is silenced for this call only.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+            return self.model.predict_proba(X)
+
+    def _predict_proba(self, X):
+        """Positive-class probabilities straight from the model."""
+        with _STAGE['predict'].time():
+            result = self._positive_class(self._model_proba(X)).astype(float)
+        _SOURCE['model'].inc(len(result))
+        return result
+
+    def _fallback(self, reason, count=1):
+        PREDICTION_FALLBACKS.inc(count, reason=reason)
+        if reason == 'error':
+            logger.exception(
+                'Prediction failed; answering 0.5',
+                extra={'model_version': self.version, 'model_path': str(self.model_path), 'count': count},
+            )
+        return 0.5
+
+    def predict_many(self, students, fallback=True):
+        """Score many students (``Student`` instances or dicts) in one model call.
+
+        Returns a float array aligned with the input order. Without a model,
+        or if scoring raises, every row is 0.5; with ``fallback=False``
+        ``PredictionUnavailable`` is raised instead.
+        """
+        rows = [
+            student if isinstance(student, Mapping) else student.prediction_data()
+            for student in students
+        ]
+        if not rows:
+            return np.empty(0)
+        if self.model is None:
+            if not fallback:
+                raise PredictionUnavailable('No model is loaded')
+            return np.full(len(rows), self._fallback('no_model', len(rows)))
+
+        try:
+            if self.encoder is None:
+                with _STAGE['encode'].time():
+                    X = pd.concat([self.preprocess_input(row) for row in rows], ignore_index=True)
+                return self._predict_proba(X)
+
+            with _STAGE['encode'].time():
+                raw = self.encoder.raw_matrix(rows)
+            return self._score_raw(raw)
+        except Exception as e:
+            if not fallback:
+                logger.exception('Prediction failed', extra={'model_version': self.version, 'count': len(rows)})
+                raise PredictionUnavailable('Prediction failed') from e
+            return np.full(len(rows), self._fallback('error', len(rows)))
+
+    def predict_matrix(self, matrix, columns, fallback=True):
+        """Score the rows of a numeric matrix whose columns are the feature names ``columns``.
+
+        The batch path for packed vectors and exported matrices: no per-row
+        dicts are built. Returns a float array aligned with the rows;
+        ``fallback`` as for ``predict_many``.
+        """
+        if not len(matrix):
+            return np.empty(0)
+        if self.model is None or self.encoder is None:
+            return self.predict_many([dict(zip(columns, row)) for row in matrix.tolist()], fallback=fallback)
+        try:
+            with _STAGE['encode'].time():
+                raw = self.encoder.raw_from_columns(matrix, columns)
+            return self._score_raw(raw)
+        except Exception as e:
+            if not fallback:
+                logger.exception('Prediction failed', extra={'model_version': self.version, 'count': len(matrix)})
+                raise PredictionUnavailable('Prediction failed') from e
+            return np.full(len(matrix), self._fallback('error', len(matrix)))
+
+    def _score_raw(self, raw):
+        """Probabilities for a raw input matrix: lookup table first, then cache and model."""
+        if self.table is not None:
+            with _STAGE['lookup'].time():
+                result = self.table.lookup(raw)
+        else:
+            result = np.full(len(raw), np.nan)
+        missing = np.flatnonzero(np.isnan(result))
+        _SOURCE['table'].inc(len(raw) - len(missing))
+        if len(missing):
+            with _STAGE['encode'].time():
+                X = self.encoder.encode_matrix(raw[missing])
+            result[missing] = self._score_encoded(X)
+        return result
+
+    def predict_success_probability(self, student_data, row=None):
         try:
             if self.model is None:
-                return 0.5
+                return self._fallback('no_model')
+
+            if self.table is not None:
+                with _STAGE['lookup'].time():
+                    try:
+                        probability = self.table.lookup(self.encoder.raw_matrix([student_data]))[0]
+                    except (TypeError, ValueError):
+                        probability = np.nan
+                if not np.isnan(probability):
+                    _SOURCE['table'].inc()
+                    return float(probability)
 
             # Preprocess input
-            processed_data = self.preprocess_input(student_data)
-            
+            processed_data = self.encode(student_data) if row is None else row
+
+            key = None
+            if isinstance(processed_data, np.ndarray) and self.cache.enabled:
+                key = processed_data.tobytes()
+                cached = self.cache.get(self.fingerprint, key)
+                if cached is not None:
+                    _SOURCE['cache'].inc()
+                    return cached
+
             # Get prediction probabilities
-            proba = self.model.predict_proba(processed_data)
+            with _STAGE['predict'].time():
+                proba = self._model_proba(processed_data)
+            _SOURCE['model'].inc()
             
             # Handle both 1D and 2D probability arrays
             if proba.ndim == 1:  # If binary classification with predict_proba() returns 1D array
-                return float(proba[0])
+                probability = float(proba[0])
             else:  # If predict_proba() returns 2D array [prob_class_0, prob_class_1]
-                return float(proba[0][1])
-        
-        except Exception as e:
-            print(f"Prediction error: {str(e)}")
-            return 0.5  # Return neutral probability on error
+                probability = float(proba[0][1])
+
+            if key is not None:
+                self.cache.set(self.fingerprint, key, probability)
+            return probability
+
+        except Exception:
+            return self._fallback('error')  # Return neutral probability on error
+
+class LazyPredictor:
+    """Stand-in that builds the real predictor the first time it is used.
+
+    Importing ``models``, ``views`` or a management command no longer
+    unpickles the model; the first prediction in each process does. Servers
+    that fork workers can call ``load()`` in the parent (see
+    ``STUDENT_MODEL_PRELOAD``) so the workers share its pages copy-on-write.
+
+    Every ``reload_interval`` seconds the registry's active version is
+    checked. A new version is loaded on a background thread and swapped in
+    with a single reference assignment; callers that already hold the old
+    predictor finish with it undisturbed.
+    """
+
+    def __init__(self, reload_interval=None, registry=None, **kwargs):
+        self._kwargs = kwargs
+        self._registry = registry or ModelRegistry()
+        self.reload_interval = reload_interval
+        self._instance = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        # Active version that could not be served; not retried until ACTIVE moves.
+        self._failed_version = None
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def _build(self):
+        return StudentPerformancePredictor(registry=self._registry, **self._kwargs)
+
+    def load(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._build()
+                    self._next_check = time.monotonic() + (self.reload_interval or 0)
+                instance = self._instance
+        elif self.reload_interval is not None and time.monotonic() >= self._next_check:
+            self.check_for_update()
+        return instance
+
+    @contextmanager
+    def serving(self, instance):
+        """Serve ``instance`` (with no reloads) inside the block, then restore."""
+        with self._lock:
+            previous, next_check = self._instance, self._next_check
+            self._instance, self._next_check = instance, float('inf')
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self._instance, self._next_check = previous, next_check
+
+    def check_for_update(self, background=True):
+        """Swap in the active registry version if it changed; True if a swap started.
+
+        A version that failed to load is not tried again until another one
+        is activated.
+        """
+        if self._kwargs.get('model_path') is not None:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        self._next_check = time.monotonic() + (self.reload_interval or 0)
+        active = self._registry.active_version()
+        current = self._instance
+        unchanged = current is not None and current.version == active
+        if active is None or unchanged or active == self._failed_version:
+            self._reload_lock.release()
+            return False
+
+        if background:
+            threading.Thread(target=self._swap, args=(active,), name='student-model-reload', daemon=True).start()
+        else:
+            self._swap(active)
+        return True
+
+    def _swap(self, version):
+        try:
+            instance = self._build()
+            if instance.model is not None:
+                self._instance = instance
+                self._failed_version = None
+            else:
+                self._failed_version = version
+        except Exception:
+            self._failed_version = version
+            logger.exception('Could not load the new model version')
+        finally:
+            self._reload_lock.release()
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
 
 # Create a default predictor instance
-predictor = StudentPerformancePredictor()
\ No newline at end of file
+predictor = LazyPredictor(
+    reload_interval=getattr(settings, 'STUDENT_MODEL_RELOAD_INTERVAL', 5),
+    mmap_mode=getattr(settings, 'STUDENT_MODEL_MMAP_MODE', 'r'),
+)
\ No newline at end of file
@@ -0,0 +1,74 @@
+# In students/search.py
+"""Name search backed by an SQLite FTS5 index when the database has one.
+
+The ``students_student_fts`` table is an external-content FTS5 index over
+``students_student.name`` kept in sync by triggers. Migrations that make
+SQLite rebuild ``students_student`` drop those triggers, so such migrations
+must call ``install_fts`` again (it is idempotent).
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'students_student_fts'
+
+_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, content='students_student', content_rowid='id')",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON students_student BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON students_student BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name ON students_student BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def install_fts(schema_editor):
+    """Create (or repair) the FTS index and its triggers on SQLite builds with FTS5."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        for statement in _FTS_SQL:
+            cursor.execute(statement)
+
+
+def remove_fts(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_available(using='default'):
+    connection = connections[using]
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+def search_names(queryset, text):
+    """Students whose name has a word starting with each word of ``text``.
+
+    Without FTS the whole name must start with ``text`` (case-insensitive).
+    """
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return queryset
+    if fts_available(queryset.db):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,)
+        ))
+    return queryset.filter(name__istartswith=text.strip())
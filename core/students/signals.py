@@ -1,24 +1,47 @@
 # In students/signals.py
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Student
+from . import page_cache
+from .models import PREDICTION_FEATURES, Student
+from .prediction_queue import prediction_queue
 
 @receiver(post_save, sender=Student)
 def update_student_prediction(sender, instance, **kwargs):
     """Update prediction when student data changes"""
     update_fields = kwargs.get('update_fields')
 
-    relevant_fields = {
-        'age', 'mother_education', 'father_education', 'travel_time',
-        'study_time', 'past_failures', 'family_relations', 'free_time',
-        'go_out', 'workday_alcohol', 'weekend_alcohol', 'health_status', 'absences'
-    }
+    relevant_fields = set(PREDICTION_FEATURES)
 
     if update_fields is not None:
         update_fields = set(update_fields)
-        if update_fields <= {'success_probability'}:
+        if update_fields <= {'success_probability', 'model_version'}:
             return
         if not (update_fields & relevant_fields):
             return
 
-    instance.update_success_probability()
\ No newline at end of file
+    if getattr(settings, 'STUDENT_PREDICTION_MODE', 'sync') == 'deferred':
+        student_id = instance.pk
+        transaction.on_commit(lambda: prediction_queue.enqueue(student_id))
+        return
+
+    instance.update_success_probability()
+
+
+@receiver(post_save, sender=Student)
+def update_risk_snapshot(sender, instance, **kwargs):
+    """Move the student to its current RiskSnapshot cell"""
+    instance.sync_risk_snapshot()
+
+
+@receiver(post_delete, sender=Student)
+def remove_from_risk_snapshot(sender, instance, **kwargs):
+    instance.sync_risk_snapshot(deleted=True)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_pages(sender, instance, **kwargs):
+    """Drop the student's cached detail page and the cached list pages"""
+    page_cache.invalidate([instance.pk])
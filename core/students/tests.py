@@ -1,3 +1,1516 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from sklearn.ensemble import RandomForestClassifier
+
+from . import api, async_views, early_warning, feature_schema, feature_vectors, history, page_cache, views
+from .benchmark_suite import compare, regressions, run_suite
+from .benchmarks import peak_rss_mb, random_student_data, synthetic_dataset, train_synthetic_model
+from .export import EXPORT_FIELDS, export_rows
+from .flat_forest import FlatForest
+from .forms import StudentForm
+from .importer import feature_validators, import_students
+from .inference import InferenceBusy, InferencePool, InferenceTimeout
+from .lookup_table import LookupTable, table_path
+from .metrics import (
+    PREDICTION_CACHE_EVENTS, PREDICTION_FALLBACKS, PREDICTION_SECONDS, PREDICTIONS, REGISTRY, Counter, Histogram,
+    JsonFormatter,
+)
+from .micro_batcher import MicroBatcher
+from .model_registry import ModelRegistry
+from .model_search import CandidateResult, search, select
+from .models import PREDICTION_FEATURES, PredictionHistory, RiskAlert, RiskSnapshot, Student
+from .pagination import cursor_values, encode_cursor, keyset_paginate
+from .training import CATEGORICAL, FEATURES, encode, read_csv, read_export, read_students
+from .search import fts_available, search_names
+from .prediction_cache import PredictionCache
+from .prediction_queue import PredictionQueue
+from .prediction_service import LazyPredictor, PredictionUnavailable, StudentPerformancePredictor
+from .views import risk_dashboard
+
+
+def make_student(data=None, **extra):
+    """Create a Student from a predictor-style dict of inputs."""
+    data = data or random_student_data(np.random.default_rng())
+    fields = {field: data[feature] for field, feature in PREDICTION_FEATURES.items()}
+    fields.update(extra)
+    fields.setdefault('name', 'Student')
+    fields.setdefault('gpa', 3.0)
+    return Student.objects.create(**fields)
+
+
+class PredictorTestCase(TestCase):
+    """Trains one small synthetic model shared by every test in the class."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._model_dir = tempfile.TemporaryDirectory()
+        cls.model_path = train_synthetic_model(
+            Path(cls._model_dir.name) / 'student_performance_model.pkl',
+            n_estimators=20,
+        )
+        cls.predictor = StudentPerformancePredictor(cls.model_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._model_dir.cleanup()
+        super().tearDownClass()
+
+    def serve(self):
+        """Serve this class's model from the app-wide predictor until the test ends."""
+        from .prediction_service import predictor
+        return self.enterContext(predictor.serving(self.predictor))
+
+    def make_students(self, count, seed, prefix='Student'):
+        """``count`` students with random inputs drawn from ``seed``, named ``"<prefix> <i>"``."""
+        rng = np.random.default_rng(seed)
+        return [make_student(random_student_data(rng), name=f'{prefix} {i}') for i in range(count)]
+
+
+class FastPathEncoderTests(PredictorTestCase):
+    def test_encoder_matches_get_dummies(self):
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            data = random_student_data(rng)
+            expected = self.predictor.preprocess_input(data).to_numpy(dtype=float)
+            np.testing.assert_array_equal(self.predictor.encoder.encode(data), expected)
+
+    def test_probabilities_match_pandas_path(self):
+        rng = np.random.default_rng(2)
+        students = [random_student_data(rng) for _ in range(100)]
+        # Unseen categories and missing inputs must zero-fill like get_dummies.
+        students.append(dict(students[0], Medu=9, health=0))
+        students.append({'age': 17, 'absences': 3})
+
+        for data in students:
+            expected = self.predictor.model.predict_proba(self.predictor.preprocess_input(data))[0][1]
+            self.assertEqual(self.predictor.predict_success_probability(data), float(expected))
+
+    def test_unencodable_input_falls_back_to_pandas(self):
+        data = dict(random_student_data(np.random.default_rng(3)), age=None)
+        self.assertIsInstance(self.predictor.predict_success_probability(data), float)
+
+
+class BatchPredictionTests(PredictorTestCase):
+    def test_predict_many_matches_single_row(self):
+        rng = np.random.default_rng(4)
+        students = [random_student_data(rng) for _ in range(60)]
+        students.append(dict(students[0], Medu=9))
+        students.append({'age': 17, 'absences': 3})
+
+        batch = self.predictor.predict_many(students)
+        single = [self.predictor.predict_success_probability(data) for data in students]
+        np.testing.assert_array_equal(batch, single)
+
+    def test_predict_many_accepts_model_instances(self):
+        student = make_student()
+        self.assertEqual(
+            self.predictor.predict_many([student])[0],
+            self.predictor.predict_success_probability(student.prediction_data()),
+        )
+        self.assertEqual(len(self.predictor.predict_many([])), 0)
+
+    def test_rescore_writes_chunks_with_bulk_update(self):
+        rng = np.random.default_rng(5)
+        students = [make_student(random_student_data(rng)) for _ in range(25)]
+        Student.objects.update(success_probability=None)
+
+        # Per chunk of 10: one SELECT, plus SAVEPOINT/UPDATE/RELEASE, the risk
+        # snapshot's INSERT OR IGNORE/SELECT/UPDATE and one history INSERT;
+        # one final empty SELECT.
+        with self.assertNumQueries(3 * 8 + 1):
+            count = Student.objects.all().rescore(chunk_size=10, predictor=self.predictor)
+
+        self.assertEqual(count, 25)
+        for student in students:
+            student.refresh_from_db()
+            self.assertEqual(
+                student.success_probability,
+                self.predictor.predict_success_probability(student.prediction_data()),
+            )
+
+    def test_rescore_respects_queryset_filter(self):
+        keep = make_student(age=15)
+        other = make_student(age=20)
+        Student.objects.update(success_probability=None)
+
+        self.assertEqual(Student.objects.filter(age=20).rescore(predictor=self.predictor), 1)
+        keep.refresh_from_db()
+        other.refresh_from_db()
+        self.assertIsNone(keep.success_probability)
+        self.assertIsNotNone(other.success_probability)
+
+
+class ExplanationTests(PredictorTestCase):
+    def legacy_explain(self, data, top_n):
+        processed = self.predictor.preprocess_input(data)
+        importances = self.predictor.model.feature_importances_
+        scores = [
+            (float(importances[i]) * abs(float(processed.iloc[0][feature])), feature, i)
+            for i, feature in enumerate(processed.columns)
+        ]
+        scores.sort(reverse=True, key=lambda x: x[0])
+        return [(feature, float(processed.iloc[0][feature])) for _, feature, _ in scores[:top_n]]
+
+    def test_importance_matches_legacy_ranking(self):
+        rng = np.random.default_rng(20)
+        students = [random_student_data(rng) for _ in range(30)]
+        students.append({'age': 17})
+        for data in students:
+            for top_n in (1, 5, len(self.predictor.feature_names) + 3):
+                factors = self.predictor.explain(data, top_n=top_n)
+                self.assertEqual(
+                    [(item['feature'], item['value']) for item in factors],
+                    self.legacy_explain(data, top_n),
+                )
+
+    def test_contributions_add_up_to_probability(self):
+        rng = np.random.default_rng(21)
+        for _ in range(10):
+            data = random_student_data(rng)
+            bias, contributions = self.predictor.contributions(self.predictor.encode(data))
+            self.assertAlmostEqual(
+                bias + contributions.sum(), self.predictor.predict_success_probability(data), places=9,
+            )
+
+            factors = self.predictor.explain(data, top_n=3, method='contributions')
+            self.assertEqual(len(factors), 3)
+            magnitudes = [abs(item['contribution']) for item in factors]
+            self.assertEqual(magnitudes, sorted(magnitudes, reverse=True))
+            self.assertIn(f"Medu_{data['Medu']}", [
+                item['feature'] for item in self.predictor.explain(data, top_n=99, method='contributions')
+            ])
+
+    def test_predict_and_explain_encodes_once(self):
+        data = random_student_data(np.random.default_rng(22))
+        with mock.patch.object(self.predictor, 'encode', wraps=self.predictor.encode) as encode:
+            probability, factors = self.predictor.predict_and_explain(data, top_n=5)
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(probability, self.predictor.predict_success_probability(data))
+        self.assertEqual(factors, self.predictor.explain(data, top_n=5))
+
+
+class ImportTests(PredictorTestCase):
+    def csv_text(self, n_rows=30):
+        df = synthetic_dataset(n_rows, seed=7)
+        return df.to_csv(sep=';', index=False)
+
+    def test_import_scores_chunks_without_signals(self):
+        stream = io.StringIO(self.csv_text())
+        with mock.patch.object(Student, 'update_success_probability') as per_row:
+            result = import_students(stream, chunk_size=8, predictor=self.predictor)
+        per_row.assert_not_called()
+
+        self.assertEqual((result.created, result.skipped), (30, 0))
+        students = list(Student.objects.order_by('pk'))
+        self.assertEqual(students[0].name, 'Student 2')
+        np.testing.assert_array_equal(
+            [student.success_probability for student in students],
+            self.predictor.predict_many(students),
+        )
+        self.assertEqual({student.model_version for student in students}, {self.predictor.version})
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        lines = self.csv_text(5).splitlines()
+        header = lines[0].split(';')
+        bad_medu = lines[2].split(';')
+        bad_medu[header.index('Medu')] = '7'
+        bad_age = lines[3].split(';')
+        bad_age[header.index('age')] = 'x'
+        lines[2], lines[3] = ';'.join(bad_medu), ';'.join(bad_age)
+
+        result = import_students(io.StringIO('\n'.join(lines)), predictor=self.predictor)
+        self.assertEqual((result.created, result.skipped), (3, 2))
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertEqual(Student.objects.count(), 3)
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            import_students(io.StringIO('name;age\nA;17\n'), predictor=self.predictor)
+
+    def test_upload_endpoint(self):
+        upload = SimpleUploadedFile('students.csv', self.csv_text(12).encode())
+        with mock.patch('students.prediction_service.predictor', self.predictor):
+            response = self.client.post(reverse('students:student_import'), {'file': upload})
+        self.assertRedirects(response, reverse('students:student_list'))
+        self.assertEqual(Student.objects.count(), 12)
+
+
+class ExportTests(PredictorTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(30)
+        for i in range(10):
+            student = make_student(random_student_data(rng), name=f'S{i}', gpa=i / 4)
+            # Saving scored the student; pin known probabilities for the filter.
+            Student.objects.filter(pk=student.pk).update(success_probability=i / 10)
+
+    def test_rows_are_read_in_chunks(self):
+        chunks = list(export_rows(Student.objects.order_by('pk'), chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+
+    def test_csv_export_applies_list_filters_and_order(self):
+        response = self.client.get(reverse('students:student_export'), {'probability_max': 0.45, 'sort': 'gpa'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['name'] for row in rows], ['S0', 'S1', 'S2', 'S3', 'S4'])
+        self.assertEqual(list(rows[0]), list(EXPORT_FIELDS))
+
+    def test_gzipped_jsonl_with_factors(self):
+        with mock.patch('students.prediction_service.predictor', self.predictor):
+            response = self.client.get(
+                reverse('students:student_export'), {'format': 'jsonl', 'factors': 3, 'gzip': '1'}
+            )
+            content = b''.join(response.streaming_content)
+        self.assertIn('students.jsonl.gz', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(content).splitlines()]
+        self.assertEqual(len(rows), 10)
+        student = Student.objects.get(pk=rows[0]['id'])
+        self.assertEqual(rows[0]['success_probability'], student.success_probability)
+        self.assertEqual(len(rows[0]['top_factors']), 3)
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(reverse('students:student_export'), {'sort': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'students.csv.gz'
+            call_command('export_students', output=str(path), gzip=True, query='absences_min=0', stderr=io.StringIO())
+            lines = gzip.decompress(path.read_bytes()).decode().splitlines()
+        self.assertEqual(len(lines), 11)
+
+
+class MetricsTests(PredictorTestCase):
+    def test_prometheus_rendering(self):
+        counter = Counter('test_events_total', 'Events.', ['kind'])
+        counter.inc(kind='a')
+        counter.inc(2, kind='b"')
+        histogram = Histogram('test_seconds', 'Latency.', buckets=(0.1, 1.0))
+        self.addCleanup(REGISTRY.remove, counter)
+        self.addCleanup(REGISTRY.remove, histogram)
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        self.assertEqual(counter.render().splitlines()[2:], [
+            'test_events_total{kind="a"} 1',
+            'test_events_total{kind="b\\""} 2',
+        ])
+        self.assertEqual(histogram.render().splitlines()[2:], [
+            'test_seconds_bucket{le="0.1"} 2',
+            'test_seconds_bucket{le="1.0"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            'test_seconds_sum 3.65',
+            'test_seconds_count 4',
+        ])
+
+    def test_prediction_sources_and_stage_timers(self):
+        data = dict(random_student_data(np.random.default_rng(40)), absences=77)
+        cache_hits = PREDICTIONS.value(source='cache')
+        model_calls = PREDICTIONS.value(source='model')
+        encodes = PREDICTION_SECONDS.count(stage='encode')
+
+        self.predictor.predict_success_probability(data)
+        self.predictor.predict_success_probability(data)
+        self.assertEqual(PREDICTIONS.value(source='model'), model_calls + 1)
+        self.assertEqual(PREDICTIONS.value(source='cache'), cache_hits + 1)
+        self.assertEqual(PREDICTION_SECONDS.count(stage='encode'), encodes + 2)
+
+    def test_errors_are_counted_and_logged(self):
+        data = dict(random_student_data(np.random.default_rng(41)), absences=88)
+        errors = PREDICTION_FALLBACKS.value(reason='error')
+        with mock.patch.object(self.predictor.model, 'predict_proba', side_effect=RuntimeError('boom')), \
+                self.assertLogs('students.prediction_service', 'ERROR') as logs:
+            self.assertEqual(self.predictor.predict_success_probability(data), 0.5)
+            np.testing.assert_array_equal(self.predictor.predict_many([data, data]), [0.5, 0.5])
+        self.assertEqual(PREDICTION_FALLBACKS.value(reason='error'), errors + 3)
+        self.assertEqual(logs.records[0].model_version, self.predictor.version)
+
+    def test_metrics_endpoint_reports_view_latency(self):
+        self.client.get(reverse('students:student_list'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'student_view_seconds_count{view="students:student_list",method="GET"}', response.content.decode()
+        )
+        with override_settings(STUDENT_METRICS_ENDPOINT=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_json_log_records(self):
+        record = logging.makeLogRecord({'name': 'students.metrics', 'levelname': 'WARNING', 'msg': 'request'})
+        record.duration_ms = 812.5
+        line = json.loads(JsonFormatter().format(record))
+        self.assertEqual((line['message'], line['duration_ms'], line['level']), ('request', 812.5, 'WARNING'))
+
+
+class RiskSnapshotTests(PredictorTestCase):
+    def setUp(self):
+        patcher = mock.patch('students.prediction_service.predictor', self.predictor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def snapshot(self):
+        return {
+            (cell.band, cell.study_time, cell.past_failures): (cell.count, round(cell.probability_sum, 9))
+            for cell in RiskSnapshot.objects.all()
+            if cell.count
+        }
+
+    def assertSnapshotMatchesRebuild(self):
+        incremental = self.snapshot()
+        RiskSnapshot.objects.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_deltas_track_saves_rescores_imports_and_deletes(self):
+        rng = np.random.default_rng(3)
+        students = [make_student(random_student_data(rng)) for _ in range(12)]
+        self.assertEqual(sum(count for count, _ in self.snapshot().values()), 12)
+        self.assertSnapshotMatchesRebuild()
+
+        edited = Student.objects.get(pk=students[0].pk)
+        edited.study_time = 5 - edited.study_time
+        edited.past_failures = 3
+        edited.save()
+        Student.objects.filter(pk=students[1].pk).update(success_probability=None)
+        RiskSnapshot.objects.rebuild()
+        Student.objects.filter(pk__in=[students[1].pk, students[2].pk]).rescore(predictor=self.predictor)
+        self.assertSnapshotMatchesRebuild()
+
+        import_students(io.StringIO(synthetic_dataset(9, seed=4).to_csv(sep=';', index=False)), predictor=self.predictor)
+        Student.objects.filter(pk__in=[students[3].pk, students[4].pk]).delete()
+        self.assertSnapshotMatchesRebuild()
+        self.assertEqual(sum(count for count, _ in self.snapshot().values()), 19)
+
+    def test_dashboard_reads_only_the_snapshot(self):
+        for _ in range(15):
+            make_student()
+        request = RequestFactory().get(reverse('students:risk_dashboard'))
+        # The snapshot and the recent alerts.
+        with self.assertNumQueries(2):
+            response = risk_dashboard(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'High risk')
+
+    def test_rebuild_command_repairs_the_snapshot(self):
+        for _ in range(5):
+            make_student()
+        expected = self.snapshot()
+        RiskSnapshot.objects.update(count=0, probability_sum=0.0)
+
+        out = io.StringIO()
+        call_command('rebuild_risk_snapshot', stdout=out)
+        self.assertIn('Rebuilt the risk snapshot', out.getvalue())
+        self.assertEqual(self.snapshot(), expected)
+
+
+class AsyncViewTests(PredictorTestCase):
+    def setUp(self):
+        self.serve()
+        self.students = self.make_students(6, seed=11, prefix='Async')
+        Student.objects.filter(pk=self.students[0].pk).update(success_probability=None)
+        self.factory = AsyncRequestFactory()
+
+    def test_async_views_match_the_sync_views(self):
+        student = self.students[0]
+        sync_json = json.loads(views.student_prediction(self.factory.get('/'), student.pk).content)
+        async_json = json.loads(async_to_sync(async_views.student_prediction)(self.factory.get('/'), student.pk).content)
+        self.assertEqual(async_json, sync_json)
+        self.assertEqual(async_json['success_probability'], self.predictor.predict_success_probability(
+            student.prediction_data()
+        ))
+        self.assertTrue(async_json['factors'])
+
+        detail = async_to_sync(async_views.student_detail)(self.factory.get('/'), student.pk)
+        self.assertContains(detail, 'Async 0')
+        listing = async_to_sync(async_views.student_list)(self.factory.get('/students/', {'sort': 'name'}))
+        self.assertEqual(listing.content, views.student_list(self.factory.get('/students/', {'sort': 'name'})).content)
+
+    def test_cache_and_messages_stay_off_the_event_loop(self):
+        calls = []
+
+        def record(name, func):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    calls.append((name, True))
+                else:
+                    calls.append((name, False))
+                return func(*args, **kwargs)
+            return call
+
+        cache = page_cache._cache()
+        proxy = mock.Mock(**{name: record(name, getattr(cache, name)) for name in ('get', 'set', 'get_or_set')})
+        student = self.students[2]
+        with mock.patch.object(page_cache, '_cache', return_value=proxy), \
+                mock.patch.object(page_cache, 'get_messages', record('get_messages', lambda request: [])):
+            for _ in range(2):
+                async_to_sync(async_views.student_list)(self.factory.get('/students/'))
+                async_to_sync(async_views.student_detail)(self.factory.get('/'), student.pk)
+
+        self.assertEqual({name for name, _ in calls}, {'get', 'set', 'get_or_set', 'get_messages'})
+        self.assertTrue(all(off_loop for _, off_loop in calls), calls)
+
+    def test_overloaded_pool_degrades_instead_of_blocking(self):
+        pool = InferencePool(max_workers=1, max_pending=1, timeout=0.05)
+        release = threading.Event()
+        self.addCleanup(pool.shutdown)
+        self.addCleanup(release.set)
+
+        async def scenario():
+            blocker = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(InferenceBusy):
+                await pool.run(int)
+            with self.assertRaises(InferenceTimeout):
+                await blocker
+            # The abandoned call still holds its slot until it finishes.
+            with self.assertRaises(InferenceBusy):
+                await pool.run(int)
+            release.set()
+            await asyncio.sleep(0.05)
+            self.assertEqual(await pool.run(int, '7'), 7)
+
+        async_to_sync(scenario)()
+
+        with mock.patch.object(async_views, 'inference_pool', mock.Mock(run=mock.AsyncMock(side_effect=InferenceBusy))):
+            response = async_to_sync(async_views.student_prediction)(self.factory.get('/'), self.students[1].pk)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+            detail = async_to_sync(async_views.student_detail)(self.factory.get('/'), self.students[1].pk)
+            self.assertEqual(detail.status_code, 200)
+
+
+class ApiTests(PredictorTestCase):
+    def setUp(self):
+        self.serve()
+        patcher = mock.patch('students.api.micro_batcher', MicroBatcher(predictor=self.predictor))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rng = np.random.default_rng(21)
+
+    def payload(self):
+        data = random_student_data(self.rng)
+        return {field: data[feature] for field, feature in PREDICTION_FEATURES.items()}, data
+
+    def post(self, name, body, **query):
+        url = reverse(f'api:{name}')
+        if query:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in query.items())
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+    def test_predict_scores_a_payload_without_writing(self):
+        payload, data = self.payload()
+        response = self.post('predict', payload, factors=3)
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['success_probability'], self.predictor.predict_success_probability(data))
+        self.assertEqual(body['model_version'], self.predictor.version)
+        self.assertEqual(len(body['factors']), 3)
+        self.assertFalse(Student.objects.exists())
+
+        request = AsyncRequestFactory().post('/', json.dumps(payload), content_type='application/json')
+        self.assertEqual(json.loads(async_to_sync(api.apredict)(request).content)['success_probability'],
+                         body['success_probability'])
+
+    def test_invalid_payloads_are_rejected(self):
+        payload, _ = self.payload()
+        payload['study_time'] = 9
+        self.assertEqual(self.post('predict', payload).json()['error'], 'study_time must be one of [1, 2, 3, 4], got 9')
+        del payload['absences']
+        self.assertEqual(self.post('predict', payload).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api:predict')).status_code, 405)
+
+        good, _ = self.payload()
+        response = self.post('predict_batch', {'students': [good, {**good, 'age': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {'1': 'age must be an integer'})
+
+    def test_predictions_without_a_model_answer_503(self):
+        from .prediction_service import predictor
+
+        payload, _ = self.payload()
+        broken = StudentPerformancePredictor(Path(self._model_dir.name) / 'missing.pkl')
+        with predictor.serving(broken), mock.patch('students.api.micro_batcher', MicroBatcher(predictor=predictor)):
+            responses = [self.post('predict', payload), self.post('predict_batch', {'students': [payload]})]
+            request = AsyncRequestFactory().post('/', json.dumps(payload), content_type='application/json')
+            responses.append(async_to_sync(api.apredict)(request))
+        self.assertEqual([response.status_code for response in responses], [503] * 3)
+
+        with mock.patch.object(self.predictor, '_score_raw', side_effect=RuntimeError), \
+                self.assertLogs('students.prediction_service', 'ERROR'):
+            response = self.post('predict_batch', {'students': [payload]})
+        self.assertEqual((response.status_code, response.json()['error']), (503, 'Prediction failed'))
+
+    def test_batch_matches_predict_many(self):
+        payloads, rows = zip(*(self.payload() for _ in range(7)))
+        response = self.post('predict_batch', {'students': list(payloads)})
+
+        self.assertEqual(response.status_code, 200)
+        np.testing.assert_array_equal(response.json()['success_probabilities'], self.predictor.predict_many(rows))
+
+    def test_scores_returns_stored_values_and_missing_ids(self):
+        first, second = make_student(), make_student()
+        Student.objects.filter(pk=first.pk).update(success_probability=0.25, model_version='v1')
+        response = self.client.get(reverse('api:scores'), {'ids': f'{first.pk},{second.pk + 100}'})
+
+        self.assertEqual(response.json(), {
+            'scores': {str(first.pk): {'success_probability': 0.25, 'model_version': 'v1'}},
+            'missing': [second.pk + 100],
+        })
+        self.assertEqual(self.client.get(reverse('api:scores'), {'ids': 'a'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api:scores'), {'ids': '99999999999999999999'}).status_code, 400)
+
+    def test_micro_batcher_coalesces_concurrent_requests(self):
+        batcher = MicroBatcher(max_batch=64, max_delay=0.05, predictor=self.predictor)
+        rows = [random_student_data(self.rng) for _ in range(20)]
+        with mock.patch.object(self.predictor, 'predict_many', wraps=self.predictor.predict_many) as predict_many:
+            futures = [batcher.submit(row) for row in rows]
+            results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(predict_many.call_count, 1)
+        self.assertEqual([probability for probability, _ in results], list(self.predictor.predict_many(rows)))
+        self.assertEqual({version for _, version in results}, {self.predictor.version})
+
+
+class PageCacheTests(PredictorTestCase):
+    def setUp(self):
+        self.serve()
+        self.students = self.make_students(3, seed=12, prefix='Cached')
+        self.url = reverse('students:student_detail', args=[self.students[0].pk])
+
+    def test_detail_answers_304_until_the_student_or_the_model_changes(self):
+        from .prediction_service import predictor
+
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        modified = self.client.get(self.url, headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(modified.status_code, 304)
+
+        student = Student.objects.get(pk=self.students[0].pk)
+        student.absences += 1
+        student.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        swapped = StudentPerformancePredictor(self.model_path)
+        swapped.version = 'swapped'
+        with predictor.serving(swapped):
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cached_detail_is_served_until_invalidated(self):
+        with mock.patch.object(views, 'score_and_explain', wraps=views.score_and_explain) as scored:
+            first = self.client.get(self.url)
+            self.assertEqual(self.client.get(self.url).content, first.content)
+            self.assertEqual(scored.call_count, 1)
+
+            Student.objects.filter(pk=self.students[0].pk).rescore(predictor=self.predictor)
+            self.client.get(self.url)
+            self.assertEqual(scored.call_count, 2)
+
+    def test_list_pages_follow_saves_and_deletes(self):
+        url = reverse('students:student_list')
+        self.assertContains(self.client.get(url), 'Cached 2')
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        newcomer = make_student(name='Newcomer', gpa=3.9)
+        self.assertContains(self.client.get(url), 'Newcomer')
+        newcomer.delete()
+        self.assertNotContains(self.client.get(url), 'Newcomer')
+
+    def test_degraded_async_detail_is_not_cached(self):
+        factory = AsyncRequestFactory()
+        student = self.students[1]
+        with mock.patch.object(async_views, 'inference_pool', mock.Mock(run=mock.AsyncMock(side_effect=InferenceBusy))):
+            degraded = async_to_sync(async_views.student_detail)(factory.get('/'), student.pk)
+        self.assertFalse(degraded.has_header('ETag'))
+
+        complete = async_to_sync(async_views.student_detail)(factory.get('/'), student.pk)
+        self.assertEqual(complete.content, views.student_detail(RequestFactory().get('/'), student.pk).content)
+        not_modified = async_to_sync(async_views.student_detail)(
+            factory.get('/', headers={'If-None-Match': complete['ETag']}), student.pk
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+
+class PredictionHistoryTests(PredictorTestCase):
+    def setUp(self):
+        self.serve()
+        self.students = self.make_students(3, seed=13, prefix='History')
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+
+    def test_saves_and_rescores_append_entries(self):
+        first = self.students[0]
+        self.assertEqual(PredictionHistory.objects.filter(student=first).count(), 1)
+
+        Student.objects.filter(pk__in=[student.pk for student in self.students]).update(model_version='old')
+        Student.objects.stale(version=self.predictor.version).rescore(predictor=self.predictor)
+        self.assertEqual(PredictionHistory.objects.count(), 6)
+
+        latest = PredictionHistory.objects.latest_per_student()
+        self.assertEqual(sorted(entry.student_id for entry in latest), sorted(s.pk for s in self.students))
+        self.assertEqual(
+            [entry.success_probability for entry in PredictionHistory.objects.trend(first)],
+            [Student.objects.get(pk=first.pk).success_probability] * 2,
+        )
+
+    def test_compaction_archives_old_rows_and_keeps_the_trend(self):
+        first = self.students[0]
+        now = timezone.now()
+        PredictionHistory.objects.filter(student=first).update(recorded_at=now - timedelta(days=200))
+        PredictionHistory.objects.create(
+            student=first, model_version='v0', success_probability=0.25, recorded_at=now - timedelta(days=400)
+        )
+        before = history.trend(first.pk)
+
+        moved, written = history.compact(now - timedelta(days=90), directory=self.archive_dir.name)
+        self.assertEqual((moved, written), (2, 2))
+        self.assertEqual(PredictionHistory.objects.filter(student=first).count(), 0)
+        self.assertEqual(history.compact(now - timedelta(days=90), directory=self.archive_dir.name), (0, 0))
+
+        after = history.trend(first.pk, directory=self.archive_dir.name)
+        self.assertEqual([(moment, version) for moment, _, version in after], [(m, v) for m, _, v in before])
+        np.testing.assert_allclose([p for _, p, _ in after], [p for _, p, _ in before], rtol=1e-6)
+        self.assertEqual(len(history.trend(first.pk, since=now - timedelta(days=300), directory=self.archive_dir.name)), 1)
+
+        removed = history.prune(365, now=now, directory=self.archive_dir.name)
+        self.assertEqual(len(removed), 1)
+        self.assertEqual(len(history.trend(first.pk, directory=self.archive_dir.name)), 1)
+
+    def test_history_endpoint(self):
+        response = self.client.get(reverse('api:prediction_history', args=[self.students[1].pk]), {'days': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['history']), 1)
+        self.assertEqual(self.client.get(reverse('api:prediction_history', args=[0])).status_code, 404)
+
+
+@override_settings(STUDENT_ALERT_WATERMARK_LAG=0)
+class EarlyWarningTests(PredictorTestCase):
+    def setUp(self):
+        self.serve()
+        self.students = self.make_students(3, seed=14, prefix='Warning')
+        for student, probability in zip(self.students, (0.8, 0.6, 0.5)):
+            self.set_probability(student, probability)
+
+    def set_probability(self, student, probability, **inputs):
+        Student.objects.filter(pk=student.pk).update(
+            success_probability=probability, updated_at=timezone.now(), **inputs
+        )
+
+    def test_changes_since_the_last_scan_raise_alerts_once(self):
+        first = early_warning.run()
+        self.assertEqual((first.scanned, first.flagged), (3, 0))
+
+        entered, dropped, steady = self.students
+        self.set_probability(entered, 0.3, absences=entered.absences + 6)
+        self.set_probability(dropped, 0.42)
+        self.set_probability(steady, 0.45)
+        second = early_warning.run()
+        self.assertEqual((second.scanned, second.flagged), (3, 2))
+
+        alerts = {alert.student_id: alert for alert in RiskAlert.objects.all()}
+        self.assertEqual(set(alerts), {entered.pk, dropped.pk})
+        self.assertEqual(alerts[entered.pk].kind, 'high_risk')
+        self.assertEqual(alerts[entered.pk].changed_inputs, 'absences +6')
+        self.assertEqual(alerts[dropped.pk].kind, 'drop')
+        self.assertAlmostEqual(alerts[dropped.pk].change, -0.18)
+
+        self.assertEqual(early_warning.run().scanned, 0)
+        self.assertEqual(early_warning.run(full=True).flagged, 0)
+
+    def test_command_uses_the_thresholds_given(self):
+        early_warning.run()
+        self.set_probability(self.students[1], 0.55)
+        out = io.StringIO()
+        call_command('early_warning', '--drop', '0.05', stdout=out)
+        self.assertIn('Scanned 1 students, raised 1 alerts', out.getvalue())
+
+    @override_settings(STUDENT_ALERT_WATERMARK_LAG=60)
+    def test_writes_committed_after_a_scan_are_caught_by_the_next(self):
+        first = early_warning.run()
+        # A rescore that stamped its rows before the scan but committed after it.
+        Student.objects.filter(pk=self.students[0].pk).update(
+            success_probability=0.3, updated_at=first.started_at - timedelta(seconds=5)
+        )
+        second = early_warning.run()
+        self.assertEqual((second.scanned, second.flagged), (3, 1))
+        self.assertEqual(early_warning.run().flagged, 0)
+        self.assertEqual(RiskAlert.objects.get().student_id, self.students[0].pk)
+
+
+class FeatureVectorTests(PredictorTestCase):
+    def test_save_keeps_the_packed_vector_in_sync(self):
+        student = make_student(random_student_data(np.random.default_rng(15)))
+        self.assertEqual(feature_vectors.unpack([student.packed_features])[0].tolist(),
+                         [getattr(student, field) for field in feature_vectors.FIELDS])
+
+        student.absences += 4
+        student.save(update_fields=['absences'])
+        stored = Student.objects.values_list('packed_features', flat=True).get(pk=student.pk)
+        self.assertEqual(feature_vectors.unpack([stored])[0][-1], student.absences)
+
+    def test_rescore_after_update_scores_the_new_inputs(self):
+        students = self.make_students(4, seed=23)
+        Student.objects.filter(pk__in=[s.pk for s in students[:2]]).update(absences=F('absences') + 40)
+        Student.objects.filter(pk=students[2].pk).update(name='Renamed')
+        self.assertEqual(Student.objects.filter(packed_features__isnull=True).count(), 2)
+
+        Student.objects.all().rescore(predictor=self.predictor)
+        fresh = list(Student.objects.order_by('pk'))
+        self.assertEqual(
+            [student.success_probability for student in fresh], self.predictor.predict_many(fresh).tolist()
+        )
+
+    def test_rows_without_a_vector_are_read_from_the_columns(self):
+        rng = np.random.default_rng(16)
+        students = [make_student(random_student_data(rng)) for _ in range(5)]
+        Student.objects.filter(pk__in=[students[1].pk, students[3].pk]).update(packed_features=None)
+
+        pks, matrix, extra = next(feature_vectors.read_chunks(Student.objects.all(), extra=('gpa',)))
+        self.assertEqual(pks.tolist(), [student.pk for student in students])
+        self.assertEqual(matrix.tolist(), [
+            [getattr(student, field) for field in feature_vectors.FIELDS] for student in students
+        ])
+        self.assertEqual(extra, [(3.0,)] * 5)
+
+        self.assertEqual(feature_vectors.backfill(), 5)
+        self.assertFalse(Student.objects.filter(packed_features__isnull=True).exists())
+
+    def test_inputs_outside_int16_are_rejected_or_read_from_the_columns(self):
+        data = random_student_data(np.random.default_rng(21))
+        fields = {field: data[feature] for field, feature in PREDICTION_FEATURES.items()}
+        form = StudentForm({**fields, 'name': 'Big', 'gpa': 3.0, 'absences': 40000})
+        self.assertEqual(list(form.errors), ['absences'])
+
+        lines = synthetic_dataset(2, seed=7).to_csv(sep=';', index=False).splitlines()
+        header = lines[0].split(';')
+        row = lines[1].split(';')
+        row[header.index('age')] = '99999'
+        lines[1] = ';'.join(row)
+        result = import_students(io.StringIO('\n'.join(lines)), predictor=self.predictor)
+        self.assertEqual(result.errors, [(2, 'age out of range: 99999')])
+
+        # Rows saved before the bounds existed keep a NULL vector.
+        student = make_student(data, age=99999)
+        self.assertIsNone(student.packed_features)
+        _, matrix, _ = next(feature_vectors.read_chunks(Student.objects.filter(pk=student.pk)))
+        self.assertEqual(matrix[0, 0], 99999)
+        self.assertEqual(self.predictor.predict_matrix(matrix, feature_vectors.COLUMNS).shape, (1,))
+        Student.objects.filter(pk=student.pk).update(success_probability=0.5)
+        self.assertEqual(early_warning.run().scanned, 2)
+
+    def test_predict_matrix_matches_predict_many(self):
+        rng = np.random.default_rng(17)
+        students = [make_student(random_student_data(rng)) for _ in range(30)]
+        _, matrix, _ = next(feature_vectors.read_chunks(Student.objects.all()))
+
+        np.testing.assert_array_equal(
+            self.predictor.predict_matrix(matrix, feature_vectors.COLUMNS), self.predictor.predict_many(students)
+        )
+        # Inputs left out score as if missing from the dict.
+        partial = [dict(student.prediction_data(), Medu=None) for student in students]
+        without = [column for column in feature_vectors.COLUMNS if column != 'Medu']
+        np.testing.assert_array_equal(
+            self.predictor.predict_matrix(np.delete(matrix, 1, axis=1), without),
+            self.predictor.predict_many([{k: v for k, v in row.items() if v is not None} for row in partial]),
+        )
+
+    def test_export_round_trips_and_trains_like_the_table(self):
+        rng = np.random.default_rng(18)
+        for i in range(12):
+            make_student(random_student_data(rng), gpa=1.5 + i % 2)
+        with tempfile.TemporaryDirectory() as directory:
+            out = io.StringIO()
+            call_command('export_features', '--output', directory, '--chunk-size', '5', stdout=out)
+            self.assertIn('Exported 12 students', out.getvalue())
+
+            ids, features, gpa = feature_vectors.load_matrix(directory)
+            self.assertIsInstance(features, np.memmap)
+            self.assertEqual(ids.tolist(), list(Student.objects.order_by('pk').values_list('pk', flat=True)))
+            raw, y = read_export(directory)
+            expected_raw, expected_y = read_students(Student.objects.all(), chunksize=5)
+            np.testing.assert_array_equal(raw, expected_raw)
+            np.testing.assert_array_equal(y, expected_y)
+            self.assertEqual(y.sum(), 6)
+            del ids, features, gpa, raw
+
+
+class FeatureSchemaTests(PredictorTestCase):
+    def test_schema_matches_the_student_model_and_training(self):
+        for field, feature in PREDICTION_FEATURES.items():
+            self.assertIsNotNone(Student._meta.get_field(field), field)
+        self.assertEqual(FEATURES, list(PREDICTION_FEATURES.values()))
+        self.assertEqual(CATEGORICAL, [f for f in FEATURES if f not in ('age', 'failures', 'absences')])
+        self.assertEqual(joblib.load(self.model_path)['feature_schema'], feature_schema.SCHEMA_HASH)
+
+    def test_batch_encoders_match_the_dict_path(self):
+        rng = np.random.default_rng(19)
+        students = [make_student(random_student_data(rng)) for _ in range(7)]
+        encoder = self.predictor.encoder
+        expected = encoder.raw_matrix([student.prediction_data() for student in students])
+
+        values = [[getattr(student, field) for field in PREDICTION_FEATURES] for student in students]
+        np.testing.assert_array_equal(encoder.raw_from_values(values), expected)
+        chunks = list(encoder.iter_raw(Student.objects.order_by('pk'), chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        np.testing.assert_array_equal(np.concatenate(chunks), expected)
+
+    def test_import_and_api_bounds_come_from_the_schema(self):
+        self.assertEqual({column: bounds for _, column, _, bounds in feature_validators()}, feature_schema.RANGES)
+        data = random_student_data(np.random.default_rng(20))
+        payload = {field: data[feature] for field, feature in PREDICTION_FEATURES.items()}
+        with self.assertRaisesMessage(ValueError, 'age out of range: 23'):
+            api.parse_features({**payload, 'age': 23}, feature_validators())
+
+    def test_artifacts_from_another_schema_are_refused_at_load(self):
+        model_data = joblib.load(self.model_path)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'model.pkl'
+            cases = [
+                dict(model_data, feature_schema='0' * 16),
+                dict(model_data, feature_names=[*model_data['feature_names'], 'sex_M']),
+            ]
+            for artifact in cases:
+                if 'sex_M' in artifact['feature_names']:
+                    del artifact['feature_schema']
+                joblib.dump(artifact, path)
+                with self.assertLogs('students.prediction_service', 'ERROR'):
+                    predictor = StudentPerformancePredictor(path)
+                self.assertIsNone(predictor.model)
+
+            # Older artifacts without a hash still load when their features fit.
+            joblib.dump({key: value for key, value in model_data.items() if key != 'feature_schema'}, path)
+            self.assertIsNotNone(StudentPerformancePredictor(path).model)
+
+    def test_registry_will_not_activate_another_schema(self):
+        registry = ModelRegistry(self._model_dir.name + '/registry')
+        version = registry.publish(dict(joblib.load(self.model_path), feature_schema='0' * 16), activate=False)
+        with self.assertRaises(ValueError):
+            registry.activate(version)
+        self.assertIsNone(registry.active_version())
+
+
+class FlatForestTests(PredictorTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.flat_path = Path(cls._model_dir.name) / 'flat.pkl'
+        model_data = joblib.load(cls.model_path)
+        joblib.dump(dict(model_data, model=FlatForest.from_estimator(model_data['model'])), cls.flat_path)
+
+    def test_matches_predict_proba(self):
+        rng = np.random.default_rng(20)
+        students = [random_student_data(rng) for _ in range(300)]
+        # Unseen codes and values between and beyond the training range.
+        students += [dict(students[0], Medu=9), dict(students[1], age=16.5, absences=200)]
+        X = self.predictor.encoder.encode_many(students)
+        flat = FlatForest.from_estimator(self.predictor.model)
+
+        expected = self.predictor._model_proba(X)[:, 1]
+        np.testing.assert_array_equal(flat.predict_proba(X)[:, 1], expected)
+        np.testing.assert_array_equal(flat.feature_importances_, self.predictor.model.feature_importances_)
+        with mock.patch('students.flat_forest.BLOCK_ROWS', 7):
+            np.testing.assert_array_equal(flat.predict_positive(X), expected)
+
+    def test_predictor_serves_the_flat_artifact(self):
+        flat = StudentPerformancePredictor(self.flat_path)
+        self.assertIsInstance(flat.model, FlatForest)
+        rng = np.random.default_rng(21)
+        students = [random_student_data(rng) for _ in range(40)]
+
+        np.testing.assert_array_equal(flat.predict_many(students), self.predictor.predict_many(students))
+        data = students[0]
+        self.assertEqual(flat.predict_success_probability(data), self.predictor.predict_success_probability(data))
+        for method in ('importance', 'contributions'):
+            self.assertEqual(flat.explain(data, method=method), self.predictor.explain(data, method=method))
+
+    def test_loading_does_not_import_sklearn(self):
+        script = 'import sys, joblib; joblib.load(sys.argv[1]); print("sklearn" in sys.modules)'
+        loaded = subprocess.run(
+            [sys.executable, '-c', script, str(self.flat_path)],
+            cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(loaded.stdout.strip(), 'False')
+
+    def test_retrain_publishes_a_flat_model_with_a_table(self):
+        rng = np.random.default_rng(22)
+        for i in range(60):
+            make_student(random_student_data(rng), gpa=(i % 5) * 0.8)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(tmp)
+            with mock.patch('students.management.commands.retrain_model.ModelRegistry', return_value=registry):
+                call_command('retrain_model', from_db=True, flat=True, compile_table=True, stdout=io.StringIO())
+            served = StudentPerformancePredictor(registry=registry)
+            self.assertIsInstance(served.model, FlatForest)
+            self.assertIsNotNone(served.table)
+            students = [random_student_data(rng) for _ in range(20)]
+            X = served.encoder.encode_many(students)
+            np.testing.assert_array_equal(served.predict_many(students), served.model.predict_positive(X))
+
+
+class BenchmarkSuiteTests(PredictorTestCase):
+    def test_suite_reports_every_benchmark_and_restores_the_predictor(self):
+        from .prediction_service import predictor
+
+        before = predictor._instance
+        report = run_suite(self.model_path, sizes=[20, 40], iterations=5, web_iterations=2)
+
+        self.assertIs(predictor._instance, before)
+        self.assertEqual(Student.objects.count(), 40)
+        results = report['results']
+        for name in (
+            'model.load.p50_ms', 'predict.single.p50_us', 'predict.batch_1000.per_row_us',
+            'explain.importance.p50_us', 'explain.contributions.p50_us', 'student_list.40.p50_ms',
+            'student_detail.20.p50_ms', 'save_with_signal.40.p50_us', 'score.40.packed_ms',
+            'read.20.memmap_ms', 'predict.flat.single.p50_us', 'model.flat.cold_load_ms', 'process.peak_rss_mb',
+        ):
+            self.assertGreater(results[name], 0, name)
+        self.assertEqual(report['config']['sizes'], [20, 40])
+        json.dumps(report)
+
+    def test_compare_flags_results_above_tolerance(self):
+        rows = compare({'a_us': 130.0, 'b_us': 110.0, 'c_us': 5.0}, {'a_us': 100.0, 'b_us': 100.0})
+
+        self.assertEqual([row[0] for row in regressions(rows, tolerance=0.25)], ['a_us'])
+        self.assertEqual([row[0] for row in regressions(rows, tolerance=0.05)], ['a_us', 'b_us'])
+        self.assertIsNone(rows[2][3])
+
+    def test_peak_rss_is_reported_in_mib_on_every_platform(self):
+        usage = mock.Mock(ru_maxrss=512 * 2**20)
+        with mock.patch('resource.getrusage', return_value=usage):
+            with mock.patch.object(sys, 'platform', 'darwin'):
+                self.assertEqual(peak_rss_mb(), 512)
+            with mock.patch.object(sys, 'platform', 'linux'):
+                self.assertEqual(peak_rss_mb(), 512 * 1024)
+        with mock.patch.dict(sys.modules, {'resource': None}):
+            self.assertIsNone(peak_rss_mb())
+
+
+@override_settings(STUDENT_PREDICTION_MODE='deferred')
+class DeferredPredictionTests(PredictorTestCase):
+    def setUp(self):
+        self.queue = PredictionQueue(batch_size=10, predictor=self.predictor, background=False)
+        patcher = mock.patch('students.signals.prediction_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_enqueues_instead_of_predicting(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            student = make_student()
+        student.refresh_from_db()
+        self.assertIsNone(student.success_probability)
+        self.assertEqual(len(self.queue), 1)
+
+    def test_repeated_edits_coalesce_into_one_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            student = make_student()
+            for absences in (1, 2, 3):
+                student.absences = absences
+                student.save()
+        self.assertEqual(len(self.queue), 1)
+
+    def test_edit_clears_the_stale_score_until_the_queue_runs(self):
+        self.serve()
+        with self.captureOnCommitCallbacks(execute=True):
+            student = make_student()
+        self.queue.drain()
+        student.refresh_from_db()
+        self.assertIsNotNone(student.success_probability)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            student.absences += 5
+            student.save(update_fields=['absences'])
+        student.refresh_from_db()
+        self.assertEqual((student.success_probability, student.model_version), (None, ''))
+        probability, _ = views.score_and_explain(student)
+        self.assertEqual(probability, self.predictor.predict_success_probability(student.prediction_data()))
+
+        self.queue.drain()
+        student.refresh_from_db()
+        self.assertEqual(student.success_probability, probability)
+
+    def test_drain_scores_in_batches(self):
+        rng = np.random.default_rng(6)
+        with self.captureOnCommitCallbacks(execute=True):
+            students = [make_student(random_student_data(rng)) for _ in range(25)]
+
+        self.assertEqual(self.queue.drain(), 25)
+        self.assertEqual(len(self.queue), 0)
+        for student in students:
+            student.refresh_from_db()
+            self.assertEqual(
+                student.success_probability,
+                self.predictor.predict_success_probability(student.prediction_data()),
+            )
+
+    def test_failed_batch_is_requeued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student()
+        with mock.patch.object(self.predictor, 'predict_matrix', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.queue.drain()
+        self.assertEqual(len(self.queue), 1)
+
+
+class PredictionCacheTests(PredictorTestCase):
+    def test_repeated_feature_rows_hit_the_cache(self):
+        predictor = StudentPerformancePredictor(self.model_path, cache=PredictionCache(max_size=16))
+        data = random_student_data(np.random.default_rng(7))
+
+        first = predictor.predict_success_probability(data)
+        with mock.patch.object(predictor.model, 'predict_proba', side_effect=AssertionError):
+            self.assertEqual(predictor.predict_success_probability(dict(data)), first)
+            self.assertEqual(predictor.predict_many([data])[0], first)
+
+        stats = predictor.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_batch_only_scores_misses(self):
+        predictor = StudentPerformancePredictor(self.model_path, cache=PredictionCache(max_size=64))
+        rng = np.random.default_rng(8)
+        students = [random_student_data(rng) for _ in range(10)]
+        predictor.predict_many(students[:4])
+
+        with mock.patch.object(predictor.model, 'predict_proba', wraps=predictor.model.predict_proba) as proba:
+            result = predictor.predict_many(students)
+        self.assertEqual(len(proba.call_args.args[0]), 6)
+        np.testing.assert_array_equal(result, self.predictor.predict_many(students))
+
+    def test_lru_evicts_oldest_entry(self):
+        before = {event: PREDICTION_CACHE_EVENTS.value(event=event) for event in ('hit', 'miss', 'eviction')}
+        cache = PredictionCache(max_size=2)
+        cache.set('m', b'a', 0.1)
+        cache.set('m', b'b', 0.2)
+        cache.get('m', b'a')
+        cache.set('m', b'c', 0.3)
+
+        self.assertIsNone(cache.get('m', b'b'))
+        self.assertEqual(cache.get('m', b'a'), 0.1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        # The same counts are exported on /metrics.
+        self.assertEqual(
+            {event: PREDICTION_CACHE_EVENTS.value(event=event) - count for event, count in before.items()},
+            {'hit': 2, 'miss': 1, 'eviction': 1},
+        )
+
+    def test_loading_a_model_invalidates_entries(self):
+        cache = PredictionCache(max_size=16)
+        predictor = StudentPerformancePredictor(self.model_path, cache=cache)
+        predictor.predict_success_probability(random_student_data(np.random.default_rng(9)))
+        self.assertEqual(cache.stats()['size'], 1)
+
+        other_path = train_synthetic_model(Path(self._model_dir.name) / 'other.pkl', n_estimators=5, seed=1)
+        other = StudentPerformancePredictor(other_path, cache=cache)
+        self.assertEqual(cache.stats()['size'], 0)
+        self.assertNotEqual(other.fingerprint, predictor.fingerprint)
+
+    @override_settings(CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_shared_backend_serves_other_processes(self):
+        data = random_student_data(np.random.default_rng(10))
+        writer = StudentPerformancePredictor(self.model_path, cache=PredictionCache(backend_alias='shared'))
+        reader = StudentPerformancePredictor(self.model_path, cache=PredictionCache(backend_alias='shared'))
+
+        expected = writer.predict_success_probability(data)
+        self.assertEqual(reader.predict_success_probability(data), expected)
+        self.assertEqual(reader.cache.stats()['shared_hits'], 1)
+
+        self.assertEqual(StudentPerformancePredictor(self.model_path).cache.timeout, 3600)
+        with mock.patch.object(caches['shared'], 'set_many') as set_many:
+            PredictionCache(backend_alias='shared', timeout=60).set('m', b'a', 0.1)
+        self.assertEqual(set_many.call_args.kwargs['timeout'], 60)
+
+
+class LookupTableTests(PredictorTestCase):
+    def test_observed_cells_are_served_from_the_table(self):
+        rng = np.random.default_rng(11)
+        seen = [random_student_data(rng) for _ in range(200)]
+        table = LookupTable.build(self.predictor, observed=[self.predictor.encoder.raw_matrix(seen)], max_cells=0)
+        self.assertFalse(table.dense)
+        table.save(table_path(self.model_path))
+        self.addCleanup(table_path(self.model_path).unlink)
+
+        predictor = StudentPerformancePredictor(self.model_path, cache=PredictionCache(max_size=0))
+        self.assertIsNotNone(predictor.table)
+        expected = self.predictor._model_proba(self.predictor.encoder.encode_many(seen))[:, 1]
+        with mock.patch.object(predictor.model, 'predict_proba', side_effect=AssertionError):
+            np.testing.assert_array_equal(predictor.predict_many(seen), expected)
+            self.assertEqual(predictor.predict_success_probability(seen[0]), expected[0])
+
+        unseen = [random_student_data(rng) for _ in range(50)]
+        np.testing.assert_array_equal(predictor.predict_many(unseen), self.predictor.predict_many(unseen))
+
+    def test_dense_table_matches_model_everywhere(self):
+        df = synthetic_dataset(300, seed=3)
+        X = df[['failures', 'studytime', 'absences']].astype({'studytime': str})
+        X = pd.get_dummies(X, columns=['studytime'])
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, df['G3'] >= 10)
+        path = Path(self._model_dir.name) / 'small.pkl'
+        joblib.dump({'model': model, 'feature_names': X.columns.tolist(), 'categorical_columns': ['studytime']}, path)
+
+        predictor = StudentPerformancePredictor(path, cache=PredictionCache(max_size=0))
+        table = LookupTable.build(predictor)
+        self.assertTrue(table.dense)
+
+        rng = np.random.default_rng(12)
+        students = [random_student_data(rng) for _ in range(300)] + [{'failures': 1, 'studytime': 7, 'absences': 200}]
+        raw = predictor.encoder.raw_matrix(students)
+        np.testing.assert_array_equal(table.lookup(raw), predictor.predict_many(students))
+
+    def test_table_for_another_model_is_ignored(self):
+        other_path = train_synthetic_model(Path(self._model_dir.name) / 'stale.pkl', n_estimators=5, seed=2)
+        other = StudentPerformancePredictor(other_path)
+        LookupTable.build(other, max_cells=0).save(table_path(self.model_path))
+        self.addCleanup(table_path(self.model_path).unlink)
+
+        self.assertIsNone(StudentPerformancePredictor(self.model_path).table)
+
+
+class LazyLoadingTests(PredictorTestCase):
+    def test_model_is_not_loaded_until_first_use(self):
+        lazy = LazyPredictor(model_path=self.model_path)
+        self.assertFalse(lazy.loaded)
+
+        data = random_student_data(np.random.default_rng(13))
+        self.assertEqual(lazy.predict_success_probability(data), self.predictor.predict_success_probability(data))
+        self.assertTrue(lazy.loaded)
+
+    def test_concurrent_first_use_loads_once(self):
+        lazy = LazyPredictor(model_path=self.model_path)
+        with mock.patch('students.prediction_service.StudentPerformancePredictor',
+                        wraps=StudentPerformancePredictor) as factory:
+            threads = [threading.Thread(target=lazy.load) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(factory.call_count, 1)
+
+    def test_mmap_mode_maps_table_arrays(self):
+        LookupTable.build(self.predictor, max_cells=0).save(table_path(self.model_path))
+        self.addCleanup(table_path(self.model_path).unlink)
+
+        predictor = StudentPerformancePredictor(self.model_path, mmap_mode='r')
+        self.assertIsInstance(predictor.table.probabilities, np.memmap)
+        data = random_student_data(np.random.default_rng(14))
+        self.assertEqual(predictor.predict_success_probability(data), self.predictor.predict_success_probability(data))
+
+
+class ModelRegistryTests(PredictorTestCase):
+    def setUp(self):
+        self._root = tempfile.TemporaryDirectory()
+        self.addCleanup(self._root.cleanup)
+        self.registry = ModelRegistry(self._root.name)
+
+    def publish(self, seed):
+        return self.registry.publish(joblib.load(
+            train_synthetic_model(Path(self._root.name) / f'src-{seed}.pkl', n_estimators=5, seed=seed)
+        ), metrics={'test_accuracy': 0.5})
+
+    def test_publish_writes_metadata_and_activates(self):
+        version = self.publish(seed=1)
+        self.assertEqual(self.registry.active_version(), version)
+        meta = self.registry.metadata(version)
+        self.assertEqual(meta['content_hash'][:8], version.rsplit('-', 1)[1])
+        self.assertIn('Medu_4', meta['feature_names'])
+        self.assertEqual(meta['metrics'], {'test_accuracy': 0.5})
+
+        predictor = StudentPerformancePredictor(registry=self.registry)
+        self.assertEqual(predictor.version, version)
+
+    def test_failed_publish_leaves_no_partial_version(self):
+        with self.assertRaises(RuntimeError):
+            self.registry.publish({'model': None}, prepare=mock.Mock(side_effect=RuntimeError))
+        self.assertEqual(list(self.registry.versions_dir.iterdir()), [])
+        self.assertIsNone(self.registry.active_version())
+
+    def test_new_active_version_is_swapped_in(self):
+        first = self.publish(seed=1)
+        lazy = LazyPredictor(registry=self.registry, reload_interval=0)
+        in_flight = lazy.load()
+        self.assertEqual(in_flight.version, first)
+        self.assertFalse(lazy.check_for_update(background=False))
+
+        second = self.publish(seed=2)
+        self.assertTrue(lazy.check_for_update(background=False))
+        self.assertEqual(lazy.load().version, second)
+        # Whoever held the old predictor keeps a working model.
+        self.assertEqual(in_flight.version, first)
+        self.assertIsNotNone(in_flight.model)
+
+    def test_version_that_fails_to_load_is_not_retried(self):
+        first = self.publish(seed=1)
+        lazy = LazyPredictor(registry=self.registry, reload_interval=0)
+        lazy.load()
+        self.publish(seed=2)
+        with mock.patch.object(lazy, '_build', side_effect=RuntimeError) as build, \
+                self.assertLogs('students.prediction_service', 'ERROR'):
+            self.assertTrue(lazy.check_for_update(background=False))
+            self.assertFalse(lazy.check_for_update(background=False))
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(lazy.load().version, first)
+
+        third = self.publish(seed=3)
+        self.assertTrue(lazy.check_for_update(background=False))
+        self.assertEqual(lazy.load().version, third)
+
+    def test_rescore_stale_only_touches_old_versions(self):
+        old = make_student()
+        current = make_student()
+        Student.objects.filter(pk=old.pk).update(model_version='old')
+        Student.objects.filter(pk=current.pk).update(model_version=self.predictor.version)
+
+        self.assertEqual(Student.objects.stale(version=self.predictor.version).rescore(predictor=self.predictor), 1)
+        old.refresh_from_db()
+        self.assertEqual(old.model_version, self.predictor.version)
+
+    def test_rescore_never_stores_the_fallback(self):
+        self.make_students(3, seed=24)
+        Student.objects.update(success_probability=0.9, model_version='old')
+        history = PredictionHistory.objects.count()
+
+        broken = StudentPerformancePredictor(Path(self._model_dir.name) / 'missing.pkl')
+        with self.assertRaises(PredictionUnavailable):
+            Student.objects.all().rescore(predictor=broken)
+        with mock.patch.object(self.predictor, '_score_raw', side_effect=RuntimeError), \
+                self.assertLogs('students.prediction_service', 'ERROR'), self.assertRaises(PredictionUnavailable):
+            Student.objects.all().rescore(predictor=self.predictor)
+
+        self.assertEqual(set(Student.objects.values_list('success_probability', 'model_version')), {(0.9, 'old')})
+        self.assertEqual(PredictionHistory.objects.count(), history)
+
+
+class TrainingDataTests(TestCase):
+    def test_encode_matches_get_dummies(self):
+        df = synthetic_dataset(300, seed=11)
+        df.loc[0, 'absences'] = 300  # too big for uint8
+        expected = pd.get_dummies(df[FEATURES].astype({col: str for col in CATEGORICAL}), columns=CATEGORICAL)
+
+        X, names = encode(df[FEATURES].to_numpy(dtype=np.int16))
+        self.assertEqual(names, list(expected.columns))
+        self.assertEqual(X.dtype, np.uint16)
+        np.testing.assert_array_equal(X, expected.to_numpy(dtype=float))
+        self.assertEqual(encode(df[FEATURES].to_numpy(dtype=np.int16)[1:])[0].dtype, np.uint8)
+
+    def test_read_csv_in_chunks(self):
+        df = synthetic_dataset(50, seed=12)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'students.csv'
+            df.to_csv(path, sep=';', index=False)
+            raw, y = read_csv(path, chunksize=7)
+        np.testing.assert_array_equal(raw, df[FEATURES].to_numpy())
+        np.testing.assert_array_equal(y, df['G3'] >= 10)
+
+    def test_retrain_from_student_table(self):
+        rng = np.random.default_rng(13)
+        for i in range(60):
+            make_student(random_student_data(rng), gpa=(i % 5) * 0.8)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(tmp)
+            with mock.patch('students.management.commands.retrain_model.ModelRegistry', return_value=registry):
+                call_command('retrain_model', from_db=True, n_jobs=2, read_chunk_size=16, stdout=io.StringIO())
+            metrics = registry.metadata(registry.active_version())['metrics']
+            model = joblib.load(registry.active_model_path())['model']
+
+        self.assertEqual(metrics['n_rows'], 60)
+        self.assertIn('peak_rss_mb', metrics)
+        self.assertIsNone(model.n_jobs)
+
+
+class ModelSearchTests(TestCase):
+    SPACE = {'forest': {'n_estimators': [5, 10], 'max_depth': [4]}, 'hist_gb': {'max_iter': [10], 'max_depth': [3]}}
+
+    def test_select_on_frontier(self):
+        results = [
+            CandidateResult('forest', {'n': 100}, 0.850, 0, single_us=9000),
+            CandidateResult('forest', {'n': 25}, 0.845, 0, single_us=2000),
+            CandidateResult('hist_gb', {'n': 50}, 0.846, 0, single_us=700),
+            CandidateResult('forest', {'n': 10}, 0.820, 0, single_us=900),
+        ]
+        self.assertEqual(select(results, max_accuracy_loss=0.01), results[2])
+        self.assertEqual([result.frontier for result in results], [True, False, True, False])
+        self.assertEqual(select(results, max_accuracy_loss=0.001), results[0])
+        self.assertEqual(select(results, latency_budget_us=500), results[2])
+        self.assertEqual(select(results, latency_budget_us=10000), results[0])
+
+    def test_search_records_accuracy_latency_and_size(self):
+        df = synthetic_dataset(200, seed=14)
+        X, _ = encode(df[FEATURES].to_numpy(dtype=np.int16))
+        results = search(X, df['G3'].to_numpy() >= 10, space=self.SPACE, folds=3, n_jobs=2, iterations=5)
+
+        self.assertEqual([result.label for result, _ in results], [
+            'forest(n_estimators=5, max_depth=4)',
+            'forest(n_estimators=10, max_depth=4)',
+            'hist_gb(max_iter=10, max_depth=3)',
+        ])
+        for result, model in results:
+            self.assertTrue(0 <= result.cv_accuracy <= 1)
+            self.assertGreater(result.single_us, 0)
+            self.assertGreater(result.size_kb, 0)
+            self.assertEqual(model.predict_proba(X[:2]).shape, (2, 2))
+
+    def test_retrain_with_search(self):
+        rng = np.random.default_rng(15)
+        for i in range(60):
+            make_student(random_student_data(rng), gpa=(i % 5) * 0.8)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(tmp)
+            with mock.patch('students.management.commands.retrain_model.ModelRegistry', return_value=registry), \
+                    mock.patch.dict('students.model_search.SEARCH_SPACE', self.SPACE, clear=True):
+                call_command('retrain_model', from_db=True, search=True, search_folds=2, stdout=io.StringIO())
+                search_metrics = registry.metadata(registry.active_version())['metrics']['search']
+                # Flattening searches only the forests.
+                call_command(
+                    'retrain_model', from_db=True, search=True, flat=True, search_folds=2, stdout=io.StringIO()
+                )
+                flat_metrics = registry.metadata(registry.active_version())['metrics']['search']
+            boosting_only = {'hist_gb': self.SPACE['hist_gb']}
+            with mock.patch.dict('students.model_search.SEARCH_SPACE', boosting_only, clear=True), \
+                    mock.patch('students.management.commands.retrain_model.search') as run_search:
+                with self.assertRaises(CommandError):
+                    call_command('retrain_model', from_db=True, search=True, compile_table=True, stdout=io.StringIO())
+            run_search.assert_not_called()
+
+        self.assertEqual(len(search_metrics['candidates']), 3)
+        self.assertIn(search_metrics['selected'], [c['label'] for c in search_metrics['candidates']])
+        self.assertEqual([c['family'] for c in flat_metrics['candidates']], ['forest', 'forest'])
+
+
+class KeysetPaginationTests(TestCase):
+    def walk(self, queryset, ordering, page_size):
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(queryset, ordering, cursor=cursor, page_size=page_size)
+            seen.extend(student.pk for student in page.items)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        rng = np.random.default_rng(15)
+        for i in range(37):
+            make_student(name=f's{i}', gpa=float(rng.integers(0, 5)))
+
+        ordering = [('gpa', True), ('id', True)]
+        expected = list(Student.objects.order_by('-gpa', '-id').values_list('pk', flat=True))
+        self.assertEqual(self.walk(Student.objects.all(), ordering, page_size=5), expected)
+
+    def test_nullable_columns_sort_nulls_last(self):
+        for i in range(12):
+            make_student(name=f's{i}')
+        Student.objects.filter(pk__in=Student.objects.order_by('pk').values('pk')[:5]).update(success_probability=None)
+        Student.objects.filter(success_probability__isnull=False).update(success_probability=0.5)
+
+        for descending in (True, False):
+            ordering = [('success_probability', descending), ('id', False)]
+            pks = self.walk(Student.objects.all(), ordering, page_size=3)
+            self.assertEqual(sorted(pks), sorted(Student.objects.values_list('pk', flat=True)))
+            nulls = set(Student.objects.filter(success_probability__isnull=True).values_list('pk', flat=True))
+            self.assertEqual(set(pks[-5:]), nulls)
+
+    @override_settings(STUDENT_LIST_PAGE_SIZE=10)
+    def test_student_list_is_paginated_and_pruned(self):
+        for i in range(25):
+            make_student(name=f's{i}', gpa=i / 10)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('students:student_list'))
+        students = response.context['students']
+        self.assertEqual([s.gpa for s in students], [i / 10 for i in range(24, 14, -1)])
+        self.assertEqual(students[0].get_deferred_fields() & {'name', 'age', 'gpa'}, set())
+        self.assertIn('mother_education', students[0].get_deferred_fields())
+
+        response = self.client.get(response.context['next_url'])
+        self.assertEqual(response.context['students'][0].gpa, 1.4)
+
+    def test_cursors_of_the_wrong_type_are_ignored(self):
+        for i in range(3):
+            make_student(name=f's{i}', gpa=i)
+        url = reverse('students:student_list')
+        for params in ({'after': '["a", 1]'}, {'sort': 'gpa', 'after': '["a", "b"]'}, {'after': '[null, 1]'}):
+            params['after'] = encode_cursor(json.loads(params['after']))
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['students']), 3)
+        self.assertEqual(cursor_values(Student, [('gpa', True), ('id', True)], encode_cursor(['2.5', '7'])), [2.5, 7])
+
+
+class StudentListFilterTests(TestCase):
+    def setUp(self):
+        self.risky = make_student(name='Ada Lovelace', absences=30, past_failures=2)
+        self.risky_less = make_student(name='Alan Turing', absences=4, past_failures=1)
+        self.safe = make_student(name='Grace Hopper', absences=10, past_failures=0)
+        Student.objects.filter(pk__in=[self.risky.pk, self.risky_less.pk]).update(success_probability=0.2)
+        Student.objects.filter(pk=self.safe.pk).update(success_probability=0.9)
+
+    def names(self, **params):
+        response = self.client.get(reverse('students:student_list'), params)
+        return [student.name for student in response.context['students']]
+
+    def test_range_filter_with_sort(self):
+        self.assertEqual(self.names(probability_max=0.4, sort='-absences'), ['Ada Lovelace', 'Alan Turing'])
+        self.assertEqual(self.names(probability_max=0.4, sort='absences'), ['Alan Turing', 'Ada Lovelace'])
+        self.assertEqual(self.names(failures_min=1, absences_max=10), ['Alan Turing'])
+
+    def test_multi_column_sort_and_pagination(self):
+        make_student(name='Another', absences=30, past_failures=0)
+        with self.settings(STUDENT_LIST_PAGE_SIZE=2):
+            response = self.client.get(reverse('students:student_list'), {'sort': '-absences,past_failures'})
+            first = [s.name for s in response.context['students']]
+            rest = [s.name for s in self.client.get(response.context['next_url']).context['students']]
+        self.assertEqual(first + rest, ['Another', 'Ada Lovelace', 'Grace Hopper', 'Alan Turing'])
+
+    def test_invalid_parameters_are_reported_and_ignored(self):
+        response = self.client.get(reverse('students:student_list'), {'sort': 'password', 'absences_min': 20})
+        self.assertIn('sort', response.context['filters'].errors)
+        self.assertEqual([s.name for s in response.context['students']], ['Ada Lovelace'])
+
+    def test_name_prefix_search(self):
+        self.assertTrue(fts_available())
+        self.assertEqual(self.names(q='al'), ['Alan Turing'])
+        self.assertEqual(sorted(self.names(q='Lov')), ['Ada Lovelace'])
+        self.assertEqual(self.names(q='ada lov'), ['Ada Lovelace'])
+
+    def test_search_index_follows_renames_and_deletes(self):
+        self.risky.name = 'Barbara Liskov'
+        self.risky.save()
+        self.safe.delete()
+
+        self.assertEqual(list(search_names(Student.objects.all(), 'lisk')), [self.risky])
+        self.assertFalse(search_names(Student.objects.all(), 'lovelace').exists())
+        self.assertFalse(search_names(Student.objects.all(), 'grace').exists())
@@ -0,0 +1,98 @@
+# In students/training.py
+"""Training data for ``retrain_model``, loaded and encoded compactly.
+
+Only the feature and grade columns are read, in chunks, into small
+integers, and the categorical inputs are one-hot encoded straight into a
+``uint8`` matrix. The columns and their order match ``pd.get_dummies`` on
+stringified categoricals, which the served artifacts rely on, without the
+per-cell Python strings and the dense float frame.
+"""
+import numpy as np
+import pandas as pd
+
+from .feature_schema import CATEGORICAL, FEATURES
+
+# A final grade G3 of at least 10 (out of 20) counts as success; on the
+# Student table that is a GPA of at least 2.0 (see importer).
+SUCCESS_G3 = 10
+SUCCESS_GPA = 2.0
+
+
+def _compact(values, source):
+    """Check ``values`` are small non-negative integers and return them as int16."""
+    if np.isnan(values).any():
+        raise ValueError(f'{source} has missing values')
+    if (values != np.floor(values)).any() or values.min(initial=0) < 0 or values.max(initial=0) > 32767:
+        raise ValueError(f'{source} has values that are not small non-negative integers')
+    return values.astype(np.int16)
+
+
+def read_csv(path, chunksize=100_000):
+    """Return ``(raw, y)`` from a semicolon-separated dataset.
+
+    ``raw`` is an int16 array of the ``FEATURES`` columns and ``y`` the 0/1
+    success target. The file is read ``chunksize`` rows at a time.
+    """
+    raws, targets = [], []
+    reader = pd.read_csv(path, sep=';', usecols=FEATURES + ['G3'], chunksize=chunksize)
+    for chunk in reader:
+        raws.append(_compact(chunk[FEATURES].to_numpy(dtype=float), path))
+        targets.append((chunk['G3'].to_numpy() >= SUCCESS_G3).astype(np.uint8))
+    if not raws:
+        raise ValueError(f'{path} has no rows')
+    return np.concatenate(raws), np.concatenate(targets)
+
+
+def read_students(queryset, chunksize=100_000):
+    """Like ``read_csv`` but from ``Student`` rows, with success taken from the GPA.
+
+    The inputs come from the packed feature vectors, so a chunk is one
+    ``frombuffer`` rather than thirteen columns of Python ints.
+    """
+    from .feature_vectors import read_chunks
+
+    raws, targets = [], []
+    for _, matrix, extra in read_chunks(queryset, chunksize, extra=('gpa',)):
+        raws.append(_compact(matrix, 'Student table'))
+        targets.append((np.array([gpa for gpa, in extra], dtype=float) >= SUCCESS_GPA).astype(np.uint8))
+    if not raws:
+        raise ValueError('The Student table is empty')
+    return np.concatenate(raws), np.concatenate(targets)
+
+
+def read_export(directory):
+    """Like ``read_students`` but from a ``feature_vectors.export_matrix`` directory."""
+    from .feature_vectors import load_matrix
+
+    _, features, gpa = load_matrix(directory)
+    if not len(features):
+        raise ValueError(f'{directory} has no rows')
+    return _compact(np.asarray(features), directory), (gpa >= SUCCESS_GPA).astype(np.uint8)
+
+
+def encode(raw, categorical=CATEGORICAL):
+    """One-hot encode ``raw`` (laid out like ``FEATURES``) into a compact matrix.
+
+    Returns ``(X, feature_names)``. Non-categorical columns come first, then
+    one 0/1 column per category seen, labels sorted as strings, exactly as
+    ``pd.get_dummies`` names and orders them. ``X`` is uint8 unless a
+    numeric input exceeds 255.
+    """
+    numeric = [i for i, feature in enumerate(FEATURES) if feature not in categorical]
+    # (feature name, raw column, category or None for a numeric column)
+    specs = [(FEATURES[i], i, None) for i in numeric]
+    for col in categorical:
+        i = FEATURES.index(col)
+        for label in sorted(str(v) for v in np.unique(raw[:, i])):
+            specs.append((f'{col}_{label}', i, int(label)))
+
+    peak = max((int(raw[:, i].max(initial=0)) for i in numeric), default=0)
+    X = np.empty((len(raw), len(specs)), dtype=np.uint8 if peak <= 255 else np.uint16)
+    for j, (_, i, label) in enumerate(specs):
+        X[:, j] = raw[:, i] if label is None else raw[:, i] == label
+    return X, [name for name, _, _ in specs]
+
+
+def raw_frame(raw):
+    """``raw`` as a DataFrame with the feature names (for the lookup table)."""
+    return pd.DataFrame(raw, columns=FEATURES)
@@ -1,13 +1,22 @@
 # In students/urls.py
+from django.conf import settings
 from django.urls import path
-from . import views
+
+from . import async_views, views
 
 app_name = 'students'
 
+# Under ASGI, serve the async list/detail/prediction views (see async_views).
+live = async_views if getattr(settings, 'STUDENT_ASYNC_VIEWS', False) else views
+
 urlpatterns = [
-    path("", views.student_list, name="student_list"),
+    path("", live.student_list, name="student_list"),
     path("add/", views.student_create, name="student_add"),
-    path("<int:student_id>/", views.student_detail, name="student_detail"),
+    path("import/", views.student_import, name="student_import"),
+    path("export/", views.student_export, name="student_export"),
+    path("dashboard/", views.risk_dashboard, name="risk_dashboard"),
+    path("<int:student_id>/", live.student_detail, name="student_detail"),
+    path("<int:student_id>/prediction/", live.student_prediction, name="student_prediction"),
     path("<int:student_id>/edit/", views.student_edit, name="student_edit"),
     path("<int:student_id>/delete/", views.student_delete, name="student_delete"),
 ]
\ No newline at end of file
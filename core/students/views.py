@@ -1,41 +1,111 @@
 # In students/views.py
+import io
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic.edit import DeleteView
 
-from .models import Student
-from .forms import StudentForm
-from .prediction_service import predictor
+from . import page_cache
+from .models import HIGH_RISK_BELOW, LOW_RISK_FROM, RISK_BANDS, RiskAlert, RiskSnapshot, Student
+from .export import EXPORT_FORMATS, export_filename, stream_export
+from .forms import StudentExportForm, StudentFilterForm, StudentForm, StudentImportForm
+from .importer import import_students
+from .pagination import keyset_paginate, order_expressions
+from .prediction_service import factor_label, predictor
+
+# Columns the list template renders (plus any sort column); everything else
+# stays in the database.
+LIST_COLUMNS = ('id', 'name', 'age', 'gpa', 'success_probability', 'absences')
+
+# Default keyset order, backed by the student_gpa_id_idx index.
+LIST_ORDERING = [('gpa', True), ('id', True)]
+
+
+def list_queryset(filters, ordering):
+    return filters.filter(Student.objects.only(*LIST_COLUMNS, *(name for name, _ in ordering)))
+
+
+def render_list(request, filters, page):
+    next_url = None
+    if page.has_next:
+        query = request.GET.copy()
+        query['after'] = page.next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+
+    first_query = request.GET.copy()
+    first_query.pop('after', None)
+
+    return render(request, "students/student_list.html", {
+        "students": page.items,
+        "page": page,
+        "filters": filters,
+        "next_url": next_url,
+        "first_url": f'{request.path}?{first_query.urlencode()}',
+        "export_url": f"{reverse('students:student_export')}?{first_query.urlencode()}",
+        "is_first_page": 'after' not in request.GET,
+    })
+
 
 def student_list(request):
-    """View to display a list of all students."""
-    students = Student.objects.all().order_by('-gpa')
-    return render(request, "students/student_list.html", {"students": students})
+    """View to display a filtered, sorted page of students (best GPA first by default)."""
+    key = page_cache.list_key(request)
+    response = page_cache.cached_page(key)
+    if response is None:
+        filters = StudentFilterForm(request.GET)
+        filters.is_valid()  # invalid parameters are reported and ignored
 
-def student_detail(request, student_id):
-    """View to display a single student."""
-    student = get_object_or_404(Student, id=student_id)
+        ordering = filters.ordering()
+        page = keyset_paginate(
+            list_queryset(filters, ordering),
+            ordering,
+            cursor=request.GET.get('after'),
+            page_size=getattr(settings, 'STUDENT_LIST_PAGE_SIZE', 50),
+        )
+        response = render_list(request, filters, page)
+        page_cache.store_page(key, response)
+    return response
 
-    student_data = {
-        'age': student.age,
-        'Medu': student.mother_education,
-        'Fedu': student.father_education,
-        'traveltime': student.travel_time,
-        'studytime': student.study_time,
-        'failures': student.past_failures,
-        'famrel': student.family_relations,
-        'freetime': student.free_time,
-        'goout': student.go_out,
-        'Dalc': student.workday_alcohol,
-        'Walc': student.weekend_alcohol,
-        'health': student.health_status,
-        'absences': student.absences,
-    }
+def student_export(request):
+    """Stream the students matching the list filters as CSV or JSON Lines.
 
-    success_probability = student.success_probability
-    if success_probability is None:
-        success_probability = predictor.predict_success_probability(student_data)
+    ``format=jsonl``, ``factors=N`` (top explanation factors) and ``gzip=1``
+    are accepted on top of the list's query parameters.
+    """
+    form = StudentExportForm(request.GET)
+    if not form.is_valid():
+        # Unlike the list, a bad filter must not silently export everyone.
+        return HttpResponseBadRequest(form.errors.as_text(), content_type='text/plain')
+
+    export_format = form.cleaned_data['format'] or 'csv'
+    compress = form.cleaned_data['gzip']
+    queryset = form.filter(Student.objects.order_by(*order_expressions(Student, form.ordering())))
+    response = StreamingHttpResponse(
+        stream_export(
+            queryset,
+            export_format=export_format,
+            factors=form.cleaned_data['factors'] or 0,
+            compress=compress,
+            chunk_size=getattr(settings, 'STUDENT_EXPORT_CHUNK_SIZE', 2000),
+        ),
+        content_type='application/gzip' if compress else EXPORT_FORMATS[export_format][0],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(export_format, compress)}"'
+    return response
 
+def score_and_explain(student, top_n=5):
+    """``(success_probability, raw factors)`` for a student, using the stored probability if any."""
+    student_data = student.prediction_data()
+    current = predictor.load()
+    method = getattr(settings, 'STUDENT_EXPLANATION_METHOD', 'importance')
+    if student.success_probability is None:
+        return current.predict_and_explain(student_data, top_n=top_n, method=method)
+    return student.success_probability, current.explain(student_data, top_n=top_n, method=method)
+
+
+def render_detail(request, student, success_probability, raw_factors):
     try:
         success_percentage = int(round(float(success_probability) * 100))
     except Exception:
@@ -43,30 +113,14 @@ def student_detail(request, student_id):
 
     if success_probability is None:
         bar_color_class = 'bg-gray-400'
-    elif success_probability >= 0.7:
+    elif success_probability >= LOW_RISK_FROM:
         bar_color_class = 'bg-green-500'
-    elif success_probability >= 0.4:
+    elif success_probability >= HIGH_RISK_BELOW:
         bar_color_class = 'bg-yellow-500'
     else:
         bar_color_class = 'bg-red-500'
 
-    raw_factors = predictor.explain(student_data, top_n=5)
-    model_factors = []
-    for item in raw_factors:
-        feature = str(item.get('feature', ''))
-        value = item.get('value', None)
-
-        label = feature
-        if '_' in feature:
-            prefix, suffix = feature.split('_', 1)
-            label = f"{prefix}={suffix}"
-        elif value is not None:
-            try:
-                label = f"{feature}={float(value):.0f}"
-            except Exception:
-                label = f"{feature}={value}"
-
-        model_factors.append(label)
+    model_factors = [factor_label(item) for item in raw_factors]
 
     return render(
         request,
@@ -80,6 +134,82 @@ def student_detail(request, student_id):
         },
     )
 
+
+def _render_student_detail(request, student_id):
+    student = get_object_or_404(Student, id=student_id)
+    success_probability, raw_factors = score_and_explain(student)
+    return render_detail(request, student, success_probability, raw_factors)
+
+
+def student_detail(request, student_id):
+    """View to display a single student; a 304 or the cached page if neither it nor the model changed."""
+    row = get_object_or_404(Student.objects.values_list(*page_cache.VALIDATOR_FIELDS), id=student_id)
+    if not page_cache.cacheable(request):
+        return _render_student_detail(request, student_id)
+
+    etag, last_modified = page_cache.detail_validators(student_id, row, predictor.load())
+    response = page_cache.not_modified(request, etag, last_modified)
+    if response is None:
+        key = page_cache.detail_key(student_id)
+        response = page_cache.cached_page(key, etag)
+        if response is None:
+            response = _render_student_detail(request, student_id)
+            page_cache.store_page(key, response, etag)
+    return page_cache.with_validators(response, etag, last_modified)
+
+
+def prediction_payload(student, success_probability, raw_factors):
+    return {
+        "id": student.id,
+        "success_probability": success_probability,
+        "model_version": student.model_version,
+        "factors": [{**item, "label": factor_label(item)} for item in raw_factors],
+    }
+
+
+def student_prediction(request, student_id):
+    """JSON: a student's success probability and top factors."""
+    student = get_object_or_404(Student, id=student_id)
+    return JsonResponse(prediction_payload(student, *score_and_explain(student)))
+
+def _risk_rows(cells, attribute, labels):
+    """Group snapshot cells by ``attribute``: one row per value, one column per band."""
+    totals = {}
+    for cell in cells:
+        key = None if attribute is None else getattr(cell, attribute)
+        counts = totals.setdefault(key, {band: [0, 0.0] for band, _ in RISK_BANDS})
+        counts[cell.band][0] += cell.count
+        counts[cell.band][1] += cell.probability_sum
+
+    rows = []
+    for key in sorted(totals, key=lambda value: (value is None, value)):
+        bands = []
+        for band, label in RISK_BANDS:
+            count, total = totals[key][band]
+            mean = total / count if count and band != 'unscored' else None
+            bands.append({'band': band, 'label': label, 'count': count, 'mean': mean})
+        rows.append({
+            'label': labels.get(key, key),
+            'bands': bands,
+            'total': sum(item['count'] for item in bands),
+        })
+    return rows
+
+
+def risk_dashboard(request):
+    """At-risk counts by study time and past failures, read from the risk snapshot, and recent alerts."""
+    cells = [cell for cell in RiskSnapshot.objects.all() if cell.count]
+    overall = _risk_rows(cells, None, {None: 'All students'})
+    return render(request, "students/risk_dashboard.html", {
+        "bands": RISK_BANDS,
+        "overall": overall[0] if overall else None,
+        "tables": [
+            ("Weekly study time", _risk_rows(cells, 'study_time', dict(Student._meta.get_field('study_time').choices))),
+            ("Past failures", _risk_rows(cells, 'past_failures', {})),
+        ],
+        "alerts": RiskAlert.objects.select_related('student')[:20],
+    })
+
 def student_create(request):
     """View to create a new student."""
     if request.method == "POST":
@@ -91,6 +221,30 @@ def student_create(request):
         form = StudentForm()
     return render(request, "students/student_form.html", {"form": form, "action": "Add"})
 
+def student_import(request):
+    """View to bulk-import students from an uploaded CSV."""
+    if request.method == "POST":
+        form = StudentImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = request.FILES['file']
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_students(
+                    stream, chunk_size=getattr(settings, 'STUDENT_IMPORT_CHUNK_SIZE', 5000)
+                )
+            except (ValueError, UnicodeDecodeError) as e:
+                form.add_error('file', str(e))
+            else:
+                messages.success(
+                    request, f"Imported {result.created} students ({result.skipped} invalid rows skipped)."
+                )
+                for line, message in result.errors[:10]:
+                    messages.error(request, f"Line {line}: {message}")
+                return redirect('students:student_list')
+    else:
+        form = StudentImportForm()
+    return render(request, "students/student_import.html", {"form": form})
+
 def student_edit(request, student_id):
     """View to edit an existing student."""
     student = get_object_or_404(Student, id=student_id)